@@ -0,0 +1,106 @@
+const fs = require('fs');
+const path = require('path');
+
+// Checkpoint por página dos scrapers: cada página extraída é gravada assim que
+// termina e o cursor registra a última página concluída. Se o scraping falhar
+// no meio, a próxima execução retoma do cursor em vez de voltar à página 1.
+// Mesmo layout de python/scrape_checkpoint.py (o engine lê o cursor para as mensagens):
+//   data/listas_brutas/paginas/<lista>/pagina_0001.json   produtos da página 1
+//   data/listas_brutas/paginas/<lista>/cursor.json        { completed_through, saved_pages, end_page, complete, started_at, updated_at }
+
+const CHECKPOINT_ROOT = 'data/listas_brutas/paginas';
+const CURSOR_FILENAME = 'cursor.json';
+// Checkpoints mais antigos que isto são descartados (os preços já podem ter mudado)
+const MAX_AGE_SECONDS = 24 * 3600;
+
+const pagePath = (dir, page) => path.join(dir, `pagina_${String(page).padStart(4, '0')}.json`);
+
+const writeJson = (filePath, data) => {
+  const tmpPath = `${filePath}.tmp`;
+  fs.writeFileSync(tmpPath, JSON.stringify(data));
+  fs.renameSync(tmpPath, filePath);
+};
+
+const loadCursor = (dir) => {
+  try {
+    return JSON.parse(fs.readFileSync(path.join(dir, CURSOR_FILENAME), 'utf-8'));
+  } catch (error) {
+    return null;
+  }
+};
+
+const savedPages = (dir) => {
+  if (!fs.existsSync(dir)) return [];
+  return fs.readdirSync(dir)
+    .map(filename => filename.match(/^pagina_(\d+)\.json$/))
+    .filter(match => match)
+    .map(match => parseInt(match[1], 10))
+    .sort((a, b) => a - b);
+};
+
+const clearPages = (dir) => savedPages(dir).forEach(page => fs.unlinkSync(pagePath(dir, page)));
+
+const updateCursor = (dir, changes = {}) => {
+  const pages = savedPages(dir);
+  let completedThrough = 0;
+  for (const page of pages) {
+    if (page !== completedThrough + 1) break;
+    completedThrough = page;
+  }
+  const cursor = {
+    ...(loadCursor(dir) || {}),
+    completed_through: completedThrough,
+    saved_pages: pages.length,
+    updated_at: Date.now() / 1000,
+    ...changes,
+  };
+  writeJson(path.join(dir, CURSOR_FILENAME), cursor);
+  return cursor;
+};
+
+// Prepara o checkpoint da lista: retoma um scraping interrompido recente ou começa
+// um novo. Retorna { dir, cursor, startPage } (startPage = primeira página que falta).
+const openCheckpoint = (listName) => {
+  const dir = path.join(CHECKPOINT_ROOT, listName);
+  fs.mkdirSync(dir, { recursive: true });
+  let cursor = loadCursor(dir);
+  const resumable = cursor && !cursor.complete && Date.now() / 1000 - (cursor.updated_at || 0) <= MAX_AGE_SECONDS;
+  if (!resumable) {
+    clearPages(dir);
+    const now = Date.now() / 1000;
+    cursor = { completed_through: 0, saved_pages: 0, end_page: null, complete: false, started_at: now, updated_at: now };
+    writeJson(path.join(dir, CURSOR_FILENAME), cursor);
+  } else {
+    console.log(`Retomando o scraping do checkpoint: ${cursor.saved_pages} página(s) já salvas, completas até a página ${cursor.completed_through}.`);
+  }
+  return { dir, cursor, startPage: cursor.completed_through + 1 };
+};
+
+// Grava os produtos de uma página e avança o cursor
+const savePage = (checkpoint, page, products) => {
+  writeJson(pagePath(checkpoint.dir, page), products);
+  checkpoint.cursor = updateCursor(checkpoint.dir);
+};
+
+// Registra a última página com produtos (o fim da listagem)
+const markEnd = (checkpoint, endPage) => {
+  checkpoint.cursor = updateCursor(checkpoint.dir, { end_page: endPage });
+};
+
+// Produtos de todas as páginas salvas (até end_page), na ordem das páginas
+const consolidate = (checkpoint) => {
+  const endPage = checkpoint.cursor.end_page;
+  const products = [];
+  savedPages(checkpoint.dir)
+    .filter(page => endPage === null || endPage === undefined || page <= endPage)
+    .forEach(page => products.push(...JSON.parse(fs.readFileSync(pagePath(checkpoint.dir, page), 'utf-8'))));
+  return products;
+};
+
+// Marca o scraping como concluído e apaga as páginas (já consolidadas na lista bruta)
+const finish = (checkpoint) => {
+  checkpoint.cursor = updateCursor(checkpoint.dir, { complete: true });
+  clearPages(checkpoint.dir);
+};
+
+module.exports = { openCheckpoint, savePage, markEnd, consolidate, finish };
@@ -1,5 +1,6 @@
 const puppeteer = require('puppeteer');
 const fs = require('fs'); // Importa o módulo 'fs' para lidar com arquivos
+const scrapeCheckpoint = require('./scrape_checkpoint');
 
 (async () => {
   // Para depuração visual, mude 'headless: true' para 'headless: false'
@@ -18,8 +19,12 @@ const fs = require('fs'); // Importa o módulo 'fs' para lidar com arquivos
   });
 
 
+  // Checkpoint por página: se o último scraping parou no meio, retoma da primeira página que falta
+  const checkpoint = scrapeCheckpoint.openCheckpoint('lista_cosmeticos');
+  const startUrl = checkpoint.startPage > 1 ? 'https://www.electricink.com.br/cosmeticos?page=' + checkpoint.startPage : 'https://www.electricink.com.br/cosmeticos';
+
   console.log('Abrindo página de produtos de Cosméticos da Electric Ink...');
-  await page.goto('https://www.electricink.com.br/cosmeticos', { // URL da página de cosméticos
+  await page.goto(startUrl, { // URL da página de cosméticos
     waitUntil: 'networkidle2', 
     timeout: 60000 
   });
@@ -27,9 +32,9 @@ const fs = require('fs'); // Importa o módulo 'fs' para lidar com arquivos
   console.log('Esperando um tempo para o JavaScript carregar o conteúdo inicial...');
   await new Promise(resolve => setTimeout(resolve, 8000)); 
 
-  const allProducts = [];
-  let currentPage = 1;
-  let hasNextPage = true;
+  let currentPage = checkpoint.startPage;
+  // Se o fim da listagem já foi alcançado (só faltou gravar a lista), não há páginas a baixar
+  let hasNextPage = checkpoint.cursor.end_page === null || checkpoint.cursor.end_page === undefined;
 
   while (hasNextPage) {
     console.log(`Extraindo dados de Cosméticos da Página ${currentPage}...`);
@@ -39,6 +44,7 @@ const fs = require('fs'); // Importa o módulo 'fs' para lidar com arquivos
     } catch (error) {
       console.warn(`Aviso: Nenhum seletor principal encontrado na página ${currentPage}. Pulando para a próxima página ou finalizando.`);
       hasNextPage = false; 
+      scrapeCheckpoint.markEnd(checkpoint, currentPage - 1);
       break;
     }
 
@@ -208,8 +214,8 @@ const fs = require('fs'); // Importa o módulo 'fs' para lidar com arquivos
       return finalProductsList; 
     });
 
-    allProducts.push(...productsOnPage);
-    console.log(`Página ${currentPage}: ${productsOnPage.length} produtos extraídos. Total: ${allProducts.length}`);
+    scrapeCheckpoint.savePage(checkpoint, currentPage, productsOnPage);
+    console.log(`Página ${currentPage}: ${productsOnPage.length} produtos extraídos e salvos no checkpoint.`);
 
     const nextButton = await page.$('.electricink-search-result-3-x-nextPage');
     
@@ -217,6 +223,7 @@ const fs = require('fs'); // Importa o módulo 'fs' para lidar com arquivos
       const isDisabled = await page.evaluate(btn => btn.disabled, nextButton);
       if (isDisabled) {
         hasNextPage = false;
+        scrapeCheckpoint.markEnd(checkpoint, currentPage);
         console.log('Botão "Próximo" desabilitado. Fim da paginação.');
       } else {
         console.log('Clicando no botão "Próximo"...');
@@ -227,13 +234,15 @@ const fs = require('fs'); // Importa o módulo 'fs' para lidar com arquivos
       }
     } else {
       hasNextPage = false; 
+      scrapeCheckpoint.markEnd(checkpoint, currentPage);
       console.log('Botão "Próximo" não encontrado. Fim da paginação.');
     }
   }
 
   const finalAllProducts = [];
   const seen = new Set();
-  allProducts.forEach(item => {
+  // Consolida as páginas do checkpoint (as desta execução e as de uma execução interrompida)
+  scrapeCheckpoint.consolidate(checkpoint).forEach(item => {
     const identifier = `${item.name}-${JSON.stringify(item.availableOptions)}`; 
     if (!seen.has(identifier)) {
       finalAllProducts.push(item);
@@ -247,8 +256,10 @@ const fs = require('fs'); // Importa o módulo 'fs' para lidar com arquivos
   try {
     fs.writeFileSync(filePath, JSON.stringify(finalAllProducts, null, 2));
     console.log(`Dados de Cosméticos salvos com sucesso em ${filePath}`);
+    scrapeCheckpoint.finish(checkpoint);
   } catch (error) {
     console.error(`Erro ao salvar os dados de Cosméticos em ${filePath}:`, error);
+    process.exitCode = 1;
   }
 
   await browser.close();
@@ -1,5 +1,6 @@
 const puppeteer = require('puppeteer');
 const fs = require('fs'); // Importa o módulo 'fs' para lidar com arquivos
+const scrapeCheckpoint = require('./scrape_checkpoint');
 const path = require('path');
 
 (async () => {
@@ -21,8 +22,12 @@ const path = require('path');
   });
 
 
+  // Checkpoint por página: se o último scraping parou no meio, retoma da primeira página que falta
+  const checkpoint = scrapeCheckpoint.openCheckpoint('lista_html');
+  const startUrl = checkpoint.startPage > 1 ? 'https://www.electricink.com.br/tatuagem?page=' + checkpoint.startPage : 'https://www.electricink.com.br/tatuagem';
+
   console.log('Abrindo página de produtos da Electric Ink...');
-  await page.goto('https://www.electricink.com.br/tatuagem', {
+  await page.goto(startUrl, {
     waitUntil: 'networkidle2', // Espera que não haja mais de 2 requisições de rede por 500ms
     timeout: 60000 // Aumenta o timeout para a navegação inicial
   });
@@ -30,9 +35,9 @@ const path = require('path');
   console.log('Esperando um tempo para o JavaScript carregar o conteúdo inicial...');
   await new Promise(resolve => setTimeout(resolve, 8000)); // Aumentado para 8s para garantir carregamento inicial
 
-  const allProducts = [];
-  let currentPage = 1;
-  let hasNextPage = true;
+  let currentPage = checkpoint.startPage;
+  // Se o fim da listagem já foi alcançado (só faltou gravar a lista), não há páginas a baixar
+  let hasNextPage = checkpoint.cursor.end_page === null || checkpoint.cursor.end_page === undefined;
 
   while (hasNextPage) {
     console.log(`Extraindo dados da Página ${currentPage}...`);
@@ -43,6 +48,7 @@ const path = require('path');
     } catch (error) {
       console.warn(`Aviso: Nenhum seletor de item de galeria encontrado na página ${currentPage}. Pulando para a próxima página ou finalizando.`);
       hasNextPage = false; // Se não encontrar itens, pode ser o fim ou um erro.
+      scrapeCheckpoint.markEnd(checkpoint, currentPage - 1);
       break;
     }
 
@@ -157,8 +163,8 @@ const path = require('path');
       return items; 
     });
 
-    allProducts.push(...productsOnPage);
-    console.log(`Página ${currentPage}: ${productsOnPage.length} produtos extraídos. Total: ${allProducts.length}`);
+    scrapeCheckpoint.savePage(checkpoint, currentPage, productsOnPage);
+    console.log(`Página ${currentPage}: ${productsOnPage.length} produtos extraídos e salvos no checkpoint.`);
 
     // Tentar encontrar o botão "Próximo"
     const nextButton = await page.$('.electricink-search-result-3-x-nextPage');
@@ -168,6 +174,7 @@ const path = require('path');
       const isDisabled = await page.evaluate(btn => btn.disabled, nextButton);
       if (isDisabled) {
         hasNextPage = false;
+        scrapeCheckpoint.markEnd(checkpoint, currentPage);
         console.log('Botão "Próximo" desabilitado. Fim da paginação.');
       } else {
         console.log('Clicando no botão "Próximo"...');
@@ -178,6 +185,7 @@ const path = require('path');
       }
     } else {
       hasNextPage = false; 
+      scrapeCheckpoint.markEnd(checkpoint, currentPage);
       console.log('Botão "Próximo" não encontrado. Fim da paginação.');
     }
   }
@@ -185,7 +193,8 @@ const path = require('path');
   // Filtra produtos duplicados de TODO o allProducts no final, para garantir
   const finalAllProducts = [];
   const seen = new Set();
-  allProducts.forEach(item => {
+  // Consolida as páginas do checkpoint (as desta execução e as de uma execução interrompida)
+  scrapeCheckpoint.consolidate(checkpoint).forEach(item => {
     // Identificador de deduplicação: nome e opções disponíveis
     const identifier = `${item.name}-${JSON.stringify(item.availableOptions)}`; 
     if (!seen.has(identifier)) {
@@ -208,8 +217,10 @@ const path = require('path');
   try {
     fs.writeFileSync(filePath, JSON.stringify(finalAllProducts, null, 2));
     console.log(`Dados salvos com sucesso em ${filePath}`);
+    scrapeCheckpoint.finish(checkpoint);
   } catch (error) {
     console.error(`Erro ao salvar os dados em ${filePath}:`, error);
+    process.exitCode = 1;
   }
 
   await browser.close();
@@ -1,5 +1,6 @@
 const puppeteer = require('puppeteer');
 const fs = require('fs'); // Importa o módulo 'fs' para lidar com arquivos
+const scrapeCheckpoint = require('./scrape_checkpoint');
 const path = require('path');
 
 (async () => {
@@ -21,8 +22,12 @@ const path = require('path');
   });
 
 
+  // Checkpoint por página: se o último scraping parou no meio, retoma da primeira página que falta
+  const checkpoint = scrapeCheckpoint.openCheckpoint('lista_json_ld');
+  const startUrl = checkpoint.startPage > 1 ? 'https://www.electricink.com.br/tatuagem?page=' + checkpoint.startPage : 'https://www.electricink.com.br/tatuagem';
+
   console.log('Abrindo página de produtos da Electric Ink...');
-  await page.goto('https://www.electricink.com.br/tatuagem', {
+  await page.goto(startUrl, {
     waitUntil: 'networkidle2', // Espera que não haja mais de 2 requisições de rede por 500ms
     timeout: 60000 // Aumenta o timeout para a navegação inicial
   });
@@ -30,9 +35,9 @@ const path = require('path');
   console.log('Esperando um tempo para o JavaScript carregar o conteúdo inicial...');
   await new Promise(resolve => setTimeout(resolve, 8000)); // Aumentado para 8s para garantir carregamento inicial
 
-  const allProducts = [];
-  let currentPage = 1;
-  let hasNextPage = true;
+  let currentPage = checkpoint.startPage;
+  // Se o fim da listagem já foi alcançado (só faltou gravar a lista), não há páginas a baixar
+  let hasNextPage = checkpoint.cursor.end_page === null || checkpoint.cursor.end_page === undefined;
 
   while (hasNextPage) {
     console.log(`Extraindo dados da Página ${currentPage}...`);
@@ -43,6 +48,7 @@ const path = require('path');
     } catch (error) {
       console.warn(`Aviso: JSON-LD não encontrado na página ${currentPage}. Pulando para a próxima página ou finalizando.`);
       hasNextPage = false; // Se não encontrar JSON-LD, pode ser o fim ou um erro.
+      scrapeCheckpoint.markEnd(checkpoint, currentPage - 1);
       break;
     }
 
@@ -119,6 +125,7 @@ const path = require('path');
             
             let availablePrices = new Set(); 
             let availableOptions = []; 
+            let variants = []; // SKU, preço e nome de cada oferta, sem perder o par SKU -> preço
 
             // Extrair todos os preços e SKUs das ofertas individuais
             if (product.offers && product.offers.offers && Array.isArray(product.offers.offers)) {
@@ -131,6 +138,13 @@ const path = require('path');
                 }
                 if (offer.sku) { // Adiciona o SKU como uma opção disponível
                     availableOptions.push(offer.sku);
+                    variants.push({
+                      sku: String(offer.sku),
+                      price: offer.price !== undefined && offer.price !== null
+                        ? (typeof offer.price === 'number' ? `R$ ${offer.price.toFixed(2).replace('.', ',')}` : `R$ ${offer.price}`)
+                        : null,
+                      name: offer.name || (offer.itemOffered && offer.itemOffered.name) || null,
+                    });
                 }
               });
             }
@@ -162,6 +176,7 @@ const path = require('path');
                 return numA - numB;
               }),
               materialType,
+              variants: variants.sort((a, b) => a.sku.localeCompare(b.sku)),
             });
             console.log(`[BROWSER CONSOLE] Produto JSON-LD adicionado: '${name}' (Preços: ${Array.from(availablePrices).join(', ')})`);
           }
@@ -173,8 +188,8 @@ const path = require('path');
       return items; 
     });
 
-    allProducts.push(...productsOnPage);
-    console.log(`Página ${currentPage}: ${productsOnPage.length} produtos extraídos. Total: ${allProducts.length}`);
+    scrapeCheckpoint.savePage(checkpoint, currentPage, productsOnPage);
+    console.log(`Página ${currentPage}: ${productsOnPage.length} produtos extraídos e salvos no checkpoint.`);
 
     // Tentar encontrar o botão "Próximo"
     const nextButton = await page.$('.electricink-search-result-3-x-nextPage');
@@ -184,6 +199,7 @@ const path = require('path');
       const isDisabled = await page.evaluate(btn => btn.disabled, nextButton);
       if (isDisabled) {
         hasNextPage = false;
+        scrapeCheckpoint.markEnd(checkpoint, currentPage);
         console.log('Botão "Próximo" desabilitado. Fim da paginação.');
       } else {
         console.log('Clicando no botão "Próximo"...');
@@ -195,6 +211,7 @@ const path = require('path');
       }
     } else {
       hasNextPage = false; // Botão "Próximo" não encontrado
+      scrapeCheckpoint.markEnd(checkpoint, currentPage);
       console.log('Botão "Próximo" não encontrado. Fim da paginação.');
     }
   }
@@ -202,7 +219,8 @@ const path = require('path');
   // Filtra produtos duplicados de TODO o allProducts no final, para garantir
   const finalAllProducts = [];
   const seen = new Set();
-  allProducts.forEach(item => {
+  // Consolida as páginas do checkpoint (as desta execução e as de uma execução interrompida)
+  scrapeCheckpoint.consolidate(checkpoint).forEach(item => {
     const identifier = `${item.name}-${JSON.stringify(item.availableOptions)}-${JSON.stringify(item.availablePrice)}`;
     if (!seen.has(identifier)) {
       finalAllProducts.push(item);
@@ -221,8 +239,10 @@ const path = require('path');
   try {
     fs.writeFileSync(filePath, JSON.stringify(finalAllProducts, null, 2));
     console.log(`Dados salvos com sucesso em ${filePath}`);
+    scrapeCheckpoint.finish(checkpoint);
   } catch (error) {
     console.error(`Erro ao salvar os dados em ${filePath}:`, error);
+    process.exitCode = 1;
   }
 
   await browser.close();
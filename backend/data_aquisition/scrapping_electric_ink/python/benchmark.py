@@ -0,0 +1,297 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shlex
+import shutil
+import sys
+import tempfile
+import time
+
+import metrics
+import prices
+
+# Tamanhos (quantidade de produtos do catálogo sintético) medidos por padrão.
+# 1.000.000 também é suportado, mas leva alguns minutos: use --sizes.
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+# Resultados de referência e da última execução
+BASELINE_PATH = "data/benchmarks/baseline.json"
+LATEST_PATH = "data/benchmarks/latest.json"
+
+# Aumento relativo tolerado antes de acusar regressão (0.25 = 25%)
+DEFAULT_THRESHOLD = 0.25
+# Diferenças de tempo menores que isto são ruído (o início do interpretador domina os tamanhos pequenos)
+MIN_TIME_DELTA_SECONDS = 0.1
+# Métricas comparadas com a referência
+COMPARED_METRICS = ["wall_seconds", "peak_rss_bytes"]
+
+PYTHON_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Estágios medidos: nome -> script, executados na ordem a partir do diretório do catálogo sintético
+STAGES = {
+    "merge": os.path.join(PYTHON_DIR, "merge_lists.py"),
+    "categorize": os.path.join(PYTHON_DIR, "categorize_products.py"),
+}
+
+# --- Gerador do catálogo sintético ---
+
+COLORS = ["Preto", "Branco", "Azul Royal", "Verde Musgo", "Vermelho", "Amarelo", "Lollipop", "Dark Purple", "Creme", "Laranja"]
+NEEDLE_STYLES = [("RL", "Round Liner"), ("RS", "Round Shader"), ("MG", "Magnum"), ("RMG", "Round Magnum"), ("FL", "Flat")]
+CARTRIDGE_LINES = ["Shock Cartridge", "Universal Cartridge", "Cartridge Pro Universal", "Universal Cartridge Black Cat"]
+TIP_STYLES = ["Bico Descartável Aberto", "Bico Descartável Fechado", "Bico Descartável Cushion Aberto", "Mini Tip Aberto"]
+SIZE_LETTERS = ["P", "M", "G", "GG"]
+COSMETIC_TYPES = [
+    ("Tattoo Stencil Transfer", "Materiais para Stencil"),
+    ("Sabonete Líquido Antisséptico", "Higiene e Limpeza Corporal"),
+    ("Manteiga Pós Tattoo", "Cremes e Pós-Tatuagem"),
+    ("Tattoo Clean Up", "Outros Cosméticos"),
+]
+
+def _units(rng, count):
+    return [f"{quantity:02d} Un." for quantity in sorted(rng.sample([1, 5, 10, 20, 50, 100], count))]
+
+def _sold_out(rng, labels):
+    # Algumas opções aparecem esgotadas no HTML, como no site real
+    return [f"{label} (esgotado)" if rng.random() < 0.1 else label for label in labels]
+
+def synthetic_product(rng, i):
+    """
+    Gera um produto sintético no formato das listas brutas.
+
+    Returns:
+        tuple: (nome, materialType, opções do HTML) — o nome é único por `i`.
+    """
+    kind = rng.random()
+    if kind < 0.55:
+        code, style = rng.choice(NEEDLE_STYLES)
+        size = rng.choice([3, 5, 7, 9, 11, 13, 15, 23])
+        name = f"{size:02d}{code} - {rng.choice(CARTRIDGE_LINES)} {style} {size:02d} - Ø 0.{rng.choice([25, 30, 35])} - V{i}"
+        return name, "Agulhas e Cartuchos", _units(rng, rng.randint(1, 3))
+    if kind < 0.72:
+        suffix = rng.choice([" EG", " INTZ", ""])
+        return f"{rng.choice(COLORS)} {i}{suffix}", "Tintas", [f"{rng.choice([30, 60, 120, 240])}ml"]
+    if kind < 0.87:
+        style = rng.choice(TIP_STYLES)
+        return f"{style} Magnum {rng.choice([7, 9, 11, 15]):02d} - {rng.choice([19, 30, 42])}mm - V{i}", "Outros", _units(rng, rng.randint(1, 2))
+    if kind < 0.93:
+        letters = rng.sample(SIZE_LETTERS, rng.randint(1, 4))
+        options = [f"{letter} ({rng.choice([25, 50, 100, 200])} Un.)" for letter in sorted(letters)]
+        return f"Ink Cap - Batoques de Silicone {rng.choice(COLORS)} {i}", "Batoques", options
+    if kind < 0.96:
+        return f"Fonte Digital Pro {i} - Bivolt", "Fontes e Cabos", []
+    if kind < 0.98:
+        return f"Máquina Rotativa Pen {i} - 3.5mm", "Máquinas", [rng.choice(["Preta", "Prata", "Rosa"])]
+    return f"Luva Nitrílica Preta {i} - Caixa c/ 100 Un.", "Luvas", rng.sample(SIZE_LETTERS, 2)
+
+def generate_catalog(output_dir, size, seed=0):
+    """
+    Grava em `output_dir`/data/listas_brutas um catálogo sintético com `size`
+    produtos, nos formatos das três listas brutas (JSON-LD, HTML e cosméticos).
+
+    Proporções próximas às do snapshot real: ~88% dos produtos aparecem nas
+    duas listas (parte deles com o nome do HTML em outra caixa, para a junção
+    normalizada), ~6% só no JSON-LD, ~4% só no HTML e ~2% são cosméticos.
+    Os produtos são gravados um a um, então até 1M de produtos cabe em memória.
+
+    Returns:
+        str: Diretório das listas brutas geradas.
+    """
+    rng = random.Random(seed)
+    raw_dir = os.path.join(output_dir, "data", "listas_brutas")
+    os.makedirs(raw_dir, exist_ok=True)
+    files = {
+        source: open(os.path.join(raw_dir, f"lista_{source}.json"), 'w', encoding='utf-8')
+        for source in ("json_ld", "html", "cosmeticos")
+    }
+    first = dict.fromkeys(files, True)
+
+    def write(source, product):
+        f = files[source]
+        f.write("[\n" if first[source] else ",\n")
+        first[source] = False
+        f.write(json.dumps(product, ensure_ascii=False))
+
+    try:
+        for i in range(size):
+            roll = rng.random()
+            if roll < 0.02:
+                base, material_type = rng.choice(COSMETIC_TYPES)
+                options = [f"{volume}ml" for volume in sorted(rng.sample([30, 90, 120, 200, 240, 1000], rng.randint(1, 3)))]
+                write("cosmeticos", {
+                    "name": f"{base} {i}",
+                    "availableOptions": options,
+                    "availablePrice": [prices.format_brl(rng.randrange(1500, 9000)) for _ in options],
+                    "materialType": material_type,
+                })
+                continue
+
+            name, material_type, html_options = synthetic_product(rng, i)
+            option_count = max(len(html_options), 1)
+            json_ld_prices = [prices.format_brl(cents) for cents in sorted(rng.randrange(100, 250000) for _ in range(option_count))]
+            if roll < 0.96:
+                write("json_ld", {
+                    "name": name,
+                    "availableOptions": [str(rng.randrange(100, 9999)) for _ in range(option_count)],
+                    "availablePrice": json_ld_prices,
+                    "materialType": material_type,
+                })
+            if roll >= 0.08:
+                # Parte dos nomes do HTML vem com outra capitalização (junção normalizada)
+                html_name = name.title() if rng.random() < 0.05 else name
+                write("html", {
+                    "name": html_name,
+                    "availableOptions": _sold_out(rng, html_options),
+                    "availablePrice": [json_ld_prices[0].replace(" ", "\u00a0")],
+                    "materialType": material_type,
+                })
+    finally:
+        for source, f in files.items():
+            f.write("[]" if first[source] else "\n]")
+            f.close()
+    return raw_dir
+
+# --- Medição ---
+
+def run_stage(stage_name, workdir):
+    """
+    Executa um estágio (como o engine faz) sobre o catálogo sintético de `workdir`,
+    com a saída redirecionada para <estágio>.log.
+
+    Returns:
+        dict: wall_seconds, cpu_user_seconds, cpu_system_seconds e peak_rss_bytes.
+    """
+    log_path = os.path.join(workdir, f"{stage_name}.log")
+    command = f"{shlex.quote(sys.executable)} {shlex.quote(STAGES[stage_name])} > {shlex.quote(log_path)} 2>&1"
+    started = time.perf_counter()
+    returncode, usage = metrics.measure(command, cwd=workdir)
+    wall_seconds = round(time.perf_counter() - started, 3)
+    if returncode != 0:
+        raise RuntimeError(f"Estágio '{stage_name}' falhou com código {returncode}. Veja '{log_path}'.")
+    return {"wall_seconds": wall_seconds, **usage}
+
+def benchmark_size(size, repeat=1, seed=0, keep_dir=None):
+    """
+    Gera um catálogo sintético de `size` produtos e mede a mesclagem e a categorização.
+    Com `repeat` > 1 fica o menor tempo e o maior pico de memória das execuções.
+
+    Returns:
+        dict: Estágio -> métricas.
+    """
+    workdir = keep_dir or tempfile.mkdtemp(prefix=f"benchmark_{size}_")
+    try:
+        generate_catalog(workdir, size, seed=seed)
+        results = {}
+        for _ in range(repeat):
+            # Cada repetição parte do zero (sem lista mesclada anterior para comparar)
+            shutil.rmtree(os.path.join(workdir, "data", "listas_mescladas"), ignore_errors=True)
+            for stage_name in STAGES:
+                measured = run_stage(stage_name, workdir)
+                best = results.setdefault(stage_name, measured)
+                for key, value in measured.items():
+                    best[key] = max(best[key], value) if key == "peak_rss_bytes" else min(best[key], value)
+        return results
+    finally:
+        if keep_dir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+def run_benchmarks(sizes, repeat=1, seed=0):
+    """
+    Mede todos os tamanhos e devolve os resultados com a descrição do ambiente.
+
+    Returns:
+        dict: {"environment": ..., "seed": ..., "results": {tamanho: {estágio: métricas}}}
+    """
+    results = {}
+    for size in sizes:
+        print(f"Catálogo sintético com {size} produtos...", flush=True)
+        results[str(size)] = benchmark_size(size, repeat=repeat, seed=seed)
+        for stage_name, measured in results[str(size)].items():
+            print(f"  {stage_name}: {measured['wall_seconds']:.2f}s, CPU {measured['cpu_user_seconds'] + measured['cpu_system_seconds']:.2f}s, "
+                  f"pico de memória {measured['peak_rss_bytes'] / 2**20:.1f} MiB", flush=True)
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "seed": seed,
+        "repeat": repeat,
+        "results": results,
+    }
+
+def find_regressions(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compara os resultados atuais com a referência (apenas tamanhos e estágios presentes nos dois).
+
+    Returns:
+        list: Mensagens descrevendo cada métrica que piorou mais que `threshold`.
+    """
+    regressions = []
+    for size, stages in current["results"].items():
+        for stage_name, measured in stages.items():
+            reference = baseline["results"].get(size, {}).get(stage_name)
+            if reference is None:
+                continue
+            for key in COMPARED_METRICS:
+                if key not in reference:
+                    continue
+                limit = reference[key] * (1 + threshold)
+                if key == "wall_seconds":
+                    limit = max(limit, reference[key] + MIN_TIME_DELTA_SECONDS)
+                if measured[key] > limit:
+                    change = (measured[key] - reference[key]) / reference[key] if reference[key] else float('inf')
+                    regressions.append(f"{stage_name} com {size} produtos: {key} {reference[key]} -> {measured[key]} (+{change:.0%})")
+    return regressions
+
+def save_results(path, results):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Mede a mesclagem e a categorização sobre catálogos sintéticos (sem acesso à rede)."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Quantidades de produtos dos catálogos sintéticos (padrão: 1000 10000 100000).")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Execuções por tamanho; vale o menor tempo e o maior pico de memória (padrão: 1).")
+    parser.add_argument("--seed", type=int, default=0, help="Semente do gerador (padrão: 0).")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Piora relativa tolerada antes de falhar (padrão: {DEFAULT_THRESHOLD}).")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help=f"Arquivo de referência (padrão: {BASELINE_PATH}).")
+    parser.add_argument("--save-baseline", action="store_true", help="Grava os resultados como a nova referência.")
+    parser.add_argument("--generate-only", metavar="DIR",
+                        help="Apenas gera o catálogo sintético (do primeiro tamanho) em DIR/data/listas_brutas.")
+    args = parser.parse_args()
+
+    if args.generate_only:
+        raw_dir = generate_catalog(args.generate_only, args.sizes[0], seed=args.seed)
+        print(f"Catálogo sintético com {args.sizes[0]} produtos gerado em '{raw_dir}'.")
+        sys.exit(0)
+
+    current = run_benchmarks(args.sizes, repeat=args.repeat, seed=args.seed)
+    save_results(LATEST_PATH, current)
+    print(f"Resultados salvos em '{LATEST_PATH}'.")
+
+    if args.save_baseline:
+        save_results(args.baseline, current)
+        print(f"Referência atualizada em '{args.baseline}'.")
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print(f"Sem referência em '{args.baseline}'. Rode com --save-baseline para criá-la.")
+        sys.exit(0)
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = find_regressions(baseline, current, threshold=args.threshold)
+    if regressions:
+        print(f"Regressões acima de {args.threshold:.0%} em relação a '{args.baseline}':")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print(f"Sem regressões acima de {args.threshold:.0%} em relação a '{args.baseline}'.")
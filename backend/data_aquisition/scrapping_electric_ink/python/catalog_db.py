@@ -0,0 +1,227 @@
+import json
+import os
+import sqlite3
+
+import prices
+
+SCHEMA = """
+CREATE TABLE products (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    brand TEXT,
+    category TEXT NOT NULL,
+    material_type TEXT,
+    tipo TEXT,
+    lowest_price_cents INTEGER,
+    highest_price_cents INTEGER,
+    median_price_cents INTEGER,
+    data TEXT NOT NULL
+);
+CREATE TABLE variants (
+    id INTEGER PRIMARY KEY,
+    product_id INTEGER NOT NULL REFERENCES products(id),
+    position INTEGER NOT NULL,
+    label TEXT NOT NULL,
+    quantity_value REAL,
+    quantity_unit TEXT,
+    size TEXT
+);
+CREATE TABLE prices (
+    id INTEGER PRIMARY KEY,
+    product_id INTEGER NOT NULL REFERENCES products(id),
+    price_cents INTEGER NOT NULL
+);
+"""
+
+INDEXES = """
+CREATE INDEX idx_products_name ON products(name);
+CREATE INDEX idx_products_brand ON products(brand);
+CREATE INDEX idx_products_material_type ON products(material_type, lowest_price_cents);
+CREATE INDEX idx_products_tipo ON products(tipo);
+CREATE INDEX idx_products_lowest_price ON products(lowest_price_cents);
+CREATE INDEX idx_variants_product ON variants(product_id);
+CREATE INDEX idx_variants_quantity ON variants(quantity_unit, quantity_value);
+CREATE INDEX idx_prices_product ON prices(product_id);
+"""
+
+# Busca textual nos nomes (FTS5). Se o SQLite não tiver FTS5, a busca usa LIKE.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE products_fts USING fts5(name, content='products', content_rowid='id', tokenize='unicode61 remove_diacritics 2');
+INSERT INTO products_fts(products_fts) VALUES ('rebuild');
+"""
+
+def create_catalog_db(db_path):
+    """
+    Cria um banco SQLite vazio em um arquivo temporário ao lado de `db_path`.
+    Use `insert_product` para preencher e `finalize_catalog_db` para publicar
+    (ou `discard_catalog_db` para desistir dele se algo falhar no meio).
+
+    Returns:
+        sqlite3.Connection: Conexão com o banco temporário.
+    """
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    tmp_path = f"{db_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+def insert_product(conn, category, product):
+    """Grava um produto estruturado (saída de categorize_products) com suas opções e preços."""
+    price_cents = [cents for cents in map(prices.parse_brl_cents, product.get("all_available_prices", [])) if cents is not None]
+    cursor = conn.execute(
+        "INSERT INTO products (name, brand, category, material_type, tipo, lowest_price_cents, highest_price_cents, median_price_cents, data) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            product.get("name"),
+            product.get("brand"),
+            category,
+            product.get("material_type"),
+            product.get("tipo"),
+            prices.parse_brl_cents(product.get("lowest_price")),
+            prices.parse_brl_cents(product.get("highest_price")),
+            prices.parse_brl_cents(product.get("median_price")),
+            json.dumps(product, ensure_ascii=False),
+        ),
+    )
+    product_id = cursor.lastrowid
+    conn.executemany(
+        "INSERT INTO variants (product_id, position, label, quantity_value, quantity_unit, size) VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (product_id, position, option["label"], (option.get("quantity") or {}).get("value"),
+             (option.get("quantity") or {}).get("unit"), option.get("size"))
+            for position, option in enumerate(product.get("available_options", []))
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO prices (product_id, price_cents) VALUES (?, ?)",
+        [(product_id, cents) for cents in price_cents],
+    )
+
+def finalize_catalog_db(conn, db_path):
+    """
+    Cria os índices e a busca textual, fecha o banco temporário e o move
+    para `db_path` de forma atômica: leitores nunca veem um banco pela metade.
+    Se algo falhar, o banco temporário é descartado e `db_path` fica como estava.
+    """
+    try:
+        conn.executescript(INDEXES)
+        try:
+            conn.executescript(FTS_SCHEMA)
+        except sqlite3.OperationalError as e:
+            print(f"Aviso: FTS5 indisponível neste SQLite ({e}). A busca por nome usará LIKE.")
+        conn.commit()
+        conn.close()
+        os.replace(f"{db_path}.tmp", db_path)
+    except Exception:
+        discard_catalog_db(conn, db_path)
+        raise
+
+def discard_catalog_db(conn, db_path):
+    """Fecha e apaga o banco temporário criado por `create_catalog_db` (o `db_path` publicado não muda)."""
+    conn.close()
+    tmp_path = f"{db_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+def write_catalog_db(db_path, categorized_products):
+    """
+    Grava o catálogo categorizado inteiro em um banco SQLite.
+
+    Args:
+        db_path (str): Caminho do arquivo .sqlite de saída.
+        categorized_products (iterable): Pares (categoria, produto estruturado).
+
+    Returns:
+        int: Quantidade de produtos gravados.
+    """
+    conn = create_catalog_db(db_path)
+    count = 0
+    try:
+        for category, product in categorized_products:
+            insert_product(conn, category, product)
+            count += 1
+    except Exception:
+        discard_catalog_db(conn, db_path)
+        raise
+    finalize_catalog_db(conn, db_path)
+    return count
+
+# --- API de consulta para o app de estoque ---
+
+def connect(db_path):
+    """Abre o banco do catálogo somente para leitura."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def _has_fts(conn):
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'products_fts'").fetchone()
+    return row is not None
+
+def find_products(conn, material_type=None, brand=None, tipo=None, category=None,
+                  min_price_cents=None, max_price_cents=None, name_query=None, limit=None):
+    """
+    Consulta produtos usando os índices do banco.
+
+    Ex.: todas as Tintas da Intenze abaixo de R$ 50:
+        find_products(conn, material_type="Tintas", brand="Intenze", max_price_cents=5000)
+
+    Args:
+        name_query (str): Termos buscados no nome (FTS5, sem acentos/maiúsculas; cada termo aceita prefixo).
+        min_price_cents, max_price_cents (int): Faixa aplicada ao menor preço do produto.
+
+    Returns:
+        list: Produtos estruturados (dicts) ordenados por nome.
+    """
+    clauses = []
+    params = []
+    for column, value in (("material_type", material_type), ("brand", brand), ("tipo", tipo), ("category", category)):
+        if value is not None:
+            clauses.append(f"p.{column} = ?")
+            params.append(value)
+    if min_price_cents is not None:
+        clauses.append("p.lowest_price_cents >= ?")
+        params.append(min_price_cents)
+    if max_price_cents is not None:
+        clauses.append("p.lowest_price_cents <= ?")
+        params.append(max_price_cents)
+    if name_query:
+        if _has_fts(conn):
+            terms = [term.replace('"', '') for term in name_query.split()]
+            clauses.append("p.id IN (SELECT rowid FROM products_fts WHERE products_fts MATCH ?)")
+            params.append(" ".join(f'"{term}"*' for term in terms if term))
+        else:
+            clauses.append("p.name LIKE ?")
+            params.append(f"%{name_query}%")
+
+    sql = "SELECT p.data FROM products p"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY p.name"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return [json.loads(row["data"]) for row in conn.execute(sql, params)]
+
+def get_product(conn, name):
+    """
+    Busca um produto pelo nome exato, com suas opções (variants) e preços em centavos.
+
+    Returns:
+        dict: Produto estruturado com os campos extras "variants" e "prices_cents", ou None.
+    """
+    row = conn.execute("SELECT id, data FROM products WHERE name = ?", (name,)).fetchone()
+    if row is None:
+        return None
+    product = json.loads(row["data"])
+    product["variants"] = [
+        variant["label"]
+        for variant in conn.execute("SELECT label FROM variants WHERE product_id = ? ORDER BY position", (row["id"],))
+    ]
+    product["prices_cents"] = [
+        price["price_cents"]
+        for price in conn.execute("SELECT price_cents FROM prices WHERE product_id = ? ORDER BY price_cents", (row["id"],))
+    ]
+    return product
@@ -0,0 +1,100 @@
+import os
+
+import catalog_io
+import prices
+
+# Log de alterações em relação à lista mesclada anterior, salvo ao lado da lista mesclada
+CHANGELOG_FILENAME = "alteracoes.json"
+
+def load_snapshot(path):
+    """
+    Carrega a lista mesclada anterior em um índice por nome.
+
+    Returns:
+        dict: Nome do produto -> produto. Vazio se o arquivo não existir ou estiver ilegível.
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        return {product['name']: product for product in catalog_io.iter_products(path)}
+    except (ValueError, KeyError) as e:
+        print(f"Aviso: Lista mesclada anterior '{path}' ilegível ({e}). Todos os produtos serão tratados como novos.")
+        return {}
+
+def _price_key(product):
+    return sorted(cents for cents in map(prices.parse_brl_cents, product.get('availablePrice', [])) if cents is not None)
+
+def _options_key(product):
+    # Na ordem da lista: a categorização grava as opções nessa ordem
+    return list(product.get('availableOptions', []))
+
+def diff_catalogs(previous, current_products, base_sha256=None, sha256=None):
+    """
+    Compara a lista mesclada anterior com a nova.
+
+    Args:
+        previous (dict): Índice nome -> produto da execução anterior (load_snapshot).
+        current_products (list): Produtos da nova lista mesclada.
+        base_sha256 (str): SHA-256 do arquivo da lista anterior (None se não existia).
+        sha256 (str): SHA-256 do arquivo da nova lista.
+
+    Returns:
+        dict: Log de alterações com os hashes das duas listas (base_sha256 e sha256)
+              e as listas added, removed, price_changed, options_changed e
+              other_changed (marca/tipo de material). Cada item traz o nome e os
+              registros "previous" e "current" (None quando não existe).
+              Um produto pode aparecer em mais de uma lista de alteração.
+    """
+    changes = {
+        "base_sha256": base_sha256,
+        "sha256": sha256,
+        "previous_total": len(previous),
+        "current_total": len(current_products),
+        "added": [],
+        "removed": [],
+        "price_changed": [],
+        "options_changed": [],
+        "other_changed": [],
+    }
+    current_names = set()
+    for product in current_products:
+        name = product['name']
+        current_names.add(name)
+        old = previous.get(name)
+        entry = {"name": name, "previous": old, "current": product}
+        if old is None:
+            changes["added"].append(entry)
+            continue
+        if _price_key(old) != _price_key(product):
+            changes["price_changed"].append(entry)
+        if _options_key(old) != _options_key(product):
+            changes["options_changed"].append(entry)
+        if old.get('brand') != product.get('brand') or old.get('materialType') != product.get('materialType'):
+            changes["other_changed"].append(entry)
+
+    for name in sorted(set(previous) - current_names):
+        changes["removed"].append({"name": name, "previous": previous[name], "current": None})
+    return changes
+
+def has_changes(changes):
+    """Indica se o log de alterações tem alguma alteração."""
+    return any(changes[key] for key in ("added", "removed", "price_changed", "options_changed", "other_changed"))
+
+def changed_records(changes):
+    """
+    Lista cada produto alterado uma única vez, com o registro anterior e o atual.
+
+    Returns:
+        list: Tuplas (nome, registro anterior ou None, registro atual ou None).
+    """
+    records = {}
+    for key in ("added", "removed", "price_changed", "options_changed", "other_changed"):
+        for entry in changes[key]:
+            records[entry["name"]] = (entry["previous"], entry["current"])
+    return [(name, previous, current) for name, (previous, current) in sorted(records.items())]
+
+def summarize(changes):
+    """Resumo em uma linha do log de alterações."""
+    return (f"{len(changes['added'])} novos, {len(changes['removed'])} removidos, "
+            f"{len(changes['price_changed'])} com preço alterado, {len(changes['options_changed'])} com opções alteradas, "
+            f"{len(changes['other_changed'])} com marca/tipo alterados")
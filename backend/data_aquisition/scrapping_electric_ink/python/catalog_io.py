@@ -0,0 +1,245 @@
+import hashlib
+import json
+import os
+from json.encoder import encode_basestring
+
+# Tamanho dos blocos lidos do disco pelo parser incremental de arrays JSON
+CHUNK_SIZE = 64 * 1024
+
+def is_jsonl(path):
+    """Indica se o caminho usa o formato JSON Lines (um produto por linha)."""
+    return path.endswith('.jsonl')
+
+def iter_json_array(f, chunk_size=CHUNK_SIZE):
+    """
+    Lê um array JSON elemento por elemento, sem carregar o arquivo inteiro.
+
+    Args:
+        f: Arquivo aberto em modo texto, contendo um array JSON.
+        chunk_size (int): Quantidade de caracteres lida por vez.
+
+    Yields:
+        Cada elemento do array, já decodificado.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    skip_whitespace()
+    if pos >= len(buffer) or buffer[pos] != '[':
+        raise json.JSONDecodeError("Esperado um array JSON", buffer, pos)
+    pos += 1
+
+    skip_whitespace()
+    if pos < len(buffer) and buffer[pos] == ']':
+        return
+
+    while True:
+        skip_whitespace()
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+            # Um valor que não é seguido de um delimitador pode estar incompleto (ex.: número cortado)
+            if not eof and (end == len(buffer) or buffer[end] not in ' \t\r\n,]'):
+                raise ValueError
+        except (json.JSONDecodeError, ValueError):
+            if eof:
+                raise
+            fill()
+            continue
+        pos = end
+        yield value
+
+        skip_whitespace()
+        if pos >= len(buffer):
+            raise json.JSONDecodeError("Array JSON não terminado", buffer, pos)
+        if buffer[pos] == ']':
+            return
+        if buffer[pos] != ',':
+            raise json.JSONDecodeError("Esperado ',' ou ']'", buffer, pos)
+        pos += 1
+
+def iter_products(path):
+    """
+    Itera pelos produtos de um arquivo, um de cada vez.
+    Aceita arrays JSON (.json, lidos incrementalmente) e JSON Lines (.jsonl).
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if is_jsonl(path):
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise json.JSONDecodeError(f"Linha {line_number}: {e.msg}", e.doc, e.pos) from e
+        else:
+            yield from iter_json_array(f)
+
+def write_products(path, products):
+    """
+    Grava os produtos no formato indicado pela extensão: JSON Lines (.jsonl),
+    escrito um produto por vez, ou array JSON indentado (.json).
+
+    Returns:
+        int: Quantidade de produtos gravados.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        if is_jsonl(path):
+            for product in products:
+                f.write(json.dumps(product, ensure_ascii=False))
+                f.write('\n')
+                count += 1
+        else:
+            products = list(products)
+            json.dump(products, f, indent=2, ensure_ascii=False)
+            count = len(products)
+    return count
+
+def open_jsonl_sink(path):
+    """
+    Abre um arquivo JSON Lines para receber produtos um a um com `append_jsonl`.
+    Os produtos são gravados em um arquivo temporário; `close_jsonl_sink` o publica.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    return open(f"{path}.tmp", 'w', encoding='utf-8')
+
+def append_jsonl(sink, product):
+    """Escreve um produto como uma linha em um sink aberto com `open_jsonl_sink`."""
+    sink.write(json.dumps(product, ensure_ascii=False))
+    sink.write('\n')
+
+def close_jsonl_sink(sink, path):
+    """
+    Fecha um sink de `open_jsonl_sink` e publica o arquivo em `path`
+    (só substitui o arquivo existente se o conteúdo mudou).
+
+    Returns:
+        bool: True se o arquivo em `path` foi alterado.
+    """
+    sink.close()
+    return _publish(sink.name, path)
+
+# --- Escrita atômica e somente quando o conteúdo muda ---
+
+def _encode_indented(value, newline):
+    # Mesmo texto de json.dumps(indent=2, ensure_ascii=False). Com indent, o json
+    # usa o codificador em Python puro, bem mais lento que este percurso direto;
+    # as strings continuam sendo escapadas em C (encode_basestring).
+    if isinstance(value, str):
+        return encode_basestring(value)
+    if value is None or value is True or value is False or isinstance(value, (int, float)):
+        return json.dumps(value)
+    if isinstance(value, dict):
+        if not value:
+            return '{}'
+        inner = newline + '  '
+        return '{' + ','.join(
+            f"{inner}{encode_basestring(key if isinstance(key, str) else json.dumps(key))}: {_encode_indented(item, inner)}"
+            for key, item in value.items()
+        ) + newline + '}'
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return '[]'
+        inner = newline + '  '
+        return '[' + ','.join(inner + _encode_indented(item, inner) for item in value) + newline + ']'
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def encode_json(value, compact=False):
+    """
+    Serializa um valor como texto JSON: indentado com 2 espaços ou, no modo
+    compacto, sem indentação nem espaços entre os separadores.
+    """
+    if compact:
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+    return _encode_indented(value, '\n')
+
+def _indent_fragment(fragment, depth):
+    # Fragmentos indentados não têm quebras de linha dentro de strings (viram \n),
+    # então basta deslocar cada linha para o nível de aninhamento
+    return fragment.replace('\n', '\n' + '  ' * depth)
+
+def join_json_array(fragments, depth=0, compact=False):
+    """
+    Monta um array JSON a partir de elementos já serializados com `encode_json`,
+    sem serializá-los de novo. O resultado é idêntico a `encode_json` da lista
+    inteira quando o array está no nível de aninhamento `depth`.
+    """
+    if not fragments:
+        return '[]'
+    if compact:
+        return '[' + ','.join(fragments) + ']'
+    padding = '  ' * (depth + 1)
+    items = ',\n'.join(padding + _indent_fragment(fragment, depth + 1) for fragment in fragments)
+    return '[\n' + items + '\n' + '  ' * depth + ']'
+
+def join_json_object(items, depth=0, compact=False):
+    """
+    Monta um objeto JSON a partir de pares (chave, valor já serializado),
+    seguindo as mesmas regras de `join_json_array`.
+    """
+    if not items:
+        return '{}'
+    if compact:
+        return '{' + ','.join(f"{encode_json(key, True)}:{fragment}" for key, fragment in items) + '}'
+    padding = '  ' * (depth + 1)
+    members = ',\n'.join(f"{padding}{encode_json(key)}: {fragment}" for key, fragment in items)
+    return '{\n' + members + '\n' + '  ' * depth + '}'
+
+def hash_file(path, chunk_size=CHUNK_SIZE):
+    """SHA-256 do conteúdo de um arquivo, ou None se ele não existir."""
+    if not os.path.isfile(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _publish(tmp_path, path):
+    # Descarta o temporário se o conteúdo é o mesmo do arquivo publicado;
+    # senão o move por cima dele (os.replace é atômico no mesmo sistema de arquivos)
+    if hash_file(tmp_path) == hash_file(path):
+        os.remove(tmp_path)
+        return False
+    os.replace(tmp_path, path)
+    return True
+
+def write_text_if_changed(path, text):
+    """
+    Grava `text` em `path` somente se o conteúdo for diferente do que já está
+    no disco (comparando o hash SHA-256). A escrita passa por um arquivo
+    temporário movido com os.replace, então leitores nunca veem o arquivo pela metade.
+
+    Returns:
+        bool: True se o arquivo foi gravado, False se já estava igual.
+    """
+    data = text.encode('utf-8')
+    if hashlib.sha256(data).hexdigest() == hash_file(path):
+        return False
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
@@ -0,0 +1,523 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import time
+import traceback
+from bisect import bisect_left, bisect_right
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import categorize_products
+import http_client
+import name_index
+import prices
+import search_index
+
+# Serviço local do catálogo: carrega structured_by_type uma única vez em
+# índices em memória (nome, marca, tipo de material e faixa de preço) e
+# responde às consultas por HTTP sem reler arquivos. Quando a pipeline publica
+# novas saídas, um índice novo é montado em segundo plano e substitui o antigo
+# de uma vez (cada requisição usa o índice que estava publicado quando chegou).
+# Os arquivos lidos são os da última categorização, registrados no
+# estado_categorizacao.json (.json, ou .jsonl depois de uma execução --stream).
+#
+#   serve     python3 python/catalog_service.py serve  (ou python3 python/engine.py serve)
+#   loadtest  python3 python/catalog_service.py loadtest --clientes 32 --requisicoes 20000
+#
+# Rotas (todas GET, respostas em JSON):
+#   /produtos?q=&marca=&categoria=&preco_min=&preco_max=&limite=&inicio=
+#                         inicio: posição do primeiro produto retornado (paginação)
+#   /produto?nome=        produtos com esse nome (comparado pela chave normalizada)
+#   /categorias           categorias com total de produtos por marca
+#   /saude                total de produtos, carga atual e número de recargas
+
+DEFAULT_STRUCTURED_DIR = "data/listas_mescladas/structured_by_type"
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8780
+# Intervalo de verificação de novas saídas da pipeline
+RELOAD_INTERVAL_SECONDS = 2.0
+# Leituras de structured_by_type antes de desistir, se ela mudar durante a
+# leitura, e espera inicial entre elas (dobra a cada tentativa)
+LOAD_ATTEMPTS = 5
+LOAD_BACKOFF_SECONDS = 0.2
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 1000
+
+def catalog_files(structured_dir=DEFAULT_STRUCTURED_DIR):
+    """
+    Arquivos de categoria/marca servidos, relativos a structured_dir: os da
+    última categorização (.json, ou .jsonl no modo --stream), registrados no
+    estado ao lado de structured_by_type. Sem estado, todos os .json das categorias.
+    """
+    state = categorize_products.load_state(structured_dir)
+    if "files" in state:
+        return list(state["files"])
+    files = []
+    if not os.path.isdir(structured_dir):
+        return files
+    for category in sorted(os.listdir(structured_dir)):
+        category_dir = os.path.join(structured_dir, category)
+        if not os.path.isdir(category_dir):
+            continue
+        files.extend(f"{category}/{filename}" for filename in sorted(os.listdir(category_dir)) if filename.endswith('.json'))
+    return files
+
+def catalog_signature(structured_dir=DEFAULT_STRUCTURED_DIR):
+    """
+    Assinatura das saídas publicadas: (arquivo, mtime, tamanho) do estado da
+    categorização e de cada arquivo de categoria/marca servido (ver catalog_files).
+    Só usa os.stat, então é barata o bastante para ser verificada a cada poucos segundos.
+    """
+    signature = []
+    state_file = categorize_products.state_path(structured_dir)
+    if os.path.isfile(state_file):
+        stat = os.stat(state_file)
+        signature.append((categorize_products.STATE_FILENAME, stat.st_mtime_ns, stat.st_size))
+    for relative_path in catalog_files(structured_dir):
+        path = os.path.join(structured_dir, relative_path)
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            signature.append((relative_path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+def build_catalog_index(entries, signature=()):
+    """
+    Monta os índices em memória do catálogo.
+
+    Args:
+        entries (iterable): Pares (categoria, produto estruturado), como os de
+            search_index.entries_from_structured_dir.
+        signature (tuple): Assinatura das saídas lidas (ver catalog_signature).
+
+    Returns:
+        dict: products (ids = posições, em ordem alfabética), by_name, by_brand,
+              by_category e prefixes (-> frozenset de ids), price_cents/price_ids
+              (menor preço em ordem crescente, para busca binária), categories,
+              signature e loaded_at. O dict não é alterado depois de montado.
+    """
+    products = sorted(
+        (dict(product, category=category) for category, product in entries),
+        key=lambda product: (name_index.normalize_name(product["name"]), product["name"], product["category"]),
+    )
+    by_name, by_brand, by_category, prefixes = {}, {}, {}, {}
+    priced = []
+    for product_id, product in enumerate(products):
+        by_name.setdefault(name_index.normalize_name(product["name"]), []).append(product_id)
+        by_brand.setdefault(name_index.normalize_name(product.get("brand") or ""), []).append(product_id)
+        by_category.setdefault(product["category"], []).append(product_id)
+        for token in set(search_index.tokenize(product["name"])):
+            for length in range(1, len(token) + 1):
+                prefixes.setdefault(token[:length], []).append(product_id)
+        cents = prices.parse_brl_cents(product.get("lowest_price"))
+        if cents is not None:
+            priced.append((cents, product_id))
+    priced.sort()
+
+    categories = {}
+    for product in products:
+        summary = categories.setdefault(product["category"], {"material_type": product.get("material_type"), "total": 0, "brands": {}})
+        summary["total"] += 1
+        brand = product.get("brand") or ""
+        summary["brands"][brand] = summary["brands"].get(brand, 0) + 1
+
+    def freeze(index):
+        return {key: frozenset(ids) for key, ids in index.items()}
+
+    return {
+        "products": products,
+        "by_name": freeze(by_name),
+        "by_brand": freeze(by_brand),
+        "by_category": freeze(by_category),
+        "prefixes": freeze(prefixes),
+        "price_cents": [cents for cents, _ in priced],
+        "price_ids": [product_id for _, product_id in priced],
+        "categories": dict(sorted(categories.items())),
+        "signature": signature,
+        "loaded_at": time.time(),
+    }
+
+def load_catalog_index(structured_dir=DEFAULT_STRUCTURED_DIR, attempts=LOAD_ATTEMPTS, backoff=LOAD_BACKOFF_SECONDS):
+    """
+    Lê os arquivos de categoria/marca servidos (ver catalog_files) e monta o
+    índice. Se eles ou o estado da categorização mudarem durante a leitura
+    (a pipeline ainda está publicando), lê de novo depois de uma espera que
+    dobra a cada tentativa.
+
+    Raises:
+        RuntimeError: Se os arquivos mudaram em todas as `attempts` leituras
+            (o erro de leitura da última tentativa, se houve, é levantado como está).
+    """
+    for attempt in range(attempts):
+        signature = catalog_signature(structured_dir)
+        try:
+            files = catalog_files(structured_dir)
+            entries = list(search_index.entries_from_structured_dir(structured_dir, files)) if signature else []
+        except (OSError, ValueError):
+            # Arquivo removido ou gravado pela metade durante a leitura
+            if attempt == attempts - 1:
+                raise
+            entries = None
+        if entries is not None and catalog_signature(structured_dir) == signature:
+            return build_catalog_index(entries, signature)
+        if attempt < attempts - 1:
+            time.sleep(backoff * 2 ** attempt)
+    raise RuntimeError(f"{structured_dir} mudou durante as {attempts} leituras; tente de novo quando a pipeline terminar.")
+
+def _price_range_ids(index, min_cents, max_cents):
+    start = 0 if min_cents is None else bisect_left(index["price_cents"], min_cents)
+    end = len(index["price_cents"]) if max_cents is None else bisect_right(index["price_cents"], max_cents)
+    return frozenset(index["price_ids"][start:end])
+
+def query_products(index, q=None, brand=None, category=None, min_price=None, max_price=None, limit=DEFAULT_LIMIT, offset=0):
+    """
+    Produtos que atendem a todos os filtros informados.
+
+    Args:
+        q (str): Cada termo precisa ser o início de um token do nome ("agu cart").
+        brand (str): Marca (acentos e maiúsculas são ignorados).
+        category (str): Categoria de structured_by_type (ex.: "tintas").
+        min_price, max_price (int): Faixa do menor preço, em centavos.
+        limit (int): Número máximo de produtos retornados.
+        offset (int): Quantos produtos encontrados pular (paginação).
+
+    Returns:
+        dict: total (produtos encontrados) e products (até `limit` a partir de
+              `offset`, em ordem alfabética).
+    """
+    candidates = []
+    for term in search_index.tokenize(q or ""):
+        candidates.append(index["prefixes"].get(term, frozenset()))
+    if brand is not None:
+        candidates.append(index["by_brand"].get(name_index.normalize_name(brand), frozenset()))
+    if category is not None:
+        candidates.append(index["by_category"].get(category, frozenset()))
+    if min_price is not None or max_price is not None:
+        candidates.append(_price_range_ids(index, min_price, max_price))
+
+    if not candidates:
+        total = len(index["products"])
+        ids = range(min(offset, total), min(offset + limit, total))
+    else:
+        # Interseção a partir do menor conjunto
+        candidates.sort(key=len)
+        matches = set(candidates[0])
+        for ids_set in candidates[1:]:
+            matches.intersection_update(ids_set)
+            if not matches:
+                break
+        total = len(matches)
+        ids = sorted(matches)[offset:offset + limit]
+    return {"total": total, "products": [dict(index["products"][product_id], id=product_id) for product_id in ids]}
+
+def get_product(index, name):
+    """Produtos cujo nome tem a mesma chave normalizada de `name`."""
+    ids = sorted(index["by_name"].get(name_index.normalize_name(name), ()))
+    return [dict(index["products"][product_id], id=product_id) for product_id in ids]
+
+# --- Servidor HTTP ---
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+class _BadRequest(Exception):
+    pass
+
+def _param(params, name, convert=str):
+    values = params.get(name)
+    if not values:
+        return None
+    try:
+        return convert(values[0])
+    except ValueError:
+        raise _BadRequest(f"Parâmetro inválido: {name}={values[0]!r}")
+
+def _offset_param(text):
+    offset = int(text)
+    if offset < 0:
+        raise ValueError(text)
+    return offset
+
+def _price_param(text):
+    cents = prices.parse_brl_cents(text)
+    if cents is None:
+        raise ValueError(text)
+    return cents
+
+def handle_request(state, method, target):
+    """
+    Responde a uma requisição com o índice publicado no momento.
+
+    Returns:
+        tuple: (status, dict com a resposta)
+    """
+    index = state["index"]
+    if method != "GET":
+        return 405, {"erro": "Só GET é aceito"}
+    parts = urlsplit(target)
+    params = parse_qs(parts.query)
+    try:
+        if parts.path == "/produtos":
+            limit = min(_param(params, "limite", int) or DEFAULT_LIMIT, MAX_LIMIT)
+            return 200, query_products(
+                index,
+                q=_param(params, "q"),
+                brand=_param(params, "marca"),
+                category=_param(params, "categoria"),
+                min_price=_param(params, "preco_min", _price_param),
+                max_price=_param(params, "preco_max", _price_param),
+                limit=limit,
+                offset=_param(params, "inicio", _offset_param) or 0,
+            )
+        if parts.path == "/produto":
+            name = _param(params, "nome")
+            if name is None:
+                raise _BadRequest("Informe o parâmetro nome")
+            found = get_product(index, name)
+            return (200, {"products": found}) if found else (404, {"erro": f"Produto não encontrado: {name}"})
+        if parts.path == "/categorias":
+            return 200, {"categories": index["categories"]}
+        if parts.path == "/saude":
+            return 200, {"total": len(index["products"]), "loaded_at": index["loaded_at"], "reloads": state["reloads"]}
+    except _BadRequest as e:
+        return 400, {"erro": str(e)}
+    return 404, {"erro": f"Rota desconhecida: {parts.path}"}
+
+def _encode_response(status, data, elapsed):
+    body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        # Tempo gasto na consulta, sem o HTTP (lido pelo loadtest)
+        f"Server-Timing: app;dur={elapsed * 1000:.4f}\r\n"
+        "\r\n"
+    )
+    return head.encode("latin-1") + body
+
+async def reload_when_published(state, structured_dir, interval=RELOAD_INTERVAL_SECONDS):
+    """
+    Verifica a cada `interval` segundos (ou ao receber SIGHUP) se a pipeline
+    publicou novas saídas. O índice novo é montado em uma thread e publicado
+    com uma única atribuição; as requisições em andamento terminam com o antigo.
+    Se a leitura falhar, o índice atual continua publicado e a recarga é
+    tentada de novo na próxima verificação.
+    """
+    while True:
+        try:
+            await asyncio.wait_for(state["reload_requested"].wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+        state["reload_requested"].clear()
+        signature = await asyncio.to_thread(catalog_signature, structured_dir)
+        if signature == state["index"]["signature"]:
+            continue
+        # Espera a pipeline terminar de gravar (assinatura estável por um intervalo)
+        await asyncio.sleep(interval)
+        if await asyncio.to_thread(catalog_signature, structured_dir) != signature:
+            continue
+        started = time.perf_counter()
+        try:
+            index = await asyncio.to_thread(load_catalog_index, structured_dir)
+        except Exception as e:
+            print(f"Recarga falhou, mantendo o catálogo atual: {e!r}", flush=True)
+            continue
+        state["index"] = index
+        state["reloads"] += 1
+        print(f"Catálogo recarregado: {len(index['products'])} produtos em {time.perf_counter() - started:.2f}s.", flush=True)
+
+def _response(state, method, target):
+    # Resposta completa de uma requisição; um erro inesperado vira 500 e não
+    # derruba a conexão nem o serviço
+    started = time.perf_counter()
+    try:
+        status, data = handle_request(state, method, target)
+        return _encode_response(status, data, time.perf_counter() - started)
+    except Exception:
+        print(f"Erro ao responder {method} {target}:\n{traceback.format_exc()}", end="", flush=True)
+        return _encode_response(500, {"erro": "Erro interno do serviço"}, time.perf_counter() - started)
+
+async def start_service(structured_dir=DEFAULT_STRUCTURED_DIR, host=DEFAULT_HOST, port=DEFAULT_PORT,
+                        reload_interval=RELOAD_INTERVAL_SECONDS):
+    """
+    Carrega o catálogo, inicia a recarga em segundo plano e começa a aceitar
+    conexões sem bloquear (com port=0 o sistema escolhe uma porta livre).
+
+    Returns:
+        tuple: (asyncio.Server, estado com o índice publicado, tarefa da recarga)
+    """
+    started = time.perf_counter()
+    state = {"index": load_catalog_index(structured_dir), "reloads": 0, "reload_requested": asyncio.Event()}
+    print(f"Catálogo carregado: {len(state['index']['products'])} produtos em {time.perf_counter() - started:.2f}s.", flush=True)
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                close = False
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    if name.strip().lower() == "connection" and value.strip().lower() == "close":
+                        close = True
+                try:
+                    method, target, _ = request_line.decode("latin-1").split(None, 2)
+                except ValueError:
+                    writer.write(_encode_response(400, {"erro": "Linha de requisição inválida"}, 0.0))
+                    await writer.drain()
+                    break
+                writer.write(_response(state, method, target))
+                await writer.drain()
+                if close:
+                    break
+        except ConnectionError:
+            pass  # Cliente desconectou
+        except Exception:
+            print(f"Conexão encerrada por um erro:\n{traceback.format_exc()}", end="", flush=True)
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    reloader = asyncio.create_task(reload_when_published(state, structured_dir, reload_interval))
+    return server, state, reloader
+
+async def serve(structured_dir=DEFAULT_STRUCTURED_DIR, host=DEFAULT_HOST, port=DEFAULT_PORT, reload_interval=RELOAD_INTERVAL_SECONDS):
+    """Carrega o catálogo e atende as requisições até ser interrompido."""
+    server, state, reloader = await start_service(structured_dir, host, port, reload_interval)
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGHUP, state["reload_requested"].set)
+    except (AttributeError, NotImplementedError):
+        pass  # Sem SIGHUP (ex.: Windows): só a verificação periódica
+    print(f"Catálogo servido em http://{host}:{port}/ (Ctrl+C para parar)", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        reloader.cancel()
+
+# --- Teste de carga ---
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def _sample_queries(catalog, count, seed=0):
+    # Mistura de consultas como as do frontend: busca por prefixo, marca,
+    # categoria, faixa de preço e produto pelo nome
+    rng = random.Random(seed)
+    names = [product["name"] for product in catalog["products"]]
+    brands = sorted({product["brand"] for product in catalog["products"] if product.get("brand")})
+    categories = sorted({product["category"] for product in catalog["products"]})
+    queries = []
+    for _ in range(count):
+        kind = rng.random()
+        name = rng.choice(names)
+        if kind < 0.4:
+            tokens = search_index.tokenize(name)
+            term = " ".join(token[:rng.randint(1, len(token))] for token in tokens[:rng.randint(1, min(2, len(tokens)))])
+            queries.append("/produtos?" + urlencode({"q": term, "limite": 20}))
+        elif kind < 0.55:
+            queries.append("/produtos?" + urlencode({"marca": rng.choice(brands), "limite": 20}))
+        elif kind < 0.7:
+            queries.append("/produtos?" + urlencode({"categoria": rng.choice(categories), "limite": 20}))
+        elif kind < 0.85:
+            low = rng.randint(0, 200)
+            queries.append("/produtos?" + urlencode({"preco_min": low, "preco_max": low + rng.randint(10, 100), "limite": 20}))
+        else:
+            queries.append("/produto?" + urlencode({"nome": name}))
+    return queries
+
+async def load_test(base_url, clients=32, total_requests=20000, seed=0):
+    """
+    Dispara `total_requests` consultas variadas contra o serviço com `clients`
+    clientes simultâneos (uma conexão keep-alive cada).
+
+    Returns:
+        dict: Requisições, erros, vazão e latências (p50, p90, p99, máx., em ms)
+              medidas no cliente e no servidor (Server-Timing, só a consulta).
+    """
+    async with http_client.ConnectionPool(max_connections=clients) as pool:
+        # Catálogo inteiro, página a página: as consultas são sorteadas entre todos os produtos
+        catalog = {"products": []}
+        while True:
+            page_url = base_url + "/produtos?" + urlencode({"limite": MAX_LIMIT, "inicio": len(catalog["products"])})
+            status, _, body = await pool.get(page_url)
+            if status != 200:
+                raise http_client.HTTPError(f"Serviço respondeu {status} em /produtos")
+            page = json.loads(body)
+            catalog["products"].extend(page["products"])
+            if not page["products"] or len(catalog["products"]) >= page["total"]:
+                break
+        queries = _sample_queries(catalog, total_requests, seed)
+        latencies, server_times = [], []
+        errors = 0
+        position = 0
+
+        async def client():
+            nonlocal position, errors
+            while position < len(queries):
+                path = queries[position]
+                position += 1
+                started = time.perf_counter()
+                status, headers, _ = await pool.get(base_url + path)
+                latencies.append(time.perf_counter() - started)
+                if status not in (200, 404):
+                    errors += 1
+                timing = headers.get("server-timing", "")
+                if "dur=" in timing:
+                    server_times.append(float(timing.split("dur=", 1)[1]) / 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    server_times.sort()
+    def summary(values):
+        return {
+            name: round(_percentile(values, fraction) * 1000, 3)
+            for name, fraction in (("p50_ms", 0.50), ("p90_ms", 0.90), ("p99_ms", 0.99), ("max_ms", 1.0))
+        }
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "clients": clients,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "client_latency": summary(latencies),
+        "server_latency": summary(server_times),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serviço local do catálogo com índices em memória e recarga automática.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Carrega o catálogo e atende consultas por HTTP.")
+    serve_parser.add_argument("--dir", default=DEFAULT_STRUCTURED_DIR, help=f"Diretório structured_by_type (padrão: {DEFAULT_STRUCTURED_DIR}).")
+    serve_parser.add_argument("--host", default=DEFAULT_HOST, help=f"Endereço (padrão: {DEFAULT_HOST}).")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Porta (padrão: {DEFAULT_PORT}).")
+    serve_parser.add_argument("--intervalo", type=float, default=RELOAD_INTERVAL_SECONDS,
+                              help=f"Segundos entre as verificações de novas saídas da pipeline (padrão: {RELOAD_INTERVAL_SECONDS}).")
+
+    load_parser = subparsers.add_parser("loadtest", help="Mede a latência do serviço com clientes simultâneos.")
+    load_parser.add_argument("--url", default=f"http://{DEFAULT_HOST}:{DEFAULT_PORT}", help="Endereço do serviço já em execução.")
+    load_parser.add_argument("--clientes", type=int, default=32, help="Clientes simultâneos (padrão: 32).")
+    load_parser.add_argument("--requisicoes", type=int, default=20000, help="Total de requisições (padrão: 20000).")
+    load_parser.add_argument("--seed", type=int, default=0, help="Semente da mistura de consultas (padrão: 0).")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        try:
+            asyncio.run(serve(args.dir, args.host, args.port, args.intervalo))
+        except KeyboardInterrupt:
+            pass
+    else:
+        result = asyncio.run(load_test(args.url.rstrip('/'), args.clientes, args.requisicoes, args.seed))
+        print(json.dumps(result, indent=2))
@@ -1,311 +1,692 @@
+import argparse
 import json
 import os
 import re # Para expressões regulares
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
-def transform_and_structure_data(input_file, output_dir="data/listas_mescladas/structured_by_type"):
+import catalog_db
+import catalog_delta
+import catalog_io
+import classifier
+import metrics
+import option_parser
+import prices
+import search_index
+import static_artifacts
+from model import Product
+
+# Quantidade de produtos por lote (cada lote tem sua própria coluna de preços e,
+# no modo --workers, é enviado inteiro para um processo)
+DEFAULT_CHUNK_SIZE = 256
+
+# Estado da última categorização, gravado ao lado de structured_by_type: o SHA-256
+# da lista mesclada que originou os arquivos (merged_sha256). O --delta só aplica
+# um alteracoes.json cujo base_sha256 é esse hash; senão faz a transformação completa.
+# Também lista os arquivos de categoria/marca gravados (files, relativos a
+# structured_by_type) e o formato deles (format: "json", ou "jsonl" no modo
+# --stream): só esses arquivos são removidos quando a marca deixa de existir, e
+# são eles que o índice de busca do --delta, a publicação e o catalog_service leem.
+STATE_FILENAME = "estado_categorizacao.json"
+
+# Arquivo consolidado dos cosméticos, gravado em structured_by_type ao lado das categorias
+COSMETICOS_FILENAME = "cosmeticos.json"
+# Categorias repetidas no arquivo consolidado cosmeticos.json, na ordem em que aparecem nele
+COSMETIC_CATEGORIES = [
+    "materiais_para_stencil",
+    "outros_cosmeticos",
+    "higiene_e_limpeza_corporal",
+    "cremes_e_pos_tatuagem",
+]
+
+def safe_brand_filename(brand_name):
+    """Normaliza o nome da marca para uso como nome de arquivo (remove espaços e caracteres especiais)."""
+    return brand_name.replace(' ', '_').replace('/', '_').replace('-', '_').replace('(', '').replace(')', '').lower()
+
+def brand_filepath(output_dir, category, brand_name, extension=".json"):
+    """Caminho do arquivo de uma marca dentro da pasta da categoria."""
+    return os.path.join(output_dir, category, f"{safe_brand_filename(brand_name)}{extension}")
+
+def structure_product(product, price_summary=None):
     """
-    Lê a lista de produtos mesclada e a transforma em um modelo JSON mais detalhado,
-    separando por tipo de material e adicionando campos específicos.
+    Transforma um produto da lista mesclada no modelo detalhado da sua categoria.
 
     Args:
-        input_file (str): Caminho para o arquivo JSON de entrada (lista_final_mesclada.json).
-        output_dir (str): Diretório onde os arquivos JSON estruturados serão salvos.
+        product (model.Product): Produto da lista mesclada.
+        price_summary (dict): Resumo de preços já calculado em lote (prices.summarize_price_column).
+            Se None, os preços do produto são processados aqui.
+
+    Returns:
+        tuple: (chave da categoria em structured_by_type, produto estruturado)
+    """
+    name = product.name
+    brand = product.brand
+    material_type = product.material_type
+    available_options = product.option_labels
+    # Rótulos interpretados uma vez por produto, reaproveitados nos ramos de Stencil e Higiene
+    parsed_options = [option_parser.parse_option(opt) for opt in available_options]
+
+    # Preços em centavos inteiros (mais baixo, mais alto, mediano e todos, ordenados)
+    if price_summary is None:
+        price_summary = prices.summarize_prices(product.prices_cents)
+
+    # --- Lógica de Estruturação por Tipo de Material ---
+    structured_product = {
+        "name": name,
+        "brand": brand,
+        "available_options_raw": available_options,
+        # Quantidade, tamanho e comprimento de cada opção, com as mesmas chaves em todas as categorias
+        "available_options": [option_parser.option_fields(opt) for opt in available_options],
+        "all_available_prices": [prices.format_brl(cents) for cents in price_summary["all"]],
+        "lowest_price": prices.format_brl(price_summary["lowest"]),
+        "highest_price": prices.format_brl(price_summary["highest"]),
+        "median_price": prices.format_brl(price_summary["median"]),
+        "material_type": material_type
+    }
+
+    # --- Classificação (tabela de regras em classifier.py) ---
+    # Reclassifica cosméticos e define categoria, tipo e campos booleanos em uma única passada pelo nome
+    classification = classifier.classify(name, material_type)
+    material_type = classification["material_type"]
+    structured_product["material_type"] = material_type
+    if classification["has_tipo"]:
+        structured_product["tipo"] = classification["tipo"]
+
+    name_lower = name.lower()
+
+    if material_type == "Materiais para Stencil":
+        volume_match = re.search(r'(\d+\s?ml|\d+\s?g)', name_lower)
+        volume = volume_match.group(0) if volume_match else None
+        
+        opcoes_volume = []
+        for opt, option in zip(available_options, parsed_options):
+            # Volume/peso das opções
+            if option.measure_unit in ("ml", "g"):
+                opcoes_volume.append({
+                    "medida_string": opt,
+                    "medida_valor": option.measure_text
+                })
+            # Quantidade de unidades
+            if option.unit_count is not None:
+                opcoes_volume.append({
+                    "medida_string": opt,
+                    "quantidade": option.unit_count
+                })
+        
+        structured_product.update({
+            "volume": volume,
+            "opcoes": opcoes_volume
+        })
+
+    elif material_type == "Higiene e Limpeza Corporal":
+        volume_match = re.search(r'(\d+\s?ml|\d+\s?L)', name_lower)
+        volume = volume_match.group(0) if volume_match else None
+        
+        opcoes_volume = []
+        for opt, option in zip(available_options, parsed_options):
+            # Volume das opções
+            if option.measure_unit == "ml":
+                opcoes_volume.append({
+                    "volume_string": opt,
+                    "volume_valor": option.measure_text
+                })
+        
+        structured_product.update({
+            "volume": volume,
+            "opcoes_volume": opcoes_volume
+        })
+
+    elif material_type == "Cremes e Pós-Tatuagem":
+        volume_match = re.search(r'(\d+\s?g|\d+\s?ml)', name_lower)
+        structured_product["volume"] = volume_match.group(0) if volume_match else None
+
+    # Campos booleanos da categoria (kit, monodose, equipamento...)
+    structured_product.update(classification["flags"])
+    return classification["category"], structured_product
+
+def structure_chunk(products):
+    """
+    Estrutura um lote de produtos, convertendo os preços do lote inteiro em uma só coluna.
+
+    Returns:
+        list: (categoria, produto estruturado) de cada produto, na mesma ordem da entrada.
+    """
+    values, offsets = prices.build_price_column(product.prices_cents for product in products)
+    price_summaries = prices.summarize_price_column(values, offsets)
+    return [structure_product(product, summary) for product, summary in zip(products, price_summaries)]
+
+def _chunked(products, chunk_size):
+    """Agrupa um iterável de produtos em listas de até `chunk_size` itens."""
+    chunk = []
+    for product in products:
+        chunk.append(product)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def structure_products(products, workers=1, chunk_size=DEFAULT_CHUNK_SIZE):
     """
-    print(f"Iniciando transformação e estruturação de dados de '{input_file}'...")
+    Estrutura todos os produtos, opcionalmente em paralelo.
 
-    if not os.path.exists(input_file):
-        print(f"Erro: Arquivo de entrada '{input_file}' não encontrado.")
+    Com `workers` > 1 os lotes são distribuídos entre processos
+    (ProcessPoolExecutor) e os resultados são devolvidos na ordem de envio,
+    de modo que a saída é idêntica à do caminho serial. No máximo
+    2 x `workers` lotes ficam pendentes ao mesmo tempo, o que mantém o
+    modo streaming com memória limitada.
+
+    Yields:
+        tuple: (categoria, produto estruturado), na ordem da entrada.
+    """
+    if workers <= 1:
+        for chunk in _chunked(products, chunk_size):
+            yield from structure_chunk(chunk)
         return
 
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in _chunked(products, chunk_size):
+            pending.append(executor.submit(structure_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def _relative_file(output_dir, filepath):
+    # Caminho registrado no estado da categorização ("tintas/intenze.json")
+    return os.path.relpath(filepath, output_dir).replace(os.sep, '/')
+
+def write_structured_files(structured_data, output_dir, compact=False, previous_files=()):
+    """
+    Grava structured_by_type: um arquivo por categoria/marca e o consolidado cosmeticos.json.
+
+    Cada produto é serializado uma única vez; o mesmo texto é usado no arquivo
+    da marca e no cosmeticos.json. Arquivos cujo conteúdo não mudou não são
+    reescritos e os alterados são trocados de forma atômica. Arquivos de marcas
+    que deixaram de existir só são removidos se estiverem em `previous_files`
+    (gravados pela categorização anterior); os demais arquivos do diretório não são tocados.
+
+    Args:
+        structured_data (dict): Categoria -> produtos estruturados, na ordem da lista mesclada.
+        output_dir (str): Diretório de saída.
+        compact (bool): Se True, grava JSON sem indentação.
+        previous_files (iterable): Arquivos gravados pela execução anterior (ver load_state).
+
+    Returns:
+        dict: Quantidade de arquivos gravados (written), sem alterações (unchanged) e
+              removidos (removed), e os arquivos de categoria/marca desta execução (files).
+    """
+    written = unchanged = 0
+    current_files = set()
+    fragments_by_category = {}
+    for category, items_list in structured_data.items():
+        fragments = [catalog_io.encode_json(item, compact) for item in items_list]
+        fragments_by_category[category] = fragments
+
+        # Agrupar por marca dentro da categoria
+        products_by_brand = {}
+        for item, fragment in zip(items_list, fragments):
+            products_by_brand.setdefault(item.get('brand', 'Sem Marca'), []).append((item['name'], fragment))
+
+        for brand_name, brand_products in products_by_brand.items():
+            output_filepath = brand_filepath(output_dir, category, brand_name)
+            current_files.add(_relative_file(output_dir, output_filepath))
+
+            # Ordenar produtos por nome dentro da marca
+            brand_products.sort(key=lambda x: x[0])
+            text = catalog_io.join_json_array([fragment for _, fragment in brand_products], compact=compact)
+            if catalog_io.write_text_if_changed(output_filepath, text):
+                written += 1
+                print(f"Lista de '{category}' - '{brand_name}' salva em '{output_filepath}'. Total de itens: {len(brand_products)}")
+            else:
+                unchanged += 1
+
+    # Marcas (ou categorias inteiras) que não aparecem mais no catálogo
+    removed = 0
+    for relative_path in sorted(set(previous_files) - current_files):
+        filepath = os.path.join(output_dir, relative_path)
+        if relative_path.endswith('.json') and os.path.exists(filepath):
+            os.remove(filepath)
+            removed += 1
+            print(f"Lista '{filepath}' removida (marca sem produtos nesta categoria).")
+
+    # Adicionalmente, o arquivo cosmeticos.json com estrutura específica
+    cosmeticos_output = os.path.join(output_dir, COSMETICOS_FILENAME)
+    write_cosmeticos(cosmeticos_output, fragments_by_category, compact=compact)
+    print(f"{written} arquivo(s) gravado(s), {unchanged} sem alterações, {removed} removido(s).")
+    return {"written": written, "unchanged": unchanged, "removed": removed, "files": sorted(current_files)}
+
+def write_cosmeticos(cosmeticos_output, fragments_by_category, compact=False):
+    """Grava o cosmeticos.json a partir dos produtos já serializados de cada categoria de cosméticos."""
+    categories = [
+        (category, catalog_io.join_json_array(fragments_by_category.get(category, []), depth=2, compact=compact))
+        for category in COSMETIC_CATEGORIES
+    ]
+    text = catalog_io.join_json_object([("produtos", catalog_io.join_json_object(categories, depth=1, compact=compact))], compact=compact)
+    if catalog_io.write_text_if_changed(cosmeticos_output, text):
+        print(f"Arquivo consolidado de cosméticos salvo em '{cosmeticos_output}'")
+
+def empty_structured_data():
+    """Dict categoria -> lista vazia, na ordem em que as categorias são gravadas."""
+    return {
+        "agulhas_e_cartuchos": [],
+        "tintas": [],
+        "maquinas": [],
+        "fontes_e_cabos": [],
+        "batoques": [],
+        "luvas": [],
+        "materiais_de_barreira": [],
+        "cremes_e_pos_tatuagem": [],
+        "pedais": [],
+        "bicos_e_tips": [],
+        "biosseguranca_e_higiene": [],
+        "materiais_para_stencil": [],  # Nova categoria
+        "higiene_e_limpeza_corporal": [],  # Nova categoria
+        "outros_cosmeticos": [],  # Nova categoria
+        "outros": []
+    }
+
+def transform_and_structure_data(products, workers=1):
+    """
+    Transforma os produtos mesclados no modelo JSON detalhado, separando-os por
+    tipo de material e adicionando campos específicos. Não lê nem grava arquivos:
+    veja `categorize_file` para a versão que parte da lista mesclada em disco.
+
+    Args:
+        products (iterable): Produtos da lista mesclada (model.Product).
+        workers (int): Número de processos usados para estruturar os produtos em paralelo.
+            A saída é idêntica à do modo serial (workers=1).
+
+    Returns:
+        dict: Categoria -> lista de produtos estruturados (ver `empty_structured_data`).
+    """
+    structured_data = empty_structured_data()
+    # Os preços de cada lote são convertidos para centavos em uma única coluna
+    for category, structured_product in structure_products(products, workers):
+        structured_data[category].append(structured_product)
+    return structured_data
+
+def default_search_index_dir(output_dir):
+    """Diretório do índice de busca: ao lado de structured_by_type."""
+    return os.path.join(os.path.dirname(os.path.normpath(output_dir)), search_index.SEARCH_INDEX_DIRNAME)
+
+def write_search_index(entries, output_dir):
+    """Grava o índice de busca (ver search_index) dos produtos categorizados."""
+    index_dir = default_search_index_dir(output_dir)
+    index = search_index.build_search_index(entries)
+    counts = search_index.write_search_index(index, index_dir)
+    print(f"Índice de busca salvo em '{index_dir}': {len(index['rows'])} produtos, {len(index['shards'])} shard(s), "
+          f"{counts['written']} arquivo(s) gravado(s).")
+
+def default_published_dir(output_dir):
+    """Diretório dos arquivos estáticos publicados: ao lado de structured_by_type."""
+    return os.path.join(os.path.dirname(os.path.normpath(output_dir)), static_artifacts.PUBLISHED_DIRNAME)
+
+def publish_static_artifacts(output_dir, files):
+    """
+    Publica as saídas desta execução e o índice de busca com hash no nome e
+    variantes comprimidas (ver static_artifacts).
+
+    Args:
+        output_dir (str): Diretório structured_by_type.
+        files (iterable): Arquivos gravados nesta execução, relativos a output_dir
+            (os de categoria/marca, como no estado da categorização, e o cosmeticos.json).
+    """
+    published_dir = default_published_dir(output_dir)
+    counts = static_artifacts.publish(output_dir, published_dir, files, default_search_index_dir(output_dir))
+    print(f"Arquivos estáticos publicados em '{published_dir}' ({', '.join(static_artifacts.available_encodings())}): "
+          f"{counts['written']} gravado(s), {counts['unchanged']} sem alterações, {counts['removed']} removido(s).")
+    return counts
+
+def state_path(output_dir):
+    """Caminho do estado da categorização (ver STATE_FILENAME): ao lado de structured_by_type."""
+    return os.path.join(os.path.dirname(os.path.normpath(output_dir)), STATE_FILENAME)
+
+def load_state(output_dir):
+    """Estado da última categorização em `output_dir`, ou {} se não houver."""
+    try:
+        with open(state_path(output_dir), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(output_dir, merged_sha256, files=None, output_format=None):
+    """
+    Registra a lista mesclada (pelo SHA-256) que originou os arquivos de `output_dir`,
+    os arquivos de categoria/marca gravados (`files`) e o formato deles
+    (`output_format`, "json" ou "jsonl"). None mantém o valor do estado anterior.
+    """
+    previous = load_state(output_dir) if files is None or output_format is None else {}
+    if files is None:
+        files = previous.get("files", [])
+    if output_format is None:
+        output_format = previous.get("format", "json")
+    state = {"merged_sha256": merged_sha256, "format": output_format, "files": sorted(files)}
+    catalog_io.write_text_if_changed(state_path(output_dir), catalog_io.encode_json(state))
+
+def categorize_file(input_file, output_dir="data/listas_mescladas/structured_by_type", stream=False, workers=1, sqlite_path=None, compact=False, products=None,
+                    merged_sha256=None):
+    """
+    Lê a lista de produtos mesclada, estrutura os produtos com
+    `transform_and_structure_data` e grava structured_by_type/<categoria>/<marca>.
+
+    Args:
+        input_file (str): Caminho para o arquivo de entrada (lista_final_mesclada.json ou .jsonl).
+        output_dir (str): Diretório onde os arquivos JSON estruturados serão salvos.
+        stream (bool): Se True, processa um produto por vez e grava cada um no arquivo
+            .jsonl da sua categoria/marca, sem manter o catálogo em memória. Neste modo
+            o cosmeticos.json consolidado não é gerado (os produtos já estão nas categorias).
+        workers (int): Número de processos usados para estruturar os produtos em paralelo.
+        sqlite_path (str): Se informado, grava também um banco SQLite indexado com
+            produtos, opções e preços (ver catalog_db), para consultas sem ler os JSONs.
+        compact (bool): Se True, grava os arquivos JSON sem indentação.
+            O índice de busca (ver search_index) e os arquivos estáticos publicados
+            (ver static_artifacts) são gravados ao lado de `output_dir`.
+        products (iterable): Produtos já carregados (model.Product), por exemplo o
+            resultado da mesclagem no mesmo processo (ver engine.py); nesse caso
+            `input_file` não é lido.
+        merged_sha256 (str): SHA-256 da lista mesclada de onde vieram `products`, registrado
+            no estado da categorização. Quando os produtos são lidos de `input_file`,
+            é o hash desse arquivo. None impede o próximo --delta (ele faz a transformação completa).
+
+    Returns:
+        bool: True se a categorização terminou, False se houve erro.
+
+    Os arquivos só são reescritos quando o conteúdo muda, sempre de forma atômica
+    (arquivo temporário + os.replace).
+    """
+    if products is None:
+        print(f"Iniciando transformação e estruturação de dados de '{input_file}'...")
+        if not os.path.exists(input_file):
+            print(f"Erro: Arquivo de entrada '{input_file}' não encontrado.")
+            return False
+    else:
+        print("Iniciando transformação e estruturação de dados da lista mesclada em memória...")
+
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
         print(f"Diretório de saída '{output_dir}' criado.")
 
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            products = json.load(f)
-
-        structured_data = {
-            "agulhas_e_cartuchos": [],
-            "tintas": [],
-            "maquinas": [],
-            "fontes_e_cabos": [],
-            "batoques": [],
-            "luvas": [],
-            "materiais_de_barreira": [],
-            "cremes_e_pos_tatuagem": [],
-            "pedais": [],
-            "bicos_e_tips": [],
-            "biosseguranca_e_higiene": [],
-            "materiais_para_stencil": [],  # Nova categoria
-            "higiene_e_limpeza_corporal": [],  # Nova categoria
-            "outros_cosmeticos": [],  # Nova categoria
-            "outros": []
-        }
-
-        for product in products:
-            name = product.get('name', '')
-            brand = product.get('brand', '') 
-            material_type = product.get('materialType', 'Outros')
-            available_options = product.get('availableOptions', [])
-            available_price = product.get('availablePrice', [])
-
-            # Converte a lista de preços para float para facilitar a manipulação
-            prices_float = sorted([float(p.replace('R$', '').replace('.', '').replace(',', '.').strip()) for p in available_price if p])
-
-            # Preço mais baixo e mais alto da lista
-            lowest_price = f"R$ {prices_float[0]:.2f}".replace('.', ',') if prices_float else None
-            highest_price = f"R$ {prices_float[-1]:.2f}".replace('.', ',') if prices_float else None
-            
-            # Formata todos os preços disponíveis
-            all_formatted_prices = [f"R$ {p:.2f}".replace('.', ',') for p in prices_float]
-
-            # --- Lógica de Estruturação por Tipo de Material ---
-            structured_product = {
-                "name": name,
-                "brand": brand,
-                "available_options_raw": available_options,
-                "all_available_prices": all_formatted_prices,
-                "lowest_price": lowest_price,
-                "highest_price": highest_price,
-                "material_type": material_type
-            }
-
-            # --- CATEGORIZAÇÃO PARA COSMÉTICOS ---
-            # Verificar se é material para stencil
-            is_stencil = (
-                "stencil" in name.lower() or 
-                "transfer" in name.lower() or 
-                "thermal" in name.lower() or
-                "spirit paper" in name.lower() or
-                "slip" in name.lower()  # Vaselina para deslizar estêncil
-            )
-            
-            # Verificar se é produto de higiene e limpeza corporal
-            is_higiene = (
-                "after all" in name.lower() or
-                "clean up" in name.lower() or
-                "cleaning water" in name.lower() or
-                "the gloo" in name.lower() or
-                "scrub out" in name.lower()
+        if products is None:
+            merged_sha256 = catalog_io.hash_file(input_file)
+        if products is None and (stream or catalog_io.is_jsonl(input_file)):
+            products = map(Product.from_dict, catalog_io.iter_products(input_file))
+        elif products is None:
+            with open(input_file, 'r', encoding='utf-8') as f:
+                products = [Product.from_dict(record) for record in json.load(f)]
+
+        if stream:
+            # Modo streaming: cada produto vai direto para o arquivo .jsonl da sua categoria/marca.
+            # Como a lista mesclada já vem ordenada por nome, cada arquivo sai ordenado também.
+            # Os sinks gravam em arquivos temporários, publicados só no final (e só se mudaram).
+            sinks = {}
+            sink_paths = {}
+            counts = {}
+            # Só os campos do índice de busca ficam em memória
+            search_entries = []
+            db_conn = catalog_db.create_catalog_db(sqlite_path) if sqlite_path else None
+            try:
+                for category, structured_product in structure_products(products, workers):
+                    if db_conn is not None:
+                        catalog_db.insert_product(db_conn, category, structured_product)
+                    brand_name = structured_product.get('brand', 'Sem Marca')
+                    sink_key = (category, brand_name)
+                    if sink_key not in sinks:
+                        output_filepath = brand_filepath(output_dir, category, brand_name, extension=".jsonl")
+                        sinks[sink_key] = catalog_io.open_jsonl_sink(output_filepath)
+                        sink_paths[sink_key] = output_filepath
+                        counts[sink_key] = 0
+                    catalog_io.append_jsonl(sinks[sink_key], structured_product)
+                    counts[sink_key] += 1
+                    search_entries.append((category, {field: structured_product.get(field) for field in ("name", "brand", "lowest_price")}))
+            except Exception:
+                if db_conn is not None:
+                    catalog_db.discard_catalog_db(db_conn, sqlite_path)
+                for sink in sinks.values():
+                    sink.close()
+                    os.remove(sink.name)
+                raise
+
+            changed = {sink_key: catalog_io.close_jsonl_sink(sink, sink_paths[sink_key]) for sink_key, sink in sinks.items()}
+
+            if db_conn is not None:
+                catalog_db.finalize_catalog_db(db_conn, sqlite_path)
+                print(f"Banco SQLite do catálogo salvo em '{sqlite_path}'")
+
+            for (category, brand_name), count in counts.items():
+                if changed[(category, brand_name)]:
+                    print(f"Lista de '{category}' - '{brand_name}' salva em '{sink_paths[(category, brand_name)]}'. Total de itens: {count}")
+            print(f"{sum(changed.values())} arquivo(s) gravado(s), {len(changed) - sum(changed.values())} sem alterações.")
+            write_search_index(search_entries, output_dir)
+            # O modo streaming não gera o cosmeticos.json: um que tenha ficado de outra execução não é publicado
+            sink_files = [_relative_file(output_dir, path) for path in sink_paths.values()]
+            static_counts = publish_static_artifacts(output_dir, sink_files)
+
+            per_category = {}
+            for (category, _), count in counts.items():
+                per_category[category] = per_category.get(category, 0) + count
+            metrics.report(
+                input_items=sum(per_category.values()),
+                output_items=sum(per_category.values()),
+                per_category=per_category,
+                counts={"files_written": sum(changed.values()), "files_unchanged": len(changed) - sum(changed.values()),
+                        "static_files_written": static_counts["written"]},
             )
-            
-            # Verificar se é creme pós-tatuagem
-            is_cream = (
-                "manteiga" in name.lower() or
-                "butter" in name.lower() or
-                "cat slobber" in name.lower() or
-                "cream derma" in name.lower()
+            save_state(output_dir, merged_sha256, sink_files, "jsonl")
+            print("Transformação e estruturação de dados concluída com sucesso!")
+            return True
+
+        structured_data = transform_and_structure_data(products, workers)
+        file_counts = write_structured_files(structured_data, output_dir, compact=compact,
+                                             previous_files=load_state(output_dir).get("files", []))
+        write_search_index(
+            ((category, item) for category, items_list in structured_data.items() for item in items_list),
+            output_dir,
+        )
+        static_counts = publish_static_artifacts(output_dir, file_counts["files"] + [COSMETICOS_FILENAME])
+
+        if sqlite_path:
+            total = catalog_db.write_catalog_db(
+                sqlite_path,
+                ((category, item) for category, items_list in structured_data.items() for item in items_list)
             )
+            print(f"Banco SQLite do catálogo salvo em '{sqlite_path}'. Total de produtos: {total}")
 
-            # --- RECLASSIFICAÇÃO DE PRODUTOS COSMÉTICOS ---
-            # Se vier de uma fonte de cosméticos ou tiver palavras-chave específicas, recategorizar
-            if "Cosméticos" in material_type:
-                if is_stencil:
-                    material_type = "Materiais para Stencil"
-                elif is_higiene:
-                    material_type = "Higiene e Limpeza Corporal"
-                elif is_cream:
-                    material_type = "Cremes e Pós-Tatuagem"
-                else:
-                    material_type = "Outros Cosméticos"
-                
-                # Atualizar o tipo no produto estruturado
-                structured_product["material_type"] = material_type
-            
-            # Processar de acordo com o tipo de material
-            if material_type == "Agulhas e Cartuchos":
-                # Código existente para Agulhas e Cartuchos...
-                structured_data["agulhas_e_cartuchos"].append(structured_product)
-
-            elif material_type == "Tintas":
-                # Código existente para Tintas...
-                structured_data["tintas"].append(structured_product)
-
-            # --- NOVAS CATEGORIAS DE COSMÉTICOS ---
-            elif material_type == "Materiais para Stencil":
-                tipo = None
-                if "transfer" in name.lower():
-                    tipo = "Transfer"
-                elif "vaseline" in name.lower() or "slip" in name.lower():
-                    tipo = "Vaselina"
-                elif "thermal" in name.lower() or "spirit paper" in name.lower():
-                    tipo = "Papel Térmico"
-                
-                volume_match = re.search(r'(\d+\s?ml|\d+\s?g)', name.lower())
-                volume = volume_match.group(0) if volume_match else None
-                
-                opcoes_volume = []
-                for opt in available_options:
-                    # Extrair volume/peso das opções
-                    vol_match = re.search(r'(\d+\s?ml|\d+\s?g)', opt.lower())
-                    if vol_match:
-                        opcoes_volume.append({
-                            "medida_string": opt,
-                            "medida_valor": vol_match.group(0)
-                        })
-                    # Extrair quantidade de unidades
-                    qty_match = re.search(r'(\d+)\s*(Un\.|un\.|unidades)', opt.lower())
-                    if qty_match:
-                        opcoes_volume.append({
-                            "medida_string": opt,
-                            "quantidade": int(qty_match.group(1))
-                        })
-                
-                structured_product.update({
-                    "tipo": tipo,
-                    "volume": volume,
-                    "opcoes": opcoes_volume
-                })
-                structured_data["materiais_para_stencil"].append(structured_product)
-
-            elif material_type == "Higiene e Limpeza Corporal":
-                tipo = None
-                if "after all" in name.lower():
-                    tipo = "Hidratante Pós-Tatuagem"
-                elif "clean up" in name.lower():
-                    tipo = "Solução de Limpeza"
-                elif "cleaning water" in name.lower():
-                    tipo = "Água de Limpeza"
-                elif "the gloo" in name.lower():
-                    tipo = "Cola para Estêncil"
-                elif "scrub out" in name.lower():
-                    tipo = "Esfoliante"
-                
-                volume_match = re.search(r'(\d+\s?ml|\d+\s?L)', name.lower())
-                volume = volume_match.group(0) if volume_match else None
-                
-                opcoes_volume = []
-                for opt in available_options:
-                    # Extrair volume das opções
-                    vol_match = re.search(r'(\d+\s?ml|\d+\s?L)', opt.lower())
-                    if vol_match:
-                        opcoes_volume.append({
-                            "volume_string": opt,
-                            "volume_valor": vol_match.group(0)
-                        })
-                
-                structured_product.update({
-                    "tipo": tipo,
-                    "volume": volume,
-                    "opcoes_volume": opcoes_volume
-                })
-                structured_data["higiene_e_limpeza_corporal"].append(structured_product)
-
-            elif material_type == "Cremes e Pós-Tatuagem":
-                # Reutilizar código existente e adicionar mais campos específicos
-                tipo = "Vaselina" if "vaselina" in name.lower() else \
-                       "Manteiga" if "manteiga" in name.lower() or "butter" in name.lower() or "cat slobber" in name.lower() else \
-                       "Aftercare" if "aftercare" in name.lower() else \
-                       "Creme" if "creme" in name.lower() or "cream" in name.lower() else None
-                
-                volume_match = re.search(r'(\d+\s?g|\d+\s?ml)', name.lower())
-                volume = volume_match.group(0) if volume_match else None
-                
-                kit = "kit" in name.lower()
-                monodose = "monodose" in name.lower()
-                
-                structured_product.update({
-                    "tipo": tipo,
-                    "volume": volume,
-                    "kit": kit,
-                    "monodose": monodose
-                })
-                structured_data["cremes_e_pos_tatuagem"].append(structured_product)
-
-            elif material_type == "Outros Cosméticos":
-                # Capturar equipamentos especiais como impressoras
-                equipamento = "impressora" in name.lower() or "bateria" in name.lower() or "estojo" in name.lower()
-                
-                tipo = None
-                if "impressora" in name.lower():
-                    tipo = "Impressora"
-                elif "bateria" in name.lower():
-                    tipo = "Bateria"
-                elif "estojo" in name.lower():
-                    tipo = "Estojo"
-                elif "kit" in name.lower():
-                    tipo = "Kit"
-                elif "tattoo to go" in name.lower():
-                    tipo = "Protetor Portátil"
-                elif "protection" in name.lower():
-                    tipo = "Protetor"
-                
-                kit = "kit" in name.lower()
-                
-                structured_product.update({
-                    "tipo": tipo,
-                    "equipamento": equipamento,
-                    "kit": kit
-                })
-                structured_data["outros_cosmeticos"].append(structured_product)
-                
-            # Continuar com o código existente para outras categorias...
-            elif material_type == "Batoques":
-                # Código existente...
-                structured_data["batoques"].append(structured_product)
-                
-            # ... (código existente para outras categorias) ...
-            
-            else:
-                structured_product.update({"tipo": None}) 
-                structured_data["outros"].append(structured_product)
-
-        # Salvar cada lista categorizada em um arquivo JSON separado
-        for category, items_list in structured_data.items():
-            if items_list: # Salva apenas se a lista não estiver vazia
-                # Criar diretório para a categoria
-                category_dir = os.path.join(output_dir, category)
-                os.makedirs(category_dir, exist_ok=True)
-
-                # Agrupar por marca dentro da categoria
-                products_by_brand = {}
-                for item in items_list:
-                    brand = item.get('brand', 'Sem Marca')
-                    if brand not in products_by_brand:
-                        products_by_brand[brand] = []
-                    products_by_brand[brand].append(item)
-                
-                for brand_name, brand_products in products_by_brand.items():
-                    # Normalizar o nome do arquivo (remover espaços, caracteres especiais)
-                    safe_brand_name = brand_name.replace(' ', '_').replace('/', '_').replace('-', '_').replace('(', '').replace(')', '').lower()
-                    output_filepath = os.path.join(category_dir, f"{safe_brand_name}.json")
-                    
-                    # Ordenar produtos por nome dentro da marca
-                    brand_products.sort(key=lambda x: x['name'])
-
-                    with open(output_filepath, 'w', encoding='utf-8') as f:
-                        json.dump(brand_products, f, indent=2, ensure_ascii=False)
-                    print(f"Lista de '{category}' - '{brand_name}' salva em '{output_filepath}'. Total de itens: {len(brand_products)}")
-
-        # Adicionalmente, criar um arquivo cosmeticos.json com estrutura específica
-        cosmeticos_json = {
-            "produtos": {
-                "materiais_para_stencil": structured_data["materiais_para_stencil"],
-                "outros_cosmeticos": structured_data["outros_cosmeticos"],
-                "higiene_e_limpeza_corporal": structured_data["higiene_e_limpeza_corporal"],
-                "cremes_e_pos_tatuagem": structured_data["cremes_e_pos_tatuagem"]
-            }
-        }
-        
-        # Salvar o arquivo cosmeticos.json
-        cosmeticos_output = os.path.join(output_dir, "cosmeticos.json")
-        with open(cosmeticos_output, 'w', encoding='utf-8') as f:
-            json.dump(cosmeticos_json, f, indent=2, ensure_ascii=False)
-        print(f"Arquivo consolidado de cosméticos salvo em '{cosmeticos_output}'")
+        # Contagens para as métricas da pipeline (ver engine.py)
+        per_category = {category: len(items_list) for category, items_list in structured_data.items() if items_list}
+        metrics.report(
+            input_items=sum(per_category.values()),
+            output_items=sum(per_category.values()),
+            per_category=per_category,
+            counts=dict({f"files_{key}": file_counts[key] for key in ("written", "unchanged", "removed")},
+                        static_files_written=static_counts["written"]),
+        )
+        save_state(output_dir, merged_sha256, file_counts["files"], "json")
 
         print("Transformação e estruturação de dados concluída com sucesso!")
+        return True
 
     except json.JSONDecodeError as e:
         print(f"Erro: Problema ao decodificar o arquivo JSON '{input_file}'. Verifique a formatação. Detalhes: {e}")
     except Exception as e:
         print(f"Ocorreu um erro inesperado durante a transformação: {e}")
+    return False
+
+def apply_catalog_changes(changes_file, output_dir="data/listas_mescladas/structured_by_type", compact=False):
+    """
+    Atualiza structured_by_type a partir do log de alterações da mesclagem
+    (alteracoes.json), reescrevendo apenas os arquivos de categoria/marca
+    afetados em vez de reprocessar o catálogo inteiro.
+
+    Produtos removidos ou alterados saem do arquivo em que estavam (calculado a
+    partir do registro anterior) e os novos/alterados entram no arquivo da sua
+    categoria/marca atual. O cosmeticos.json só é refeito se alguma categoria
+    de cosméticos for afetada.
+
+    Args:
+        changes_file (str): Caminho do log de alterações gerado por merge_lists.py.
+        output_dir (str): Diretório com os arquivos estruturados da execução anterior.
+        compact (bool): Se True, grava os arquivos JSON sem indentação.
+
+    O log só é aplicado se partir da lista mesclada que originou os arquivos
+    atuais (base_sha256 do log igual ao merged_sha256 do estado da categorização).
+    Se a mesclagem rodou mais de uma vez desde a última categorização, os logs
+    intermediários foram sobrescritos e aplicar só o último perderia alterações.
+    Também só é aplicado sobre arquivos .json: se a última categorização foi
+    --stream (.jsonl), o delta não tem os arquivos a atualizar.
+
+    O banco SQLite (--sqlite) não é atualizado pelo delta; por isso o script
+    não aceita --delta junto com --sqlite (nem com --stream).
+
+    Returns:
+        bool: False se não foi possível aplicar o delta (sem execução anterior,
+              log de outra base ou saídas em JSON Lines); nesse caso é preciso
+              rodar a transformação completa.
+    """
+    with open(changes_file, 'r', encoding='utf-8') as f:
+        changes = json.load(f)
+
+    if changes["previous_total"] == 0 or not os.path.isdir(output_dir):
+        print("Sem catálogo estruturado anterior para aplicar o delta.")
+        return False
+
+    state = load_state(output_dir)
+    if state.get("format", "json") != "json":
+        print(f"A última categorização gravou arquivos .{state['format']}; o delta só atualiza arquivos .json.")
+        return False
+    applied_sha256 = state.get("merged_sha256")
+    if changes.get("sha256") is not None and applied_sha256 == changes["sha256"]:
+        print(f"O log de alterações '{changes_file}' já foi aplicado.")
+        return True
+    if changes.get("base_sha256") is None or applied_sha256 != changes["base_sha256"]:
+        print(f"O log de alterações '{changes_file}' não parte da lista mesclada categorizada por último.")
+        return False
+
+    if not catalog_delta.has_changes(changes):
+        print("Nenhuma alteração na lista mesclada.")
+        save_state(output_dir, changes["sha256"])
+        return True
+
+    print(f"Aplicando alterações de '{changes_file}': {catalog_delta.summarize(changes)}")
+    removals = {}
+    additions = {}
+    affected_categories = set()
+    records = catalog_delta.changed_records(changes)
+    for name, previous, current in records:
+        if previous is not None:
+            category, old_product = structure_product(Product.from_dict(previous))
+            removals.setdefault(brand_filepath(output_dir, category, old_product['brand']), set()).add(name)
+            affected_categories.add(category)
+        if current is not None:
+            category, structured_product = structure_product(Product.from_dict(current))
+            filepath = brand_filepath(output_dir, category, structured_product['brand'])
+            removals.setdefault(filepath, set()).add(name)
+            additions.setdefault(filepath, []).append(structured_product)
+            affected_categories.add(category)
+
+    # Arquivos gravados pela categorização: um arquivo esvaziado só é removido se estiver entre eles
+    written_files = set(state.get("files", []))
+    for filepath in sorted(removals):
+        existing = []
+        if os.path.exists(filepath):
+            with open(filepath, 'r', encoding='utf-8') as f:
+                existing = json.load(f)
+        brand_products = [item for item in existing if item['name'] not in removals[filepath]]
+        brand_products.extend(additions.get(filepath, []))
+        brand_products.sort(key=lambda x: x['name'])
+
+        relative_path = _relative_file(output_dir, filepath)
+        if brand_products:
+            text = catalog_io.encode_json(brand_products, compact)
+            if catalog_io.write_text_if_changed(filepath, text):
+                print(f"Lista atualizada em '{filepath}'. Total de itens: {len(brand_products)}")
+            written_files.add(relative_path)
+        elif relative_path in written_files:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+                print(f"Lista '{filepath}' removida (nenhum item restante).")
+            written_files.discard(relative_path)
+        elif os.path.exists(filepath):
+            print(f"Aviso: Lista '{filepath}' ficou sem itens, mas não foi gravada pela categorização e foi mantida.")
+
+    if affected_categories.intersection(COSMETIC_CATEGORIES):
+        # Só os arquivos gravados pela categorização, como na transformação completa
+        items_by_category = {category: [] for category in COSMETIC_CATEGORIES}
+        for category, item in search_index.entries_from_structured_dir(output_dir, written_files):
+            if category in items_by_category:
+                items_by_category[category].append(item)
+        fragments_by_category = {}
+        for category, items in items_by_category.items():
+            items.sort(key=lambda x: x['name'])
+            fragments_by_category[category] = [catalog_io.encode_json(item, compact) for item in items]
+        write_cosmeticos(os.path.join(output_dir, COSMETICOS_FILENAME), fragments_by_category, compact=compact)
+
+    print(f"Delta aplicado: {len(removals)} arquivo(s) de categoria/marca reescrito(s).")
+    # O índice de busca cobre o catálogo inteiro: é refeito a partir dos arquivos
+    # de categoria/marca gravados pela categorização (os mesmos da transformação completa)
+    write_search_index(search_index.entries_from_structured_dir(output_dir, written_files), output_dir)
+    publish_static_artifacts(output_dir, sorted(written_files) + [COSMETICOS_FILENAME])
+    save_state(output_dir, changes["sha256"], written_files)
+    metrics.report(
+        input_items=len(records),
+        counts={"files_rewritten": len(removals)},
+    )
+    return True
+
+# O bloco abaixo só roda como script: os processos do modo --workers importam este módulo
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Categoriza a lista mesclada em structured_by_type/<categoria>/<marca>.")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Lê lista_final_mesclada.jsonl um produto por vez e grava cada categoria/marca em JSON Lines.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Número de processos para categorizar em paralelo (padrão: 1, serial). A saída é idêntica.",
+    )
+    parser.add_argument(
+        "--delta",
+        action="store_true",
+        help="Aplica apenas as alterações de alteracoes.json (gerado pela mesclagem) aos arquivos existentes.",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Grava os arquivos JSON de structured_by_type sem indentação.",
+    )
+    parser.add_argument(
+        "--sqlite",
+        metavar="CAMINHO",
+        help="Grava também um banco SQLite indexado do catálogo (ex.: data/listas_mescladas/catalogo.sqlite).",
+    )
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers deve ser pelo menos 1")
+    # O delta reescreve só arquivos .json e não atualiza o banco SQLite
+    if args.delta and args.stream:
+        parser.error("--delta não pode ser usado com --stream")
+    if args.delta and args.sqlite:
+        parser.error("--delta não pode ser usado com --sqlite")
+
+    # Caminho para o arquivo de entrada (resultado da mesclagem)
+    input_merged_file = './data/listas_mescladas/lista_final_mesclada.jsonl' if args.stream else './data/listas_mescladas/lista_final_mesclada.json'
 
-# Caminho para o arquivo de entrada (resultado da mesclagem)
-input_merged_file = './data/listas_mescladas/lista_final_mesclada.json'
+    # Garantir que o diretório existe
+    os.makedirs(os.path.dirname(input_merged_file), exist_ok=True)
 
-# Garantir que o diretório existe
-os.makedirs(os.path.dirname(input_merged_file), exist_ok=True)
+    # No modo --delta, reescreve só os arquivos afetados; sem execução anterior
+    # (ou com um log que não parte dela), faz a transformação completa
+    changes_file = os.path.join(os.path.dirname(input_merged_file), catalog_delta.CHANGELOG_FILENAME)
+    applied = False
+    if args.delta and os.path.exists(changes_file):
+        applied = apply_catalog_changes(changes_file, compact=args.compact)
 
-# Chamar a função de transformação
-transform_and_structure_data(input_merged_file)
\ No newline at end of file
+    if not applied:
+        # Chamar a função de transformação
+        if not categorize_file(input_merged_file, stream=args.stream, workers=args.workers, sqlite_path=args.sqlite, compact=args.compact):
+            raise SystemExit(1)
\ No newline at end of file
@@ -0,0 +1,150 @@
+import re
+
+# --- Tabela de regras de classificação ---
+# Cada regra tem uma prioridade (menor vence), o valor atribuído e as palavras-chave
+# que a disparam. As palavras-chave são comparadas com o nome do produto em minúsculas.
+
+# Reclassificação de produtos vindos de cosméticos (material_type contendo "Cosméticos")
+COSMETIC_RULES = [
+    (1, "Materiais para Stencil", ("stencil", "transfer", "thermal", "spirit paper", "slip")),  # slip: vaselina para deslizar estêncil
+    (2, "Higiene e Limpeza Corporal", ("after all", "clean up", "cleaning water", "the gloo", "scrub out")),
+    (3, "Cremes e Pós-Tatuagem", ("manteiga", "butter", "cat slobber", "cream derma")),
+]
+COSMETIC_DEFAULT = "Outros Cosméticos"
+
+# Categoria de saída (pasta em structured_by_type) para cada tipo de material.
+# has_tipo indica se o produto estruturado recebe o campo "tipo".
+CATEGORIES = {
+    "Agulhas e Cartuchos": {"category": "agulhas_e_cartuchos", "has_tipo": False},
+    "Tintas": {"category": "tintas", "has_tipo": False},
+    "Materiais para Stencil": {"category": "materiais_para_stencil", "has_tipo": True},
+    "Higiene e Limpeza Corporal": {"category": "higiene_e_limpeza_corporal", "has_tipo": True},
+    "Cremes e Pós-Tatuagem": {"category": "cremes_e_pos_tatuagem", "has_tipo": True},
+    "Outros Cosméticos": {"category": "outros_cosmeticos", "has_tipo": True},
+    "Batoques": {"category": "batoques", "has_tipo": False},
+}
+DEFAULT_CATEGORY = {"category": "outros", "has_tipo": True}
+
+# Tipo do produto dentro de cada categoria
+TIPO_RULES = {
+    "Materiais para Stencil": [
+        (1, "Transfer", ("transfer",)),
+        (2, "Vaselina", ("vaseline", "slip")),
+        (3, "Papel Térmico", ("thermal", "spirit paper")),
+    ],
+    "Higiene e Limpeza Corporal": [
+        (1, "Hidratante Pós-Tatuagem", ("after all",)),
+        (2, "Solução de Limpeza", ("clean up",)),
+        (3, "Água de Limpeza", ("cleaning water",)),
+        (4, "Cola para Estêncil", ("the gloo",)),
+        (5, "Esfoliante", ("scrub out",)),
+    ],
+    "Cremes e Pós-Tatuagem": [
+        (1, "Vaselina", ("vaselina",)),
+        (2, "Manteiga", ("manteiga", "butter", "cat slobber")),
+        (3, "Aftercare", ("aftercare",)),
+        (4, "Creme", ("creme", "cream")),
+    ],
+    "Outros Cosméticos": [
+        (1, "Impressora", ("impressora",)),
+        (2, "Bateria", ("bateria",)),
+        (3, "Estojo", ("estojo",)),
+        (4, "Kit", ("kit",)),
+        (5, "Protetor Portátil", ("tattoo to go",)),
+        (6, "Protetor", ("protection",)),
+    ],
+}
+
+# Campos booleanos adicionais de cada categoria, na ordem em que aparecem no JSON
+FLAG_RULES = {
+    "Cremes e Pós-Tatuagem": [
+        ("kit", ("kit",)),
+        ("monodose", ("monodose",)),
+    ],
+    "Outros Cosméticos": [
+        ("equipamento", ("impressora", "bateria", "estojo")),
+        ("kit", ("kit",)),
+    ],
+}
+
+def _all_keywords():
+    """Reúne todas as palavras-chave presentes nas tabelas de regras."""
+    keywords = set()
+    for _, _, rule_keywords in COSMETIC_RULES:
+        keywords.update(rule_keywords)
+    for rules in TIPO_RULES.values():
+        for _, _, rule_keywords in rules:
+            keywords.update(rule_keywords)
+    for rules in FLAG_RULES.values():
+        for _, rule_keywords in rules:
+            keywords.update(rule_keywords)
+    return keywords
+
+def compile_keyword_matcher(keywords):
+    """
+    Compila todas as palavras-chave em uma única expressão regular.
+
+    O lookahead permite encontrar ocorrências sobrepostas em uma única passada:
+    em cada posição a alternativa mais longa é capturada e, como qualquer outra
+    palavra-chave que comece ali é substring dela, `implied` mapeia cada
+    palavra-chave para todas as que ela contém.
+
+    Returns:
+        tuple: (regex compilada, dict palavra-chave -> frozenset de palavras-chave contidas nela)
+    """
+    ordered = sorted(keywords, key=lambda kw: (-len(kw), kw))
+    pattern = re.compile("(?=(" + "|".join(re.escape(kw) for kw in ordered) + "))")
+    implied = {
+        kw: frozenset(other for other in keywords if other in kw)
+        for kw in keywords
+    }
+    return pattern, implied
+
+_KEYWORD_PATTERN, _IMPLIED_KEYWORDS = compile_keyword_matcher(_all_keywords())
+
+def find_keywords(name):
+    """Retorna o conjunto de palavras-chave das regras presentes no nome (comparação em minúsculas)."""
+    found = set()
+    for match in _KEYWORD_PATTERN.finditer(name.lower()):
+        found.update(_IMPLIED_KEYWORDS[match.group(1)])
+    return found
+
+def _first_matching(rules, found):
+    """Retorna o valor da regra de menor prioridade cujas palavras-chave aparecem em `found`."""
+    best = None
+    for priority, value, keywords in rules:
+        if found.intersection(keywords) and (best is None or priority < best[0]):
+            best = (priority, value)
+    return best[1] if best else None
+
+def classify(name, material_type):
+    """
+    Classifica um produto a partir do nome e do tipo de material vindo da mesclagem.
+
+    Args:
+        name (str): Nome do produto.
+        material_type (str): Tipo de material atribuído pelos scrapers/mesclagem.
+
+    Returns:
+        dict: material_type (possivelmente reclassificado), category (pasta de saída),
+              has_tipo, tipo e flags (campos booleanos específicos da categoria).
+    """
+    found = find_keywords(name)
+
+    if "Cosméticos" in material_type:
+        material_type = _first_matching(COSMETIC_RULES, found) or COSMETIC_DEFAULT
+
+    category = CATEGORIES.get(material_type, DEFAULT_CATEGORY)
+    tipo = _first_matching(TIPO_RULES.get(material_type, []), found)
+    flags = {
+        flag: bool(found.intersection(keywords))
+        for flag, keywords in FLAG_RULES.get(material_type, [])
+    }
+
+    return {
+        "material_type": material_type,
+        "category": category["category"],
+        "has_tipo": category["has_tipo"],
+        "tipo": tipo,
+        "flags": flags,
+    }
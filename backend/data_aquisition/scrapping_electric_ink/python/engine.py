@@ -1,30 +1,557 @@
-import subprocess
+import argparse
+import asyncio
+import cProfile
+import json
 import os
-import shutil # Para remover pastas e arquivos temporários
+import resource
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
 
-def run_command(command, cwd=None):
+import catalog_service
+import categorize_products
+import merge_lists
+import metrics
+import scrape_checkpoint
+import sources
+import stage_cache
+
+# Número padrão de estágios executados ao mesmo tempo (os três scrapers são independentes)
+DEFAULT_MAX_CONCURRENCY = 3
+
+# Execuções de um scraper antes de a pipeline desistir dele. Cada nova tentativa
+# retoma do checkpoint por página (ver scrape_checkpoint) e baixa só as páginas que faltam
+SCRAPE_ATTEMPTS = 3
+
+# Validade das listas brutas no cache de estágios. Os scrapers não têm entradas
+# locais para hashear (a entrada é a loja), então uma execução sem --force refaz
+# o scraping sempre que o último tiver mais que isto (ver --scrape-max-age)
+SCRAPE_MAX_AGE_SECONDS = 6 * 3600
+
+# Métricas da última execução (JSON e textfile do Prometheus) e perfis do --profile
+METRICS_JSON_PATH = "data/metrics.json"
+METRICS_PROMETHEUS_PATH = "data/metrics.prom"
+PROFILE_DIR = "data/profiles"
+
+def run_merge(context, cwd=None):
+    """
+    Mescla as listas brutas no próprio processo do engine. Os produtos mesclados
+    ficam em context["merged_products"] para a categorização; a lista mesclada
+    só é gravada em disco se context["checkpoint"] for verdadeiro.
+    """
+    result = merge_lists.merge_files(
+        os.path.join(cwd or '.', merge_lists.MERGED_OUTPUT),
+        base_dir=cwd,
+        checkpoint=context["checkpoint"],
+    )
+    if result is None:
+        raise RuntimeError("A mesclagem falhou")
+    context["merged_products"] = result["products"]
+    # Hash da lista gravada (None sem checkpoint), registrado pela categorização para o --delta
+    context["merged_sha256"] = result.get("snapshot_sha256")
+
+def run_categorize(context, cwd=None):
+    """
+    Categoriza os produtos mesclados no próprio processo do engine. Se a mesclagem
+    não rodou nesta execução (cache), lê a lista mesclada gravada em disco.
+    """
+    base = cwd or '.'
+    if not categorize_products.categorize_file(
+        os.path.join(base, merge_lists.MERGED_OUTPUT),
+        output_dir=os.path.join(base, "data/listas_mescladas/structured_by_type"),
+        products=context.get("merged_products"),
+        merged_sha256=context.get("merged_sha256"),
+    ):
+        raise RuntimeError("A categorização falhou")
+
+# Estágios da pipeline e suas dependências. Estágios sem dependência entre si
+# (como os scrapers) rodam em paralelo; os demais começam assim que suas
+# entradas ficam prontas. Estágios com "run" são executados no próprio processo
+# do engine (o "command" equivalente fica para referência e para rodá-los à mão);
+# "checkpoint_outputs" são as saídas gravadas só como checkpoint (ver --no-checkpoint).
+# Estágios com "page_checkpoint" gravam cada página no diretório indicado e são
+# executados até "attempts" vezes, retomando da página em que pararam.
+# Estágios com "max_age_seconds" (os que leem da rede) saem do cache quando a
+# última execução fica mais velha que isso, mesmo sem mudança de código.
+PIPELINE_STAGES = [
+    {
+        "name": "scrape_json_ld",
+        "description": "scraping JSON-LD",
+        # O comando é executado a partir da raiz do projeto, então o caminho para o script é 'js/scrape_json_ld_only.js'
+        "command": "node js/scrape_json_ld_only.js",
+        "depends_on": [],
+        "inputs": [],
+        "code": ["js/scrape_json_ld_only.js", "js/scrape_checkpoint.js"],
+        "outputs": ["data/listas_brutas/lista_json_ld.json"],
+        "page_checkpoint": scrape_checkpoint.checkpoint_dir("lista_json_ld"),
+        "attempts": SCRAPE_ATTEMPTS,
+        "max_age_seconds": SCRAPE_MAX_AGE_SECONDS,
+    },
+    {
+        "name": "scrape_html",
+        "description": "scraping HTML",
+        "command": "node js/scrape_html_only.js",
+        "depends_on": [],
+        "inputs": [],
+        "code": ["js/scrape_html_only.js", "js/scrape_checkpoint.js"],
+        "outputs": ["data/listas_brutas/lista_html.json"],
+        "page_checkpoint": scrape_checkpoint.checkpoint_dir("lista_html"),
+        "attempts": SCRAPE_ATTEMPTS,
+        "max_age_seconds": SCRAPE_MAX_AGE_SECONDS,
+    },
+    {
+        "name": "scrape_cosmetics",
+        "description": "scraping de cosméticos",
+        "command": "node js/scrape_cosmetics.js",
+        "depends_on": [],
+        "inputs": [],
+        "code": ["js/scrape_cosmetics.js", "js/scrape_checkpoint.js"],
+        "outputs": ["data/listas_brutas/lista_cosmeticos.json"],
+        "page_checkpoint": scrape_checkpoint.checkpoint_dir("lista_cosmeticos"),
+        "attempts": SCRAPE_ATTEMPTS,
+        "max_age_seconds": SCRAPE_MAX_AGE_SECONDS,
+    },
+    {
+        "name": "merge",
+        "description": "mesclagem das listas",
+        "command": "python3 python/merge_lists.py",
+        "run": run_merge,
+        "depends_on": ["scrape_json_ld", "scrape_html", "scrape_cosmetics"],
+        # Listas de todas as fontes registradas (ver sources.py)
+        "inputs": [source["path"] for source in sources.SOURCES],
+        "code": [
+            "python/merge_lists.py",
+            "python/name_index.py",
+            "python/prices.py",
+            "python/catalog_io.py",
+            "python/catalog_delta.py",
+            "python/metrics.py",
+            "python/model.py",
+            "python/price_history.py",
+            "python/sku_index.py",
+            "python/sources.py",
+            "python/option_parser.py",
+        ],
+        "outputs": [
+            "data/listas_mescladas/lista_final_mesclada.json",
+            "data/listas_mescladas/relatorio_juncao.json",
+            "data/listas_mescladas/alteracoes.json",
+            "data/listas_mescladas/historico_precos",
+            "data/listas_mescladas/variantes_sku.json",
+        ],
+        "checkpoint_outputs": [
+            "data/listas_mescladas/lista_final_mesclada.json",
+            "data/listas_mescladas/alteracoes.json",
+        ],
+    },
+    {
+        "name": "categorize",
+        "description": "categorização das listas",
+        "command": "python3 python/categorize_products.py",
+        "run": run_categorize,
+        "depends_on": ["merge"],
+        "inputs": ["data/listas_mescladas/lista_final_mesclada.json"],
+        "code": [
+            "python/categorize_products.py",
+            "python/classifier.py",
+            "python/catalog_io.py",
+            "python/prices.py",
+            "python/catalog_db.py",
+            "python/catalog_delta.py",
+            "python/metrics.py",
+            "python/model.py",
+            "python/option_parser.py",
+            "python/search_index.py",
+            "python/name_index.py",
+            "python/static_artifacts.py",
+        ],
+        "outputs": [
+            "data/listas_mescladas/structured_by_type",
+            "data/listas_mescladas/indice_busca",
+            "data/listas_mescladas/publicado",
+            "data/listas_mescladas/estado_categorizacao.json",
+        ],
+    },
+]
+
+async def _stream_output(stream, prefix):
+    """Imprime cada linha de um stream do subprocesso assim que ela chega, com o prefixo do estágio."""
+    while True:
+        line = await stream.readline()
+        if not line:
+            break
+        print(f"{prefix} {line.decode('utf-8', errors='replace').rstrip()}", flush=True)
+
+async def run_command(command, stage_name, cwd=None, env=None, display_command=None):
+    """
+    Executa um comando de shell transmitindo stdout/stderr ao vivo, com o nome do estágio como prefixo.
+    Levanta um erro se o comando falhar. `display_command` é o comando mostrado
+    nas mensagens, quando `command` é um invólucro dele (ex.: medição de métricas).
+    """
+    display_command = display_command or command
+    # cwd (current working directory) define o diretório de execução do comando.
+    process = await asyncio.create_subprocess_shell(
+        command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=cwd,
+        env=env,
+    )
+    await asyncio.gather(
+        _stream_output(process.stdout, f"[{stage_name}]"),
+        _stream_output(process.stderr, f"[{stage_name}][stderr]"),
+    )
+    returncode = await process.wait()
+
+    if returncode != 0:
+        print(f"ERRO: Comando falhou (código {returncode}): {display_command}", flush=True)
+        raise RuntimeError(f"Estágio '{stage_name}' falhou com código {returncode}")
+    print(f"Comando executado com sucesso: {display_command}", flush=True)
+
+def validate_stages(stages):
+    """
+    Verifica se todas as dependências existem e se não há ciclos entre os estágios.
+    Levanta ValueError caso a definição da pipeline seja inválida.
+    """
+    by_name = {stage["name"]: stage for stage in stages}
+    for stage in stages:
+        for dependency in stage["depends_on"]:
+            if dependency not in by_name:
+                raise ValueError(f"Estágio '{stage['name']}' depende de '{dependency}', que não existe.")
+
+    # Ordenação topológica simples: se sobrar algum estágio, existe um ciclo
+    remaining = {stage["name"]: set(stage["depends_on"]) for stage in stages}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Dependência circular entre os estágios: {', '.join(sorted(remaining))}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+def stages_to_force(stages, from_stage=None, force=False):
+    """
+    Define quais estágios devem rodar mesmo com o cache válido.
+
+    Args:
+        stages (list): Lista de estágios da pipeline.
+        from_stage (str): Estágio a partir do qual tudo é reexecutado (ele e seus dependentes).
+        force (bool): Se True, todos os estágios são reexecutados.
+
+    Returns:
+        set: Nomes dos estágios forçados.
+    """
+    if force:
+        return {stage["name"] for stage in stages}
+    if from_stage is None:
+        return set()
+    if from_stage not in {stage["name"] for stage in stages}:
+        raise ValueError(f"Estágio desconhecido: '{from_stage}'")
+
+    forced = {from_stage}
+    changed = True
+    while changed:
+        changed = False
+        for stage in stages:
+            if stage["name"] not in forced and forced.intersection(stage["depends_on"]):
+                forced.add(stage["name"])
+                changed = True
+    return forced
+
+def count_output_items(stage, cwd=None):
+    """
+    Conta os itens dos arquivos de saída do estágio que são arrays JSON
+    (usado para os scrapers, que não informam suas contagens).
+
+    Returns:
+        int: Total de itens, ou None se nenhuma saída for um array JSON.
+    """
+    total = None
+    for output in stage.get("outputs", []):
+        path = os.path.join(cwd or '.', output)
+        if not os.path.isfile(path):
+            continue
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if isinstance(data, list):
+            total = (total or 0) + len(data)
+    return total
+
+async def run_measured_stage(stage, cwd=None, profile_dir=None):
+    """
+    Executa o comando de um estágio medindo tempo de relógio, tempo de CPU e
+    pico de memória (ver metrics.measure). Os estágios Python acrescentam suas
+    próprias contagens com metrics.report. Com `profile_dir`, estágios Python
+    rodam sob o cProfile e as estatísticas ficam em <profile_dir>/<estágio>.prof.
+
+    Returns:
+        dict: Métricas do estágio. Se o comando falhar, o erro é levantado
+              com as métricas no atributo `stage_metrics`.
+    """
+    command = stage["command"]
+    profile_path = None
+    if profile_dir is not None:
+        profile_path = os.path.abspath(os.path.join(profile_dir, f"{stage['name']}.prof"))
+        profiled = metrics.profiled_command(command, profile_path)
+        if profiled == command:
+            profile_path = None
+        else:
+            os.makedirs(os.path.dirname(profile_path), exist_ok=True)
+            command = profiled
+
+    fd, metrics_path = tempfile.mkstemp(prefix=f"{stage['name']}_", suffix=".json")
+    os.write(fd, b"{}")
+    os.close(fd)
+    env = dict(os.environ, **{metrics.METRICS_ENV: metrics_path})
+    started = time.perf_counter()
+    error = None
+    try:
+        await run_command(metrics.measured_command(command), stage["name"], cwd=cwd, env=env, display_command=stage["command"])
+    except RuntimeError as e:
+        error = e
+
+    result = {"status": "failed" if error else "ran", "wall_seconds": round(time.perf_counter() - started, 3)}
+    result.update(metrics.load_metrics(metrics_path))
+    os.remove(metrics_path)
+    if error is not None:
+        error.stage_metrics = result
+        raise error
+
+    if "output_items" not in result:
+        output_items = count_output_items(stage, cwd)
+        if output_items is not None:
+            result["output_items"] = output_items
+    if profile_path is not None and os.path.exists(profile_path):
+        result["profile"] = os.path.relpath(profile_path)
+        print(f"[{stage['name']}] Perfil salvo em '{result['profile']}' (resumo em '{os.path.relpath(metrics.write_profile_summary(profile_path))}')", flush=True)
+    return result
+
+class _PrefixedOutput:
     """
-    Executa um comando de shell e imprime sua saída.
-    Levanta um erro se o comando falhar.
+    Substituto de sys.stdout/sys.stderr enquanto há estágios executados no
+    próprio processo: as linhas impressas pela thread de um estágio recebem o
+    prefixo dele, como a saída dos subprocessos em run_command; as das demais
+    threads passam sem alteração.
     """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        prefix = getattr(self.local, "prefix", None)
+        if prefix is None:
+            return self.stream.write(text)
+        *lines, self.local.pending = (self.local.pending + text).split("\n")
+        for line in lines:
+            self.stream.write(f"{prefix} {line}\n")
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+_output_lock = threading.Lock()
+_output_users = 0
+
+@contextmanager
+def _stage_output(stage_name):
+    """Prefixa com o nome do estágio a saída impressa pela thread atual dentro do bloco."""
+    global _output_users
+    with _output_lock:
+        if _output_users == 0:
+            sys.stdout, sys.stderr = _PrefixedOutput(sys.stdout), _PrefixedOutput(sys.stderr)
+        _output_users += 1
+        outputs = {f"[{stage_name}]": sys.stdout, f"[{stage_name}][stderr]": sys.stderr}
+    for prefix, output in outputs.items():
+        output.local.prefix = prefix
+        output.local.pending = ""
+    try:
+        yield
+    finally:
+        for prefix, output in outputs.items():
+            # Última linha impressa sem quebra de linha
+            if output.local.pending:
+                output.stream.write(f"{prefix} {output.local.pending}\n")
+            output.local.prefix = None
+            output.flush()
+        with _output_lock:
+            _output_users -= 1
+            if _output_users == 0:
+                sys.stdout, sys.stderr = (output.stream for output in outputs.values())
+
+def _call_in_process(stage, context, cwd=None, profile_path=None):
+    # Executada em uma thread: as métricas reportadas pelo estágio vão para o coletor
+    # e a saída impressa recebe o prefixo do estágio, como a dos subprocessos
+    profiler = cProfile.Profile() if profile_path else None
+    with _stage_output(stage["name"]), metrics.collect() as collected:
+        if profiler is not None:
+            profiler.enable()
+        try:
+            stage["run"](context, cwd)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                profiler.dump_stats(profile_path)
+    return collected
+
+async def run_in_process_stage(stage, context, cwd=None, profile_dir=None):
+    """
+    Executa um estágio com "run" no próprio processo do engine (em uma thread,
+    para não bloquear os demais estágios), com as métricas de run_measured_stage.
+    O tempo de CPU é o do processo do engine durante o estágio. O pico de memória
+    não pode ser separado por estágio dentro do mesmo processo, então é registrado
+    como engine_peak_rss_bytes: o pico do engine desde o início até o fim do estágio.
+
+    Returns:
+        dict: Métricas do estágio. Se o estágio falhar, o erro é levantado
+              com as métricas no atributo `stage_metrics`.
+    """
+    profile_path = None
+    if profile_dir is not None:
+        profile_path = os.path.abspath(os.path.join(profile_dir, f"{stage['name']}.prof"))
+        os.makedirs(os.path.dirname(profile_path), exist_ok=True)
+
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    started = time.perf_counter()
+    error = None
+    collected = {}
     try:
-        # Usamos text=True para capturar a saída como string e check=True para levantar um erro em caso de falha.
-        # cwd (current working directory) define o diretório de execução do comando.
-        result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True, cwd=cwd)
-        print(f"Comando executado com sucesso: {command}")
-        print("--- SAÍDA DO COMANDO ---")
-        print(result.stdout)
-        if result.stderr:
-            print("--- ERROS DO COMANDO (STDERR) ---")
-            print(result.stderr)
-        print("-----------------------")
-    except subprocess.CalledProcessError as e:
-        print(f"ERRO: Comando falhou: {command}")
-        print("--- SAÍDA DO ERRO (STDOUT) ---")
-        print(e.stdout)
-        print("--- ERROS DO COMANDO (STDERR) ---")
-        print(e.stderr)
-        raise e # Re-lança o erro para parar a pipeline
+        collected = await asyncio.to_thread(_call_in_process, stage, context, cwd, profile_path)
+    except Exception as e:
+        print(f"ERRO: Estágio '{stage['name']}' falhou: {e}", flush=True)
+        error = RuntimeError(f"Estágio '{stage['name']}' falhou: {e}")
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+
+    result = {
+        "status": "failed" if error else "ran",
+        "wall_seconds": round(time.perf_counter() - started, 3),
+        "cpu_user_seconds": round(usage.ru_utime - usage_before.ru_utime, 3),
+        "cpu_system_seconds": round(usage.ru_stime - usage_before.ru_stime, 3),
+        "engine_peak_rss_bytes": metrics.peak_rss_bytes(usage),
+    }
+    result.update(collected)
+    if error is not None:
+        error.stage_metrics = result
+        raise error
+
+    if profile_path is not None and os.path.exists(profile_path):
+        result["profile"] = os.path.relpath(profile_path)
+        print(f"[{stage['name']}] Perfil salvo em '{result['profile']}' (resumo em '{os.path.relpath(metrics.write_profile_summary(profile_path))}')", flush=True)
+    return result
+
+def _describe_page_checkpoint(stage, cwd=None):
+    # Resumo do checkpoint por página que o estágio vai retomar, ou None
+    if "page_checkpoint" not in stage:
+        return None
+    return scrape_checkpoint.describe(os.path.join(cwd or '.', stage["page_checkpoint"]))
+
+async def run_stages(stages, max_concurrency=DEFAULT_MAX_CONCURRENCY, cwd=None, manifest=None, forced=frozenset(),
+                     stage_metrics=None, profile_dir=None, checkpoint=True):
+    """
+    Executa os estágios respeitando as dependências, com no máximo
+    `max_concurrency` comandos rodando ao mesmo tempo. Quando um manifesto
+    de cache é informado, estágios cujas entradas, código e saídas não
+    mudaram desde a última execução são pulados. Estágios com "run" rodam no
+    próprio processo e passam seus resultados adiante em memória.
+
+    Args:
+        stages (list): Lista de estágios (name, description, command, depends_on, inputs, code, outputs;
+            opcionalmente run, checkpoint_outputs, page_checkpoint e attempts).
+        max_concurrency (int): Número máximo de estágios executados em paralelo.
+        cwd (str): Diretório de execução dos comandos.
+        manifest (dict): Manifesto do cache de estágios (ver stage_cache). None desativa o cache.
+        forced (set): Estágios que devem rodar mesmo com o cache válido.
+        stage_metrics (dict): Se informado, recebe as métricas de cada estágio
+            (ver run_measured_stage), inclusive dos pulados pelo cache e dos que falharam.
+        profile_dir (str): Diretório para os perfis cProfile dos estágios Python (--profile).
+        checkpoint (bool): Se False, as "checkpoint_outputs" dos estágios não são gravadas.
+            Esses estágios não entram no cache, e os que dependem deles sempre rodam
+            (suas entradas em disco não correspondem ao que foi passado em memória).
+
+    Returns:
+        dict: Estágios que falharam ou foram pulados, mapeados para o erro correspondente.
+    """
+    validate_stages(stages)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    tasks = {}
+    # Resultados passados em memória entre os estágios executados no processo
+    context = {"checkpoint": checkpoint}
+    # Estágios que rodaram sem gravar suas saídas de checkpoint
+    unsaved = set()
+
+    async def run_stage(stage):
+        # Espera as dependências terminarem; se alguma falhar, este estágio não roda
+        for dependency in stage["depends_on"]:
+            try:
+                await tasks[dependency]
+            except Exception:
+                print(f"[{stage['name']}] Pulado: a dependência '{dependency}' falhou.", flush=True)
+                if stage_metrics is not None:
+                    stage_metrics[stage["name"]] = {"status": "skipped"}
+                raise RuntimeError(f"Dependência '{dependency}' falhou")
+
+        if (manifest is not None and stage["name"] not in forced and not unsaved.intersection(stage["depends_on"])
+                and stage_cache.is_stage_fresh(manifest, stage)):
+            print(f"[{stage['name']}] Sem alterações desde a última execução. Usando o cache.", flush=True)
+            if stage_metrics is not None:
+                stage_metrics[stage["name"]] = {"status": "cached"}
+            return
+
+        async with semaphore:
+            print(f"\n--- Executando {stage['description']} ---", flush=True)
+            attempts = stage.get("attempts", 1)
+            failed_seconds = 0.0
+            for attempt in range(1, attempts + 1):
+                resume = _describe_page_checkpoint(stage, cwd)
+                if resume is not None:
+                    print(f"[{stage['name']}] Retomando do checkpoint: {resume}.", flush=True)
+                try:
+                    if "run" in stage:
+                        stage_result = await run_in_process_stage(stage, context, cwd=cwd, profile_dir=profile_dir)
+                    elif stage_metrics is None:
+                        stage_result = await run_command(stage["command"], stage["name"], cwd=cwd)
+                    else:
+                        stage_result = await run_measured_stage(stage, cwd=cwd, profile_dir=profile_dir)
+                    break
+                except RuntimeError as e:
+                    failed_metrics = getattr(e, "stage_metrics", {"status": "failed"})
+                    if attempt == attempts:
+                        if stage_metrics is not None:
+                            stage_metrics[stage["name"]] = dict(failed_metrics, attempts=attempt) if attempts > 1 else failed_metrics
+                        raise
+                    failed_seconds += failed_metrics.get("wall_seconds", 0.0)
+                    print(f"[{stage['name']}] Tentativa {attempt} de {attempts} falhou: {e}. Tentando de novo.", flush=True)
+            if stage_metrics is not None:
+                if attempts > 1:
+                    # O tempo inclui as tentativas que falharam
+                    stage_result["wall_seconds"] = round(stage_result["wall_seconds"] + failed_seconds, 3)
+                    stage_result["attempts"] = attempt
+                stage_metrics[stage["name"]] = stage_result
+            if not checkpoint and stage.get("checkpoint_outputs"):
+                unsaved.add(stage["name"])
+            elif manifest is not None:
+                stage_cache.record_stage(manifest, stage)
+                stage_cache.save_manifest(manifest)
+            print(f"Etapa concluída: {stage['description']}.", flush=True)
+
+    for stage in stages:
+        tasks[stage["name"]] = asyncio.create_task(run_stage(stage))
+
+    results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+    return {
+        name: result
+        for name, result in zip(tasks, results)
+        if isinstance(result, BaseException)
+    }
 
 def setup_directories():
     """Cria a estrutura de diretórios necessária."""
@@ -34,21 +561,70 @@ def setup_directories():
     merged_lists_dir = os.path.join(base_data_dir, "listas_mescladas")
     categorized_lists_dir = os.path.join(merged_lists_dir, "categorized_by_type_and_brand")
 
-    # Remover diretórios existentes para garantir um início limpo
-    if os.path.exists(raw_lists_dir):
-        shutil.rmtree(raw_lists_dir)
-    if os.path.exists(merged_lists_dir):
-        shutil.rmtree(merged_lists_dir)
-
+    # Os dados existentes são mantidos: o cache de estágios decide o que precisa ser refeito
     os.makedirs(raw_lists_dir, exist_ok=True)
     os.makedirs(merged_lists_dir, exist_ok=True)
     os.makedirs(categorized_lists_dir, exist_ok=True) # categorized_by_type_and_brand é criado aqui
     print("Diretórios configurados.")
 
 
-def run_full_pipeline():
+# Alternativa ao scrape_json_ld em JavaScript (--python-scraper): baixa as páginas
+# da listagem direto por HTTP, sem navegador, e grava a mesma lista_json_ld.json
+PYTHON_SCRAPE_JSON_LD_STAGE = {
+    "name": "scrape_json_ld",
+    "description": "scraping JSON-LD (HTTP, sem navegador)",
+    "command": "python3 python/scrape_json_ld.py",
+    "depends_on": [],
+    "inputs": [],
+    "code": ["python/scrape_json_ld.py", "python/http_client.py", "python/scrape_checkpoint.py", "python/metrics.py"],
+    "outputs": ["data/listas_brutas/lista_json_ld.json"],
+    "page_checkpoint": scrape_checkpoint.checkpoint_dir("lista_json_ld"),
+    "attempts": SCRAPE_ATTEMPTS,
+    "max_age_seconds": SCRAPE_MAX_AGE_SECONDS,
+}
+
+def pipeline_stages(python_scraper=False, scrape_max_age=None):
+    """
+    Estágios da pipeline, com o scraper de JSON-LD em Python no lugar do em
+    JavaScript se `python_scraper`. `scrape_max_age` (segundos) substitui a
+    validade dos estágios de scraping no cache (SCRAPE_MAX_AGE_SECONDS).
+    """
+    stages = PIPELINE_STAGES
+    if python_scraper:
+        stages = [PYTHON_SCRAPE_JSON_LD_STAGE if stage["name"] == "scrape_json_ld" else stage for stage in stages]
+    if scrape_max_age is not None:
+        stages = [dict(stage, max_age_seconds=scrape_max_age) if "max_age_seconds" in stage else stage for stage in stages]
+    return stages
+
+def write_run_metrics(started_at, stage_metrics):
+    """Grava as métricas da execução em metrics.json e no textfile do Prometheus."""
+    run_metrics = {"started_at": round(started_at, 3), "stages": stage_metrics}
+    metrics.write_metrics_json(METRICS_JSON_PATH, run_metrics)
+    metrics.write_prometheus_textfile(METRICS_PROMETHEUS_PATH, run_metrics)
+    print(f"Métricas salvas em '{METRICS_JSON_PATH}' e '{METRICS_PROMETHEUS_PATH}'")
+
+def run_full_pipeline(max_concurrency=DEFAULT_MAX_CONCURRENCY, from_stage=None, force=False, profile=False, checkpoint=True,
+                      python_scraper=False, scrape_max_age=None):
     """
     Orquestra a execução de todos os scripts de scraping, mesclagem e categorização.
+    Os scrapers rodam em paralelo e a mesclagem começa assim que todos terminam.
+    Estágios sem alterações nas entradas e no código são pulados; os scrapers
+    só são pulados se o último scraping tiver menos de SCRAPE_MAX_AGE_SECONDS.
+
+    Args:
+        max_concurrency (int): Número máximo de estágios executados em paralelo.
+        from_stage (str): Reexecuta este estágio e todos os que dependem dele.
+        force (bool): Reexecuta todos os estágios, ignorando o cache.
+        profile (bool): Grava perfis cProfile dos estágios Python em data/profiles.
+        checkpoint (bool): Se False, a lista mesclada passa da mesclagem para a
+            categorização só em memória, sem ser gravada em disco.
+        python_scraper (bool): Usa o scraper de JSON-LD em Python (scrape_json_ld.py)
+            em vez do em JavaScript.
+        scrape_max_age (float): Validade do último scraping em segundos (padrão:
+            SCRAPE_MAX_AGE_SECONDS; 0 refaz o scraping em toda execução).
+
+    As métricas de cada estágio (tempo, CPU, pico de memória e contagens) são
+    salvas em data/metrics.json e data/metrics.prom ao final, mesmo se algum estágio falhar.
     """
     print("Iniciando a pipeline completa de scraping e processamento...")
 
@@ -56,27 +632,25 @@ def run_full_pipeline():
         # Configurar diretórios
         setup_directories()
 
-        # --- 1. Executar o scraping JSON-LD (JavaScript) ---
-        print("\n--- Executando scraping JSON-LD ---")
-        # O comando é executado a partir da raiz do projeto, então o caminho para o script é 'js/scrape_json_ld_only.js'
-        run_command("node js/scrape_json_ld_only.js")
-        print("Scraping JSON-LD concluído.")
-
-        # --- 2. Executar o scraping HTML (JavaScript) ---
-        print("\n--- Executando scraping HTML ---")
-        run_command("node js/scrape_html_only.js")
-        print("Scraping HTML concluído.")
-
-        # --- 3. Executar a mesclagem das listas (Python) ---
-        print("\n--- Executando mesclagem das listas ---")
-        # O comando é executado a partir da raiz do projeto, então o caminho para o script é 'python/merge_lists.py'
-        run_command("python3 python/merge_lists.py")
-        print("Mesclagem de listas concluída.")
-
-        # --- 4. Executar a categorização das listas (Python) ---
-        print("\n--- Executando categorização das listas ---")
-        run_command("python3 python/categorize_products.py")
-        print("Categorização de listas concluída.")
+        stages = pipeline_stages(python_scraper, scrape_max_age)
+        forced = stages_to_force(stages, from_stage=from_stage, force=force)
+        manifest = stage_cache.load_manifest()
+        stage_metrics = {}
+        started_at = time.time()
+        failures = asyncio.run(run_stages(
+            stages,
+            max_concurrency=max_concurrency,
+            manifest=manifest,
+            forced=forced,
+            stage_metrics=stage_metrics,
+            profile_dir=PROFILE_DIR if profile else None,
+            checkpoint=checkpoint,
+        ))
+        write_run_metrics(started_at, {stage["name"]: stage_metrics.get(stage["name"], {"status": "skipped"}) for stage in stages})
+        if failures:
+            for stage_name, error in failures.items():
+                print(f"Estágio '{stage_name}' não concluído: {error}")
+            raise RuntimeError(f"{len(failures)} estágio(s) não concluído(s)")
 
         print("\nPipeline completa executada com sucesso!")
         print("Seus arquivos categorizados estão em: data/listas_mescladas/categorized_by_type_and_brand/")
@@ -85,5 +659,73 @@ def run_full_pipeline():
         print(f"\nPipeline falhou devido a um erro: {e}")
 
 if __name__ == "__main__":
-    run_full_pipeline()
-
+    parser = argparse.ArgumentParser(description="Executa a pipeline de scraping, mesclagem e categorização.")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=["pipeline", "serve"],
+        default="pipeline",
+        help="pipeline (padrão) executa a pipeline; serve atende consultas ao catálogo publicado (ver catalog_service.py).",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=DEFAULT_MAX_CONCURRENCY,
+        help=f"Número máximo de estágios executados em paralelo (padrão: {DEFAULT_MAX_CONCURRENCY}).",
+    )
+    parser.add_argument(
+        "--from-stage",
+        choices=[stage["name"] for stage in PIPELINE_STAGES],
+        help="Reexecuta este estágio e todos os que dependem dele, mesmo sem alterações.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Ignora o cache e reexecuta todos os estágios (inclusive um novo scraping).",
+    )
+    parser.add_argument(
+        "--scrape-max-age",
+        type=float,
+        default=SCRAPE_MAX_AGE_SECONDS / 3600,
+        help=f"Refaz o scraping se o último tiver mais que estas horas (padrão: {SCRAPE_MAX_AGE_SECONDS / 3600:g}; 0 = sempre).",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Executa os estágios Python com cProfile e salva as estatísticas em data/profiles.",
+    )
+    parser.add_argument(
+        "--no-checkpoint",
+        action="store_true",
+        help="Não grava lista_final_mesclada.json nem alteracoes.json: a mesclagem passa os produtos direto para a categorização.",
+    )
+    parser.add_argument(
+        "--python-scraper",
+        action="store_true",
+        help="Faz o scraping do JSON-LD com python/scrape_json_ld.py (HTTP direto, sem navegador) em vez do Puppeteer.",
+    )
+    parser.add_argument(
+        "--host",
+        default=catalog_service.DEFAULT_HOST,
+        help=f"Endereço do serviço do catálogo no modo serve (padrão: {catalog_service.DEFAULT_HOST}).",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=catalog_service.DEFAULT_PORT,
+        help=f"Porta do serviço do catálogo no modo serve (padrão: {catalog_service.DEFAULT_PORT}).",
+    )
+    args = parser.parse_args()
+    if args.command == "serve":
+        try:
+            asyncio.run(catalog_service.serve(catalog_service.DEFAULT_STRUCTURED_DIR, args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+    else:
+        if args.max_concurrency < 1:
+            parser.error("--max-concurrency deve ser pelo menos 1")
+        if args.scrape_max_age < 0:
+            parser.error("--scrape-max-age não pode ser negativo")
+        run_full_pipeline(max_concurrency=args.max_concurrency, from_stage=args.from_stage, force=args.force, profile=args.profile,
+                          checkpoint=not args.no_checkpoint, python_scraper=args.python_scraper,
+                          scrape_max_age=args.scrape_max_age * 3600)
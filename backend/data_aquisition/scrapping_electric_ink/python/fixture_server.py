@@ -0,0 +1,248 @@
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import http_client
+import scrape_json_ld
+
+# Servidor HTTP local com páginas gravadas da listagem, para testar o
+# scrape_json_ld.py (velocidade e resultado) sem acesso à rede.
+#
+#   record      grava as páginas reais da listagem em <dir>/<caminho>_page_N.html
+#   synthesize  gera páginas no mesmo formato (JSON-LD ItemList de Products)
+#               a partir de uma lista_json_ld.json já existente
+#   serve       serve <dir> em http://127.0.0.1:<porta>/<caminho>?page=N
+#               (keep-alive, com atraso e falhas 503 opcionais)
+#
+# Ex.: python3 python/fixture_server.py synthesize
+#      python3 python/fixture_server.py serve --delay 0.2 --fail-every 3 &
+#      python3 python/scrape_json_ld.py --url http://127.0.0.1:8765/tatuagem --output /tmp/lista_json_ld.json
+
+FIXTURES_DIR = "./data/fixtures/json_ld"
+DEFAULT_PORT = 8765
+PRODUCTS_PER_PAGE = 24
+
+_PAGE_FILE = re.compile(r'^(.+)_page_(\d+)\.html$')
+
+# Descrição dos produtos gerados por `synthesize`, com um termo que leva o
+# scraper ao mesmo materialType da lista de origem (a lista não guarda a descrição)
+SYNTHETIC_DESCRIPTIONS = {
+    "Batoques": "Batoque descartável",
+    "Agulhas e Cartuchos": "Cartucho de agulhas",
+    "Tintas": "Tinta para tatuagem",
+    "Luvas": "Luva descartável",
+    "Materiais de Barreira": "Filme de proteção",
+    "Biossegurança e Higiene": "Produto de higiene",
+    "Cremes e Pós-Tatuagem": "Cuidados pós-tattoo",
+    "Máquinas": "Máquina de tatuagem",
+    "Fontes e Cabos": "Fonte e cabo",
+}
+
+def fixture_filename(listing_path, page):
+    """Nome do arquivo de uma página: "/tatuagem", 2 -> "tatuagem_page_2.html"."""
+    return f"{listing_path.strip('/').replace('/', '_') or 'index'}_page_{page}.html"
+
+async def record(listing_url=scrape_json_ld.LISTING_URL, fixtures_dir=FIXTURES_DIR, max_pages=scrape_json_ld.DEFAULT_MAX_PAGES):
+    """
+    Grava as páginas da listagem até a primeira sem produtos.
+
+    Returns:
+        int: Número de páginas gravadas.
+    """
+    os.makedirs(fixtures_dir, exist_ok=True)
+    listing_path = urlsplit(listing_url).path
+    async with http_client.ConnectionPool(max_connections=1) as pool:
+        for page in range(1, max_pages + 1):
+            status, html = await scrape_json_ld.fetch_with_retry(pool, scrape_json_ld.page_url(listing_url, page))
+            if status != 200 or not scrape_json_ld.parse_listing_page(html):
+                return page - 1
+            with open(os.path.join(fixtures_dir, fixture_filename(listing_path, page)), 'w', encoding='utf-8') as f:
+                f.write(html)
+            print(f"Página {page} gravada.", flush=True)
+    print(f"Aviso: limite de {max_pages} página(s) atingido; a listagem pode ter mais páginas.", flush=True)
+    return max_pages
+
+def _price_value(price):
+    # "R$ 45,90" -> 45.9 (número, como no JSON-LD da loja)
+    text = price.replace('R$ ', '')
+    try:
+        return float(text.replace(',', '.', 1))
+    except ValueError:
+        return text
+
+def synthetic_product(record):
+    """
+    Product do JSON-LD que o scraper converte de volta em `record`
+    (mesmos nome, opções, preços e materialType). Sem variantes gravadas, a oferta i
+    recebe a i-ésima opção e o i-ésimo preço.
+    """
+    skus = record.get("availableOptions") or []
+    prices = record.get("availablePrice") or []
+    if record.get("variants"):
+        offers = [{"sku": variant["sku"], "price": _price_value(variant["price"]) if variant.get("price") else None,
+                   "name": variant.get("name")} for variant in record["variants"]]
+    else:
+        offers = [
+            {"sku": skus[i] if i < len(skus) else None, "price": _price_value(prices[i % len(prices)]) if prices else None}
+            for i in range(max(len(skus), len(prices)))
+        ]
+    offers = [{key: value for key, value in offer.items() if value is not None} for offer in offers]
+    product = {"@type": "Product", "name": record["name"], "offers": {"@type": "AggregateOffer", "offers": offers}}
+    if "electric ink" in record["name"].lower():
+        # Produtos da marca própria da loja (o scraper não classifica "ink" desses como Tintas)
+        product["brand"] = {"@type": "Brand", "name": "Electric Ink"}
+    if record.get("materialType") in SYNTHETIC_DESCRIPTIONS:
+        product["description"] = SYNTHETIC_DESCRIPTIONS[record["materialType"]]
+    return product
+
+def _script_json(data):
+    # "</" dentro do JSON encerraria o <script> antes da hora
+    return json.dumps(data, ensure_ascii=False).replace("</", "<\\/")
+
+def render_page(products):
+    """HTML de uma página da listagem com o ItemList no JSON-LD."""
+    item_list = {
+        "@context": "https://schema.org",
+        "@type": "ItemList",
+        "itemListElement": [{"@type": "ListItem", "position": i + 1, "item": product} for i, product in enumerate(products)],
+    }
+    breadcrumb = {"@context": "https://schema.org", "@type": "BreadcrumbList", "itemListElement": []}
+    scripts = "\n".join(f'<script type="application/ld+json">{_script_json(data)}</script>' for data in (breadcrumb, item_list))
+    return f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">\n{scripts}\n</head><body></body></html>\n"
+
+def synthesize(input_file=scrape_json_ld.OUTPUT_FILE, fixtures_dir=FIXTURES_DIR, listing_path="/tatuagem", per_page=PRODUCTS_PER_PAGE):
+    """
+    Gera as páginas da listagem a partir de uma lista_json_ld.json (sem rede).
+
+    Returns:
+        int: Número de páginas geradas.
+    """
+    with open(input_file, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+    os.makedirs(fixtures_dir, exist_ok=True)
+    for filename in os.listdir(fixtures_dir):
+        if _PAGE_FILE.match(filename):
+            os.remove(os.path.join(fixtures_dir, filename))
+    pages = 0
+    for start in range(0, len(records), per_page):
+        pages += 1
+        html = render_page([synthetic_product(record) for record in records[start:start + per_page]])
+        with open(os.path.join(fixtures_dir, fixture_filename(listing_path, pages)), 'w', encoding='utf-8') as f:
+            f.write(html)
+    return pages
+
+def _response(status, body, content_type="text/html; charset=utf-8", extra_headers=None):
+    reason = {200: "OK", 404: "Not Found", 405: "Method Not Allowed", 503: "Service Unavailable"}[status]
+    headers = {"Content-Type": content_type, "Content-Length": str(len(body)), **(extra_headers or {})}
+    head = f"HTTP/1.1 {status} {reason}\r\n" + "".join(f"{name}: {value}\r\n" for name, value in headers.items()) + "\r\n"
+    return head.encode("latin-1") + body
+
+async def start_server(fixtures_dir=FIXTURES_DIR, host="127.0.0.1", port=DEFAULT_PORT, delay=0.0, fail_every=0, fail_times=1):
+    """
+    Inicia o servidor das páginas gravadas (ver `serve`) sem bloquear; com
+    port=0 o sistema escolhe uma porta livre (server.sockets[0].getsockname()).
+
+    Returns:
+        asyncio.Server: Servidor já aceitando conexões.
+    """
+    attempts = {}
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                connection_header = ""
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    if name.strip().lower() == "connection":
+                        connection_header = value.strip().lower()
+
+                method, target, _ = request_line.decode("latin-1").split(None, 2)
+                if delay:
+                    await asyncio.sleep(delay)
+                parts = urlsplit(target)
+                page = int(parse_qs(parts.query).get("page", ["1"])[0])
+                path = os.path.join(fixtures_dir, fixture_filename(parts.path, page))
+                attempts[target] = attempts.get(target, 0) + 1
+
+                if method != "GET":
+                    response = _response(405, b"")
+                elif fail_every and page % fail_every == 0 and attempts[target] <= fail_times:
+                    response = _response(503, b"", extra_headers={"Retry-After": "0"})
+                elif os.path.exists(path):
+                    with open(path, 'rb') as f:
+                        response = _response(200, f.read())
+                else:
+                    response = _response(404, b"")
+                writer.write(response)
+                await writer.drain()
+                if connection_header == "close":
+                    break
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+async def serve(fixtures_dir=FIXTURES_DIR, host="127.0.0.1", port=DEFAULT_PORT, delay=0.0, fail_every=0, fail_times=1):
+    """
+    Serve as páginas gravadas até ser interrompido. `/<caminho>?page=N` devolve
+    <caminho>_page_N.html (sem ?page, a página 1) e páginas inexistentes devolvem 404.
+
+    Args:
+        delay (float): Espera, em segundos, antes de cada resposta (simula a latência da loja).
+        fail_every (int): Se > 0, as primeiras `fail_times` requisições de cada página
+            múltipla de `fail_every` recebem 503 (testa as novas tentativas do scraper e,
+            com `fail_times` acima das tentativas dele, a retomada pelo checkpoint).
+    """
+    server = await start_server(fixtures_dir, host, port, delay, fail_every, fail_times)
+    print(f"Servindo {fixtures_dir} em http://{host}:{port}/ (Ctrl+C para parar)", flush=True)
+    async with server:
+        await server.serve_forever()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Páginas gravadas da listagem para testar o scraper em Python sem rede.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="Grava as páginas reais da listagem.")
+    record_parser.add_argument("--url", default=scrape_json_ld.LISTING_URL, help=f"URL da listagem (padrão: {scrape_json_ld.LISTING_URL}).")
+    record_parser.add_argument("--dir", default=FIXTURES_DIR, help=f"Diretório das páginas (padrão: {FIXTURES_DIR}).")
+
+    synthesize_parser = subparsers.add_parser("synthesize", help="Gera as páginas a partir de uma lista_json_ld.json.")
+    synthesize_parser.add_argument("--input", default=scrape_json_ld.OUTPUT_FILE, help=f"Lista de origem (padrão: {scrape_json_ld.OUTPUT_FILE}).")
+    synthesize_parser.add_argument("--dir", default=FIXTURES_DIR, help=f"Diretório das páginas (padrão: {FIXTURES_DIR}).")
+    synthesize_parser.add_argument("--per-page", type=int, default=PRODUCTS_PER_PAGE,
+                                   help=f"Produtos por página (padrão: {PRODUCTS_PER_PAGE}).")
+
+    serve_parser = subparsers.add_parser("serve", help="Serve as páginas gravadas.")
+    serve_parser.add_argument("--dir", default=FIXTURES_DIR, help=f"Diretório das páginas (padrão: {FIXTURES_DIR}).")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Porta (padrão: {DEFAULT_PORT}).")
+    serve_parser.add_argument("--delay", type=float, default=0.0, help="Atraso de cada resposta em segundos (padrão: 0).")
+    serve_parser.add_argument("--fail-every", type=int, default=0,
+                              help="Responde 503 nas primeiras requisições das páginas múltiplas deste número (padrão: 0, nunca).")
+    serve_parser.add_argument("--fail-times", type=int, default=1,
+                              help="Quantas requisições de cada uma dessas páginas falham (padrão: 1).")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        started = time.perf_counter()
+        pages = asyncio.run(record(args.url, args.dir))
+        print(f"{pages} página(s) gravada(s) em {args.dir} ({time.perf_counter() - started:.1f}s).")
+    elif args.command == "synthesize":
+        pages = synthesize(args.input, args.dir, per_page=args.per_page)
+        print(f"{pages} página(s) geradas em {args.dir} a partir de {args.input}.")
+    else:
+        try:
+            asyncio.run(serve(args.dir, port=args.port, delay=args.delay, fail_every=args.fail_every, fail_times=args.fail_times))
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,181 @@
+import asyncio
+import gzip
+import ssl
+import zlib
+from urllib.parse import urljoin, urlsplit
+
+# Cliente HTTP/1.1 assíncrono mínimo (só biblioteca padrão) usado pelos
+# scrapers em Python: mantém as conexões abertas (keep-alive) e as reaproveita
+# entre requisições ao mesmo host, com um limite de conexões simultâneas.
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) NeedleDrop/1.0"
+DEFAULT_TIMEOUT = 30
+MAX_REDIRECTS = 5
+
+class HTTPError(Exception):
+    """Resposta HTTP inválida ou conexão encerrada no meio da resposta."""
+
+class ConnectionPool:
+    """
+    Pool de conexões HTTP/1.1 com keep-alive.
+
+    Args:
+        max_connections (int): Conexões abertas ao mesmo tempo (todas as origens).
+        timeout (float): Tempo máximo, em segundos, de cada requisição.
+        user_agent (str): Cabeçalho User-Agent enviado.
+
+    Uso:
+        async with ConnectionPool(max_connections=8) as pool:
+            status, headers, body = await pool.get("https://exemplo.com/pagina")
+    """
+
+    def __init__(self, max_connections=8, timeout=DEFAULT_TIMEOUT, user_agent=DEFAULT_USER_AGENT):
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self._slots = asyncio.Semaphore(max_connections)
+        self._idle = {}
+        self._ssl_context = ssl.create_default_context()
+        # Contagens para as métricas do estágio
+        self.stats = {"requests": 0, "connections_opened": 0, "connections_reused": 0}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Fecha as conexões ociosas."""
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+    async def _open(self, origin):
+        scheme, host, port = origin
+        self.stats["connections_opened"] += 1
+        return await asyncio.open_connection(
+            host, port, ssl=self._ssl_context if scheme == "https" else None,
+            server_hostname=host if scheme == "https" else None,
+        )
+
+    async def get(self, url, headers=None):
+        """
+        Faz um GET seguindo redirecionamentos.
+
+        Returns:
+            tuple: (status, cabeçalhos com nomes em minúsculas, corpo já descomprimido)
+
+        Raises:
+            HTTPError, OSError, asyncio.TimeoutError: se a requisição não puder ser concluída.
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            status, response_headers, body = await asyncio.wait_for(self._request(url, headers or {}), self.timeout)
+            if status in (301, 302, 303, 307, 308) and "location" in response_headers:
+                url = urljoin(url, response_headers["location"])
+                continue
+            return status, response_headers, body
+        raise HTTPError(f"Redirecionamentos demais a partir de {url}")
+
+    async def _request(self, url, headers):
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        origin = (scheme, parts.hostname, parts.port or (443 if scheme == "https" else 80))
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+        host_header = parts.hostname if parts.port is None else f"{parts.hostname}:{parts.port}"
+        request_headers = {
+            "Host": host_header,
+            "User-Agent": self.user_agent,
+            "Accept": "text/html,application/json;q=0.9,*/*;q=0.8",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+            **headers,
+        }
+        request = f"GET {target} HTTP/1.1\r\n" + "".join(f"{name}: {value}\r\n" for name, value in request_headers.items()) + "\r\n"
+
+        async with self._slots:
+            self.stats["requests"] += 1
+            idle = self._idle.setdefault(origin, [])
+            while idle:
+                reader, writer = idle.pop()
+                try:
+                    # Uma conexão ociosa pode ter sido fechada pelo servidor: tenta uma nova
+                    result = await self._exchange(reader, writer, request)
+                except (OSError, HTTPError, asyncio.IncompleteReadError):
+                    writer.close()
+                    continue
+                except BaseException:
+                    writer.close()
+                    raise
+                self.stats["connections_reused"] += 1
+                return self._finish(origin, reader, writer, result)
+
+            reader, writer = await self._open(origin)
+            try:
+                result = await self._exchange(reader, writer, request)
+            except BaseException:
+                writer.close()
+                raise
+            return self._finish(origin, reader, writer, result)
+
+    def _finish(self, origin, reader, writer, result):
+        status, response_headers, body, reusable = result
+        if reusable:
+            self._idle[origin].append((reader, writer))
+        else:
+            writer.close()
+        return status, response_headers, _decode_body(body, response_headers.get("content-encoding"))
+
+    async def _exchange(self, reader, writer, request):
+        writer.write(request.encode("latin-1"))
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise HTTPError("Conexão encerrada sem resposta")
+        parts = status_line.decode("latin-1").split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+            raise HTTPError(f"Linha de status inválida: {status_line!r}")
+        status = int(parts[1])
+
+        response_headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        reusable = response_headers.get("connection", "").lower() != "close" and parts[0] != "HTTP/1.0"
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            body = await _read_chunked(reader)
+        elif "content-length" in response_headers:
+            body = await reader.readexactly(int(response_headers["content-length"]))
+        elif status in (204, 304) or 100 <= status < 200:
+            body = b""
+        else:
+            body = await reader.read()
+            reusable = False
+        return status, response_headers, body, reusable
+
+async def _read_chunked(reader):
+    chunks = []
+    while True:
+        size_line = await reader.readline()
+        size = int(size_line.split(b";")[0].strip() or b"0", 16)
+        if size == 0:
+            # Cabeçalhos finais (trailers) até a linha em branco
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            return b"".join(chunks)
+        chunks.append(await reader.readexactly(size))
+        await reader.readexactly(2)
+
+def _decode_body(body, encoding):
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "deflate":
+        return zlib.decompress(body)
+    return body
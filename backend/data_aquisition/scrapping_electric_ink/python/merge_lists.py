@@ -1,173 +1,326 @@
+import argparse
 import json
 import os
 
-def merge_product_lists(json_ld_input, html_input, cosmeticos_input, output_file):
+import catalog_delta
+import catalog_io
+import metrics
+import name_index
+import price_history
+import sku_index
+import sources
+from model import Product, cents_from_strings, intern_text, variants_from_labels
+
+# Relatório da junção entre as fontes (JSON-LD x HTML), salvo no mesmo diretório da lista mesclada
+JOIN_REPORT_FILENAME = "relatorio_juncao.json"
+
+def load_products(path, stream=False):
     """
-    Mescla três listas de produtos (JSON-LD, HTML e Cosméticos) priorizando
-    dados específicos de cada fonte.
+    Carrega os produtos de um arquivo. Com `stream=True` (ou arquivos .jsonl)
+    retorna um iterador que lê um produto por vez em vez da lista inteira.
+    """
+    if stream or catalog_io.is_jsonl(path):
+        return catalog_io.iter_products(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _material_type(record, source):
+    return record.get('materialType', source["default_material_type"])
+
+def _new_product(record, source):
+    """Cria o produto a partir de um registro sem par, com os campos `add_fields` e as regras de marca da fonte."""
+    product_name = record['name'].strip()
+    add_fields = source["add_fields"]
+    material_type = _material_type(record, source)
+    rule = sources.match_brand_rule(product_name, source["brand_rules"])
+    if rule is not None:
+        brand = rule["brand"]
+        material_type = rule.get("material_type", material_type)  # Sobrescreve qualquer valor anterior
+    elif "brand" in add_fields:
+        brand = record.get('brand', source["default_brand"])
+    else:
+        brand = source["default_brand"]
+    return Product.create(
+        product_name, brand, material_type,
+        record.get('availableOptions', []) if "options" in add_fields else (),
+        record.get('availablePrice', []) if "prices" in add_fields else (),
+    )
+
+def _apply_match_fields(product, record, source):
+    """Copia para o produto existente os campos da fonte, conforme a precedência de `match_fields`."""
+    for field, policy in source["match_fields"].items():
+        if field == "options":
+            if policy == "overwrite" or (not product.variants and record.get('availableOptions')):
+                product.variants = variants_from_labels(record.get('availableOptions', []))
+        elif field == "prices":
+            if policy == "overwrite" or (not product.prices_cents and record.get('availablePrice')):
+                product.prices_cents = cents_from_strings(record.get('availablePrice', []))
+        elif field == "material_type":
+            if policy == "overwrite" or not product.material_type:
+                product.material_type = intern_text(_material_type(record, source))
+        elif field == "brand":
+            if policy == "overwrite" or not product.brand:
+                product.brand = intern_text(record.get('brand', source["default_brand"]))
+
+def merge_product_lists(source_lists):
+    """
+    Mescla as listas de produtos das fontes do registro (ver sources.SOURCES)
+    em uma única passada. Não lê nem grava arquivos: veja `merge_files` para a
+    versão que parte das listas em disco.
+
+    As fontes são processadas na ordem da lista. Os registros de cada fonte
+    se juntam aos produtos das fontes anteriores por um índice de nomes
+    (name_index) que cresce à medida que os produtos são acrescentados: primeiro
+    o nome exato ou a chave normalizada e, nas fontes com junção "fuzzy", uma
+    junção aproximada com os produtos que a fonte ainda não juntou. Cada
+    registro é consultado uma única vez, então o tempo cresce com o total de
+    registros e não com fontes x registros.
 
     Args:
-        json_ld_input (str): Caminho para o arquivo JSON gerado pelo scraping JSON-LD.
-        html_input (str): Caminho para o arquivo JSON gerado pelo scraping HTML.
-        cosmeticos_input (str): Caminho para o arquivo JSON de cosméticos.
-        output_file (str): Caminho para o arquivo JSON de saída mesclado.
+        source_lists (list): Pares (fonte, registros). Os registros podem ser
+            iteradores (modo streaming): cada lista é percorrida uma única vez.
+
+    Returns:
+        dict: products (model.Product, ordenados por nome), join_report (pares
+              com método e confiança e nomes sem par), sku_index (ver
+              sku_index.build_sku_index) e counts (contagens para as métricas).
+    """
+    # Produtos mesclados (model.Product), indexados pelo nome com que foram acrescentados
+    products_map = {}
+    # Ofertas (SKU e preço) dos produtos das fontes com ofertas, para o índice de variantes por SKU
+    offers_by_product = {}
+    # Índice de junção exata/normalizada de todos os produtos já mesclados
+    merged_index = name_index.build_name_index((), fuzzy=False)
+    # Fonte que acrescentou cada produto e pares registrados no relatório de junção
+    origin = {}
+    join_pairs = {}
+    unmatched = {}
+    counts = {}
+
+    for source, records in source_lists:
+        name = source["name"]
+        joined_names = set()
+        pending = []
+        added = []
+        read = merged = 0
+
+        def apply_match(record, match):
+            nonlocal merged
+            product_name = record['name'].strip()
+            target_name, method, confidence = match
+            _apply_match_fields(products_map[target_name], record, source)
+            joined_names.add(target_name)
+            merged += 1
+            if source["join_report"]:
+                join_pairs[(name, target_name, product_name)] = {
+                    f"{origin[target_name]}_name": target_name,
+                    f"{name}_name": product_name,
+                    "method": method,
+                    "confidence": confidence
+                }
+            if method == "exact":
+                print(f"Mesclado: '{product_name}' ({source['label']})")
+            else:
+                print(f"Mesclado: '{product_name}' -> '{target_name}' ({source['label']}, junção {method}, confiança {confidence})")
+
+        # 1. Junção exata/normalizada com os produtos das fontes anteriores
+        for record in records:
+            read += 1
+            match = name_index.lookup(merged_index, record['name'].strip()) if source["join"] else None
+            if match:
+                apply_match(record, match)
+            else:
+                pending.append(record)
+
+        # 2. Junção aproximada só com os produtos anteriores que esta fonte ainda não juntou
+        if source["join"] == "fuzzy" and pending:
+            fuzzy_index = name_index.build_name_index(product_name for product_name in products_map if product_name not in joined_names)
+            still_pending = []
+            for record in pending:
+                match = name_index.lookup(fuzzy_index, record['name'].strip(), fuzzy=True)
+                if match:
+                    name_index.remove(fuzzy_index, match[0])
+                    apply_match(record, match)
+                else:
+                    still_pending.append(record)
+            pending = still_pending
+
+        # 3. Registros sem par entram como novos produtos
+        for record in pending:
+            product = _new_product(record, source)
+            if product.name not in products_map:
+                added.append(product.name)
+                origin[product.name] = name
+            products_map[product.name] = product
+            if source["offers"]:
+                offers_by_product[product.name] = sku_index.json_ld_offers(record)
+            if source["join"]:
+                print(f"Adicionado: '{product.name}' (somente {source['label']})")
+
+        # Os novos produtos só passam a receber junções a partir da próxima fonte
+        for product_name in added:
+            name_index.add(merged_index, product_name)
+        if source["join_report"]:
+            unmatched[name] = sorted(set(added))
+
+        counts[name] = read
+        counts[f"{name}_merged"] = merged
+        counts[f"{name}_added"] = len(pending)
+        print(f"Produtos de {source['label']}: {read} lidos, {merged} mesclados, {len(pending)} adicionados")
+
+    # 4. Ordenar a lista final por nome para consistência
+    merged_products = sorted(products_map.values(), key=lambda x: x.name)
+
+    # Relatório de junção: pares das fontes com join_report e nomes sem par
+    # (os da fonte principal que nenhuma delas juntou e os de cada uma delas)
+    primary = source_lists[0][0]["name"] if source_lists else None
+    joined_targets = {target_name for _, target_name, _ in join_pairs}
+    join_report = {
+        "pairs": [pair for _, pair in sorted(join_pairs.items(), key=lambda item: (item[0][1], item[0][2], item[0][0]))],
+        f"unmatched_{primary}": sorted(
+            product_name for product_name, source_name in origin.items()
+            if source_name == primary and product_name not in joined_targets
+        ),
+    }
+    for name, names in unmatched.items():
+        join_report[f"unmatched_{name}"] = names
+    counts["joined"] = len(join_pairs)
+
+    # Índice de variantes por SKU (SKU da oferta -> rótulo da opção, preço e quantidade)
+    variant_index = sku_index.build_sku_index(
+        offers_by_product,
+        {product_name: products_map[product_name].option_labels for product_name in offers_by_product},
+    )
+    return {
+        "products": merged_products,
+        "join_report": join_report,
+        "sku_index": variant_index,
+        "counts": counts,
+    }
+
+def write_merge_outputs(result, output_file, checkpoint=True, registry=sources.SOURCES):
+    """
+    Grava os resultados de `merge_product_lists` ao lado de `output_file`.
+
+    - a lista mesclada (array JSON indentado ou JSON Lines, conforme a extensão)
+      e o log de alterações em relação à lista anterior ('alteracoes.json');
+      com `checkpoint=False` nenhum dos dois é gravado (a lista segue apenas em memória).
+      O SHA-256 da lista gravada fica em result["snapshot_sha256"]
+    - o índice de variantes por SKU ('variantes_sku.json')
+    - os preços desta execução, acrescentados ao histórico ('historico_precos', ver price_history)
+    - o relatório da junção JSON-LD x HTML ('relatorio_juncao.json'); o resumo
+      impresso cita os nomes sem par de cada fonte de `registry` que está no relatório
+
+    Returns:
+        dict: Contagens do resultado, com "added" e "removed" quando o log de alterações é gravado.
+    """
+    output_dir = os.path.dirname(output_file)
+    os.makedirs(output_dir or '.', exist_ok=True)
+    merged_products = result["products"]
+    counts = dict(result["counts"])
+
+    if checkpoint:
+        # Formato JSON da lista mesclada (os preços voltam a ser texto)
+        merged_records = [product.to_dict() for product in merged_products]
+
+        # Carregar a lista mesclada anterior (indexada por nome) antes de sobrescrevê-la
+        previous_snapshot = catalog_delta.load_snapshot(output_file)
+        previous_sha256 = catalog_io.hash_file(output_file)
+
+        total = catalog_io.write_products(output_file, merged_records)
+        print(f"Listas mescladas com sucesso em '{output_file}'. Total de produtos únicos: {total}")
+
+        # Log de alterações em relação à execução anterior. Os hashes das duas listas
+        # permitem à categorização --delta conferir se o log parte da lista que ela já aplicou
+        result["snapshot_sha256"] = catalog_io.hash_file(output_file)
+        changes = catalog_delta.diff_catalogs(previous_snapshot, merged_records, previous_sha256, result["snapshot_sha256"])
+        changelog_file = os.path.join(output_dir, catalog_delta.CHANGELOG_FILENAME)
+        with open(changelog_file, 'w', encoding='utf-8') as f:
+            json.dump(changes, f, indent=2, ensure_ascii=False)
+        print(f"Log de alterações salvo em '{changelog_file}': {catalog_delta.summarize(changes)}")
+        counts["added"] = len(changes["added"])
+        counts["removed"] = len(changes["removed"])
+    else:
+        print(f"Listas mescladas com sucesso (sem checkpoint em disco). Total de produtos únicos: {len(merged_products)}")
+
+    variant_index = result["sku_index"]
+    sku_index_file = os.path.join(output_dir, sku_index.SKU_INDEX_FILENAME)
+    sku_index.write_sku_index(sku_index_file, variant_index)
+    labeled = sum(1 for entry in variant_index.values() if entry["label"] is not None)
+    priced = sum(1 for entry in variant_index.values() if entry["price_cents"] is not None)
+    print(f"Índice de SKUs salvo em '{sku_index_file}'. SKUs: {len(variant_index)}, com rótulo: {labeled}, com preço: {priced}")
+
+    history_dir = os.path.join(output_dir, price_history.HISTORY_DIRNAME)
+    run = price_history.record_run(merged_products, history_dir, variant_prices=sku_index.priced_variants(variant_index))
+    print(f"Preços registrados no histórico '{history_dir}' (execução {run})")
+
+    join_report = result["join_report"]
+    report_file = os.path.join(output_dir, JOIN_REPORT_FILENAME)
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump(join_report, f, indent=2, ensure_ascii=False)
+
+    methods = {}
+    for pair in join_report["pairs"]:
+        methods[pair["method"]] = methods.get(pair["method"], 0) + 1
+    unmatched = []
+    for source in registry:
+        key = f"unmatched_{source['name']}"
+        if key in join_report:
+            unmatched.append(f"{len(join_report[key])} {source['label']}")
+    print(f"Relatório de junção salvo em '{report_file}'. Pares por método: {methods}. "
+          f"Sem par: {', '.join(unmatched) or 'nenhuma fonte no relatório'}")
+    return counts
+
+def merge_files(output_file, registry=sources.SOURCES, base_dir=None, stream=False, checkpoint=True):
+    """
+    Lê as listas das fontes do registro, mescla com `merge_product_lists` e
+    grava os resultados com `write_merge_outputs`.
+
+    Args:
+        output_file (str): Caminho para o arquivo de saída mesclado (.json ou .jsonl).
+        registry (list): Fontes a mesclar, em ordem de prioridade (ver sources.SOURCES).
+        base_dir (str): Diretório a partir do qual os caminhos das fontes são resolvidos.
+        stream (bool): Se True, as listas de entrada são lidas um produto por vez,
+            mantendo em memória apenas o mapa de produtos mesclados e o índice de junção.
+        checkpoint (bool): Se False, a lista mesclada não é gravada em disco.
+
+    Returns:
+        dict: Resultado de `merge_product_lists`, ou None se a mesclagem falhou.
     """
     print("Iniciando mesclagem das listas...")
 
     # 1. Verificar se os arquivos existem
-    if not os.path.exists(json_ld_input):
-        print(f"Erro: Arquivo '{json_ld_input}' não encontrado. Por favor, execute 'scrape_json_ld_only.js' primeiro.")
-        return
-    if not os.path.exists(html_input):
-        print(f"Erro: Arquivo '{html_input}' não encontrado. Por favor, execute 'scrape_html_only.js' primeiro.")
-        return
-    
-    cosmeticos_exists = os.path.exists(cosmeticos_input)
-    if not cosmeticos_exists:
-        print(f"Aviso: Arquivo de cosméticos '{cosmeticos_input}' não encontrado. Continuando sem dados de cosméticos.")
+    available = []
+    for source, path in zip(registry, sources.source_paths(registry, base_dir)):
+        if os.path.exists(path):
+            available.append((source, path))
+        elif source["required"]:
+            print(f"Erro: Arquivo '{path}' não encontrado. Por favor, execute '{source['producer']}' primeiro.")
+            return None
+        else:
+            print(f"Aviso: Arquivo de {source['label']} '{path}' não encontrado. Continuando sem esses dados.")
 
     try:
-        # 2. Ler as listas de entrada
-        with open(json_ld_input, 'r', encoding='utf-8') as f:
-            json_ld_products = json.load(f)
-        
-        with open(html_input, 'r', encoding='utf-8') as f:
-            html_products = json.load(f)
-            
-        # Carregar cosméticos se disponíveis
-        cosmeticos_products = []
-        if cosmeticos_exists:
+        # 2. Ler as listas de entrada (no modo streaming, apenas iteradores)
+        source_lists = []
+        for source, path in available:
             try:
-                with open(cosmeticos_input, 'r', encoding='utf-8') as f:
-                    cosmeticos_products = json.load(f)
-                print(f"Dados de cosméticos carregados: {len(cosmeticos_products)} produtos")
+                source_lists.append((source, load_products(path, stream)))
             except Exception as e:
-                print(f"Erro ao carregar dados de cosméticos: {e}")
-                cosmeticos_products = []
-
-        # Usaremos um dicionário para armazenar os produtos mesclados, usando o nome como chave
-        products_map = {}
-
-        # 3. Popular o mapa com os produtos da lista JSON-LD (prioridade para preços e tipo)
-        for prod in json_ld_products:
-            product_name = prod['name'].strip()
-            # Identificar marca com base no nome do produto
-            brand = ''
-            material_type = prod.get('materialType', 'Outros')
-            
-            # Regra 1: Se contém "EG", a marca é "Easy Glow"
-            if " EG" in product_name or product_name.endswith(" EG"):
-                brand = "Easy Glow"
-                material_type = "Tintas"  # Sobrescreve qualquer valor anterior
-            
-            # Regra 2: Se contém "INTZ", a marca é "Intenze" e o tipo é "Tintas"
-            elif "INTZ" in product_name:
-                brand = "Intenze"
-                material_type = "Tintas"  # Sobrescreve qualquer valor anterior
-            
-            # Regra 3: Se não tem marca específica, usa Electric Ink como padrão
-            else:
-                brand = "Electric Ink"
-                
-            products_map[product_name] = { 
-                'name': product_name,
-                'brand': brand,
-                'availableOptions': [],  # Inicializa vazio, será preenchido pelo HTML
-                'availablePrice': prod.get('availablePrice', []), 
-                'materialType': material_type
-            }
-        
-        print(f"Produtos carregados do JSON-LD: {len(products_map)}")
-
-        # 4. Iterar sobre os produtos da lista HTML para complementar as opções
-        for html_prod in html_products:
-            product_name = html_prod['name'].strip()
-            
-            if product_name in products_map:
-                # Produto encontrado no JSON-LD
-                products_map[product_name]['availableOptions'] = html_prod.get('availableOptions', [])
-                print(f"Mesclado: '{product_name}' (JSON-LD com opções HTML)")
-            else:
-                # Produto NÃO encontrado no JSON-LD: Adicionar o produto do HTML como fallback
-                material_type = html_prod.get('materialType', 'Outros')
-                
-                # Aplicar as mesmas regras de marca/tipo
-                brand = ''
-                
-                # Regra 1: Se contém "EG", a marca é "Easy Glow"
-                if " EG" in product_name or product_name.endswith(" EG"):
-                    brand = "Easy Glow"
-                    material_type = "Tintas"
-                
-                # Regra 2: Se contém "INTZ", a marca é "Intenze" e o tipo é "Tintas"
-                elif "INTZ" in product_name:
-                    brand = "Intenze"
-                    material_type = "Tintas"
-                
-                # Regra 3: Se não tem marca específica, usa Electric Ink como padrão
-                else:
-                    brand = "Electric Ink"
-                
-                products_map[product_name] = {
-                    'name': product_name,
-                    'brand': brand,
-                    'availableOptions': html_prod.get('availableOptions', []),
-                    'availablePrice': html_prod.get('availablePrice', []),
-                    'materialType': material_type
-                }
-                print(f"Adicionado como Fallback: '{product_name}' (Somente HTML)")
-                
-               # Substitua o bloco de processamento de cosméticos pelo seguinte:
-        
-        # 5. Adicionar produtos de cosméticos (se existirem)
-        if cosmeticos_products:
-            for cosm_prod in cosmeticos_products:
-                product_name = cosm_prod['name'].strip()
-                
-                # Obter o materialType do produto de cosméticos (já categorizado corretamente)
-                cosm_material_type = cosm_prod.get('materialType', 'Outros Cosméticos')
-                
-                # Se o produto já existe, mesclar informações
-                if product_name in products_map:
-                    existing = products_map[product_name]
-                    
-                    # Se não tem opções, usar as do cosmético
-                    if not existing['availableOptions'] and cosm_prod.get('availableOptions'):
-                        existing['availableOptions'] = cosm_prod.get('availableOptions')
-                    
-                    # Se não tem preços, usar os do cosmético
-                    if not existing['availablePrice'] and cosm_prod.get('availablePrice'):
-                        existing['availablePrice'] = cosm_prod.get('availablePrice')
-                    
-                    # Usar o materialType específico do arquivo de cosméticos
-                    existing['materialType'] = cosm_material_type
-                        
-                    print(f"Mesclado: '{product_name}' (existente com dados de cosméticos)")
-                else:
-                    # Produto não existe, adicionar como novo com seu materialType original
-                    products_map[product_name] = {
-                        'name': product_name,
-                        'brand': cosm_prod.get('brand', 'Electric Ink'),
-                        'availableOptions': cosm_prod.get('availableOptions', []),
-                        'availablePrice': cosm_prod.get('availablePrice', []),
-                        'materialType': cosm_material_type
-                    }
-                    print(f"Adicionado: '{product_name}' (produto de cosméticos)")
-
-        # 6. Converter o dicionário de volta para um Array
-        merged_products = list(products_map.values())
-
-        # 7. Ordenar a lista final por nome para consistência
-        merged_products.sort(key=lambda x: x['name'])
-
-        # 8. Criar diretório de saída se não existir
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
-
-        # 9. Salvar a lista mesclada em um novo arquivo JSON
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(merged_products, f, indent=2, ensure_ascii=False)
-        
-        print(f"Listas mescladas com sucesso em '{output_file}'. Total de produtos únicos: {len(merged_products)}")
+                if source["required"]:
+                    raise
+                print(f"Erro ao carregar dados de {source['label']}: {e}")
+
+        result = merge_product_lists(source_lists)
+        counts = write_merge_outputs(result, output_file, checkpoint=checkpoint, registry=registry)
+
+        # Contagens para as métricas da pipeline (ver engine.py)
+        metrics.report(
+            input_items=sum(counts.get(source["name"], 0) for source in registry),
+            output_items=len(result["products"]),
+            counts=counts,
+        )
+        return result
 
     except FileNotFoundError as e:
         print(f"Erro: Um dos arquivos não foi encontrado. Detalhes: {e}")
@@ -175,17 +328,22 @@ def merge_product_lists(json_ld_input, html_input, cosmeticos_input, output_file
         print(f"Erro: Problema ao decodificar um arquivo JSON. Verifique a formatação. Detalhes: {e}")
     except Exception as e:
         print(f"Ocorreu um erro inesperado durante a mesclagem: {e}")
+    return None
 
-# Nomes dos arquivos de entrada e saída
-json_ld_input = './data/listas_brutas/lista_json_ld.json'
-html_input = './data/listas_brutas/lista_html.json'
-cosmeticos_input = './data/listas_brutas/lista_cosmeticos.json'
-output_final = './data/listas_mescladas/lista_final_mesclada.json'
-
-# Garantir que os diretórios existam
-os.makedirs(os.path.dirname(json_ld_input), exist_ok=True)
-os.makedirs(os.path.dirname(output_final), exist_ok=True)
+# Caminhos padrão da lista mesclada (as listas de entrada estão em sources.SOURCES)
+MERGED_OUTPUT = './data/listas_mescladas/lista_final_mesclada.json'
+MERGED_OUTPUT_STREAM = './data/listas_mescladas/lista_final_mesclada.jsonl'
 
-# Chamar a função de mesclagem
-merge_product_lists(json_ld_input, html_input, cosmeticos_input, output_final)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mescla as listas de produtos das fontes registradas em sources.py (JSON-LD, HTML e cosméticos).")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Lê as listas um produto por vez e grava a saída em JSON Lines (lista_final_mesclada.jsonl).",
+    )
+    args = parser.parse_args()
 
+    # Chamar a função de mesclagem
+    result = merge_files(MERGED_OUTPUT_STREAM if args.stream else MERGED_OUTPUT, stream=args.stream)
+    if result is None:
+        raise SystemExit(1)
@@ -0,0 +1,201 @@
+import json
+import os
+import resource
+import shlex
+import subprocess
+import sys
+import threading
+from contextlib import contextmanager
+
+# Variável de ambiente com o arquivo onde o estágio em execução grava suas métricas.
+# O engine a define para cada estágio; fora da pipeline as métricas são ignoradas.
+METRICS_ENV = "PIPELINE_STAGE_METRICS"
+
+# Prefixo das métricas no arquivo textfile do Prometheus
+PROMETHEUS_PREFIX = "electric_ink_pipeline"
+
+# Coletor das métricas de um estágio executado no próprio processo do engine (ver collect)
+_local = threading.local()
+
+@contextmanager
+def collect():
+    """
+    Coleta em memória as métricas reportadas na thread atual, para estágios
+    executados no próprio processo do engine em vez de um subprocesso.
+
+    Yields:
+        dict: Preenchido pelas chamadas a `report` feitas dentro do bloco.
+    """
+    previous = getattr(_local, "values", None)
+    _local.values = {}
+    try:
+        yield _local.values
+    finally:
+        _local.values = previous
+
+def report(**values):
+    """
+    Registra contagens do estágio em execução (ex.: report(input_items=10, output_items=8)).
+    Chamadas sucessivas são acumuladas no mesmo arquivo (ou no coletor de `collect`);
+    sem METRICS_ENV nem coletor não faz nada.
+    """
+    collected = getattr(_local, "values", None)
+    if collected is not None:
+        collected.update(values)
+        return
+    path = os.environ.get(METRICS_ENV)
+    if not path:
+        return
+    metrics = load_metrics(path)
+    metrics.update(values)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(metrics, f, ensure_ascii=False)
+
+def load_metrics(path):
+    """Lê as métricas gravadas por um estágio (dict vazio se não houver)."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def peak_rss_bytes(usage=None):
+    """
+    Pico de memória residente, em bytes, de um resultado de getrusage/wait4
+    (padrão: o do processo atual desde que ele começou).
+    """
+    if usage is None:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+    # ru_maxrss vem em kilobytes no Linux e em bytes no macOS
+    return usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+
+def measure(command, cwd=None):
+    """
+    Executa um comando de shell e mede o tempo de CPU e o pico de memória
+    residente do processo, obtidos com os.wait4 (incluem os subprocessos que
+    ele esperou, como os workers do categorize).
+
+    Returns:
+        tuple: (código de saída, dict com cpu_user_seconds, cpu_system_seconds e peak_rss_bytes)
+    """
+    process = subprocess.Popen(command, shell=True, cwd=cwd)
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return process.returncode, {
+        "cpu_user_seconds": round(usage.ru_utime, 3),
+        "cpu_system_seconds": round(usage.ru_stime, 3),
+        "peak_rss_bytes": peak_rss_bytes(usage),
+    }
+
+def measured_command(command):
+    """Comando de shell que executa `command` através de `measure`, registrando o uso com `report` (usado pelo engine)."""
+    return f"{shlex.quote(sys.executable)} {shlex.quote(os.path.abspath(__file__))} {shlex.quote(command)}"
+
+def profiled_command(command, profile_path):
+    """
+    Acrescenta o cProfile a um comando Python ("python3 script.py ..."), gravando
+    as estatísticas em `profile_path`. Comandos que não são Python voltam inalterados.
+    """
+    parts = shlex.split(command)
+    if not parts or os.path.basename(parts[0]) not in ("python", "python3"):
+        return command
+    profiled = [parts[0], "-m", "cProfile", "-o", profile_path] + parts[1:]
+    return " ".join(shlex.quote(part) for part in profiled)
+
+def write_profile_summary(profile_path, limit=30):
+    """Grava ao lado do .prof um resumo em texto com as funções de maior tempo acumulado."""
+    import io
+    import pstats
+
+    output = io.StringIO()
+    stats = pstats.Stats(profile_path, stream=output)
+    stats.sort_stats("cumulative").print_stats(limit)
+    summary_path = os.path.splitext(profile_path)[0] + ".txt"
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        f.write(output.getvalue())
+    return summary_path
+
+def _write_atomic(path, text):
+    # O coletor textfile do Prometheus pode ler o arquivo a qualquer momento
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def write_metrics_json(path, run_metrics):
+    """Grava as métricas da execução (ver engine.run_stages) em JSON."""
+    _write_atomic(path, json.dumps(run_metrics, indent=2, ensure_ascii=False) + "\n")
+
+def _label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{_label_value(value)}"' for key, value in labels.items()) + "}"
+
+# Métricas numéricas por estágio: chave em metrics.json -> (nome, descrição)
+STAGE_GAUGES = {
+    "wall_seconds": ("stage_wall_seconds", "Tempo de relógio do estágio."),
+    "cpu_user_seconds": ("stage_cpu_user_seconds", "Tempo de CPU em modo usuário do estágio."),
+    "cpu_system_seconds": ("stage_cpu_system_seconds", "Tempo de CPU em modo sistema do estágio."),
+    "peak_rss_bytes": ("stage_peak_rss_bytes", "Pico de memória residente do estágio (estágios executados em subprocesso)."),
+    "engine_peak_rss_bytes": ("stage_engine_peak_rss_bytes",
+                              "Pico de memória residente do processo do engine desde o início até o fim do estágio "
+                              "(estágios executados no próprio processo; não é só do estágio)."),
+    "input_items": ("stage_input_items", "Itens lidos pelo estágio."),
+    "output_items": ("stage_output_items", "Itens gravados pelo estágio."),
+    "attempts": ("stage_attempts", "Execuções do comando do estágio (mais de uma quando foi retomado do checkpoint)."),
+}
+
+def format_prometheus(run_metrics):
+    """
+    Converte as métricas da execução para o formato textfile do Prometheus
+    (node_exporter --collector.textfile).
+    """
+    lines = []
+
+    def gauge(name, help_text, samples):
+        if not samples:
+            return
+        lines.append(f"# HELP {PROMETHEUS_PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{name} gauge")
+        for labels, value in samples:
+            lines.append(f"{PROMETHEUS_PREFIX}_{name}{labels} {value}")
+
+    stages = run_metrics["stages"]
+    gauge("stage_success", "1 se o estágio terminou (executado ou em cache), 0 se falhou ou foi pulado.", [
+        (_labels(stage=name), 1 if stage["status"] in ("ran", "cached") else 0)
+        for name, stage in stages.items()
+    ])
+    gauge("stage_cached", "1 se o estágio foi pulado pelo cache de estágios.", [
+        (_labels(stage=name), 1 if stage["status"] == "cached" else 0)
+        for name, stage in stages.items()
+    ])
+    for key, (name, help_text) in STAGE_GAUGES.items():
+        gauge(name, help_text, [
+            (_labels(stage=stage_name), stage[key]) for stage_name, stage in stages.items() if key in stage
+        ])
+    gauge("stage_items", "Contagens específicas do estágio (ex.: junções da mesclagem).", [
+        (_labels(stage=stage_name, kind=kind), value)
+        for stage_name, stage in stages.items()
+        for kind, value in sorted(stage.get("counts", {}).items())
+    ])
+    gauge("stage_category_items", "Produtos por categoria gerados pela categorização.", [
+        (_labels(stage=stage_name, category=category), value)
+        for stage_name, stage in stages.items()
+        for category, value in sorted(stage.get("per_category", {}).items())
+    ])
+    gauge("last_run_timestamp_seconds", "Início da última execução da pipeline.", [("", run_metrics["started_at"])])
+    return "\n".join(lines) + "\n"
+
+def write_prometheus_textfile(path, run_metrics):
+    """Grava as métricas da execução no formato textfile do Prometheus."""
+    _write_atomic(path, format_prometheus(run_metrics))
+
+# Executado pelo engine como `python metrics.py "<comando>"` para medir um estágio
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Uso: python metrics.py \"<comando>\"", file=sys.stderr)
+        sys.exit(2)
+    returncode, usage = measure(sys.argv[1])
+    report(**usage)
+    sys.exit(returncode)
@@ -0,0 +1,85 @@
+import sys
+from dataclasses import dataclass, field
+
+import prices
+
+# Modelo de produto compartilhado por merge_lists.py e categorize_products.py.
+# Os dois estágios trabalham com estes objetos e só convertem para dict ao ler
+# e gravar JSON (from_dict / to_dict). Com __slots__ cada produto ocupa bem
+# menos memória que um dict, e marcas, tipos de material e rótulos de opção,
+# que se repetem em milhares de produtos, são internados (uma única string).
+
+def intern_text(value):
+    """Interna uma string repetida no catálogo (marca, tipo de material, rótulo)."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+@dataclass(slots=True)
+class Variant:
+    """Uma opção de compra de um produto (ex.: "20 Un.", "30ml", "G (200 Un.)")."""
+    label: str
+
+    @classmethod
+    def from_label(cls, label):
+        return cls(intern_text(label))
+
+@dataclass(slots=True)
+class Product:
+    """
+    Produto da lista mesclada.
+
+    Attributes:
+        name (str): Nome do produto (chave da lista mesclada).
+        brand (str): Marca (internada).
+        material_type (str): Tipo de material (internado).
+        variants (list): Opções disponíveis (Variant), na ordem do site.
+        prices_cents (list): Preços em centavos inteiros, na ordem do site.
+    """
+    name: str
+    brand: str
+    material_type: str
+    variants: list = field(default_factory=list)
+    prices_cents: list = field(default_factory=list)
+
+    @classmethod
+    def create(cls, name, brand, material_type, options=(), price_strings=()):
+        """Cria um produto a partir dos rótulos de opção e dos preços em texto ("R$ 45,99")."""
+        return cls(
+            name=name,
+            brand=intern_text(brand),
+            material_type=intern_text(material_type),
+            variants=variants_from_labels(options),
+            prices_cents=cents_from_strings(price_strings),
+        )
+
+    @classmethod
+    def from_dict(cls, data, default_brand='', default_material_type='Outros'):
+        """Converte um produto no formato JSON (name, brand, availableOptions, availablePrice, materialType)."""
+        return cls.create(
+            data.get('name', ''),
+            data.get('brand', default_brand),
+            data.get('materialType', default_material_type),
+            data.get('availableOptions', []),
+            data.get('availablePrice', []),
+        )
+
+    @property
+    def option_labels(self):
+        return [variant.label for variant in self.variants]
+
+    def to_dict(self):
+        """Formato JSON da lista mesclada; os preços voltam a ser texto ("R$ 1.234,50")."""
+        return {
+            'name': self.name,
+            'brand': self.brand,
+            'availableOptions': self.option_labels,
+            'availablePrice': [prices.format_brl(cents) for cents in self.prices_cents],
+            'materialType': self.material_type,
+        }
+
+def variants_from_labels(labels):
+    """Converte rótulos de opção em Variants."""
+    return [Variant.from_label(label) for label in labels]
+
+def cents_from_strings(price_strings):
+    """Converte preços em texto para centavos, descartando os que não têm valor reconhecível."""
+    return [cents for cents in map(prices.parse_brl_cents, price_strings) if cents is not None]
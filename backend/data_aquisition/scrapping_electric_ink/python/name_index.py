@@ -0,0 +1,137 @@
+import html
+import re
+import unicodedata
+
+# Similaridade mínima (Jaccard de trigramas) para aceitar um par aproximado
+FUZZY_THRESHOLD = 0.85
+
+# Confiança atribuída a cada tipo de junção que não é aproximada
+EXACT_CONFIDENCE = 1.0
+NORMALIZED_CONFIDENCE = 0.99
+
+# Quantos tokens (os mais raros) de cada nome são usados para gerar candidatos
+CANDIDATE_TOKENS = 3
+
+# Caracteres que não se decompõem com NFKD mas têm equivalente sem diacrítico
+_SPECIAL_FOLDS = str.maketrans({"ø": "o", "Ø": "o", "ß": "ss", "æ": "ae", "œ": "oe"})
+_DECIMAL_COMMA = re.compile(r'(\d),(\d)')
+_NON_ALNUM = re.compile(r'[^a-z0-9.]+')
+_LOOSE_DOTS = re.compile(r'(?<!\d)\.|\.(?!\d)')
+
+def normalize_name(name):
+    """
+    Gera a chave normalizada de um nome de produto: desfaz entidades HTML,
+    remove acentos, converte para minúsculas, unifica a notação de diâmetro
+    ("Ø 0,30" -> "o 0.30") e colapsa pontuação e espaços.
+
+    Ex.: "Ink Cap - Batoques De Silicone Azul" -> "ink cap batoques de silicone azul"
+    """
+    text = html.unescape(name).translate(_SPECIAL_FOLDS)
+    text = unicodedata.normalize('NFKD', text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    text = _DECIMAL_COMMA.sub(r'\1.\2', text)
+    text = _NON_ALNUM.sub(' ', text)
+    text = _LOOSE_DOTS.sub(' ', text)
+    return " ".join(text.split())
+
+def _numeric_signature(tokens):
+    """Tokens com dígitos (tamanhos, diâmetros, quantidades). Nomes com números diferentes nunca se juntam."""
+    return tuple(sorted(token for token in tokens if any(c.isdigit() for c in token)))
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def build_name_index(names, fuzzy=True):
+    """
+    Constrói o índice de junção para uma lista de nomes.
+
+    O índice tem a chave normalizada de cada nome (junção exata/normalizada)
+    e, se `fuzzy`, um índice invertido de tokens, agrupado pela assinatura
+    numérica do nome (bloqueio), usado para gerar candidatos à junção
+    aproximada sem comparar todos os pares.
+
+    Args:
+        names (iterable): Nomes dos produtos a indexar.
+        fuzzy (bool): Se False, o índice só serve para junções exatas/normalizadas
+            (sem os trigramas, que ocupam a maior parte da memória).
+
+    Returns:
+        dict: Estrutura do índice, usada por `add`, `lookup` e `remove`.
+    """
+    index = {"by_exact": {}, "by_key": {}, "tokens": {}, "entries": {}, "fuzzy": fuzzy}
+    for name in names:
+        add(index, name)
+    return index
+
+def add(index, name):
+    """Acrescenta um nome ao índice."""
+    key = normalize_name(name)
+    index["by_exact"][name] = name
+    index["by_key"][key] = name
+    if not index["fuzzy"]:
+        return
+    tokens = key.split()
+    index["entries"][name] = {"key": key, "trigrams": _trigrams(key)}
+    block = index["tokens"].setdefault(_numeric_signature(tokens), {})
+    for token in set(tokens):
+        block.setdefault(token, set()).add(name)
+
+def remove(index, name):
+    """Retira um nome dos candidatos à junção aproximada (ex.: depois de já ter um par)."""
+    entry = index["entries"].pop(name, None)
+    if entry is None:
+        return
+    tokens = entry["key"].split()
+    block = index["tokens"].get(_numeric_signature(tokens), {})
+    for token in set(tokens):
+        postings = block.get(token)
+        if postings is not None:
+            postings.discard(name)
+            if not postings:
+                del block[token]
+
+def lookup(index, name, fuzzy=False, threshold=FUZZY_THRESHOLD):
+    """
+    Procura no índice o nome correspondente a `name`.
+
+    Tenta, nessa ordem, o nome exato, a chave normalizada e (se `fuzzy`)
+    a melhor similaridade de trigramas entre os candidatos que compartilham
+    os tokens mais raros e a mesma assinatura numérica.
+
+    Returns:
+        tuple: (nome encontrado, método, confiança) ou None se não houver par.
+               O método é "exact", "normalized" ou "fuzzy".
+    """
+    if name in index["by_exact"]:
+        return index["by_exact"][name], "exact", EXACT_CONFIDENCE
+
+    key = normalize_name(name)
+    if key in index["by_key"]:
+        return index["by_key"][key], "normalized", NORMALIZED_CONFIDENCE
+
+    if not fuzzy:
+        return None
+
+    tokens = set(key.split())
+    block = index["tokens"].get(_numeric_signature(key.split()), {})
+    indexed_tokens = [token for token in tokens if token in block]
+    if not indexed_tokens:
+        return None
+
+    rarest = sorted(indexed_tokens, key=lambda token: (len(block[token]), token))[:CANDIDATE_TOKENS]
+    candidates = set()
+    for token in rarest:
+        candidates.update(block[token])
+
+    query_trigrams = _trigrams(key)
+    best = None
+    for candidate in sorted(candidates):
+        candidate_trigrams = index["entries"][candidate]["trigrams"]
+        score = len(query_trigrams & candidate_trigrams) / len(query_trigrams | candidate_trigrams)
+        if best is None or score > best[1]:
+            best = (candidate, score)
+
+    if best is None or best[1] < threshold:
+        return None
+    return best[0], "fuzzy", round(min(best[1], NORMALIZED_CONFIDENCE), 4)
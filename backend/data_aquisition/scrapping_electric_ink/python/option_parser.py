@@ -0,0 +1,108 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# Interpretação dos rótulos de opção ("30ml", "01 Un.", "G (200 Un.)", "3 L", "32mm (esgotado)").
+# Os mesmos rótulos se repetem em milhares de produtos, então cada rótulo é
+# interpretado uma única vez (lru_cache) com expressões pré-compiladas.
+
+# Medida com unidade: volume, massa ou comprimento
+_MEASURE = re.compile(r'(\d+(?:[.,]\d+)?)\s?(ml|l|kg|g|mm)(?![a-z])', re.IGNORECASE)
+# Quantidade de unidades: "20 Un.", "200 un.", "12 unidades" (sem o ponto, "20 un" não conta)
+_UNIT_COUNT = re.compile(r'(\d+)\s*(Un\.|un\.|unidades)', re.IGNORECASE)
+# Tamanho em letra no início do rótulo: "G (200 Un.)", "M", "GG (25 Un.)"
+_SIZE = re.compile(r'^(PP|P|M|G|GG|XG|XGG)(?=\s|\(|$)')
+
+# Unidade no rótulo -> (unidade normalizada, fator)
+_NORMALIZED_UNITS = {"ml": ("ml", 1), "l": ("ml", 1000), "g": ("g", 1), "kg": ("g", 1000), "mm": ("mm", 1)}
+
+# Tamanho máximo do cache (o catálogo atual tem algumas dezenas de rótulos distintos)
+CACHE_SIZE = 4096
+
+OptionInfo = namedtuple("OptionInfo", ["quantity", "size", "length_mm", "sold_out", "unit_count", "measure_text", "measure_unit"])
+OptionInfo.__doc__ = """
+Rótulo de opção interpretado.
+
+Attributes:
+    quantity (tuple): (valor, unidade) com unidade "ml", "g" ou "un", ou None.
+        Litros e quilos são convertidos para ml e g, então quantidades da mesma
+        unidade podem ser comparadas e somadas.
+    size (str): Tamanho em letra (P, M, G, GG...), ou None.
+    length_mm (int): Comprimento em milímetros (ex.: bicos), ou None.
+    sold_out (bool): Se o rótulo está marcado como "(esgotado)".
+    unit_count (int): Quantidade de unidades ("G (200 Un.)" -> 200), ou None.
+    measure_text (str): Trecho da medida como aparece no rótulo, em minúsculas ("30ml", "3 l").
+    measure_unit (str): Unidade da medida como aparece no rótulo ("ml", "l", "g", "kg", "mm").
+"""
+
+def _number(text, factor=1):
+    value = float(text.replace(',', '.')) * factor
+    return int(value) if value == int(value) else value
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_option(label):
+    """
+    Interpreta um rótulo de opção. O resultado é memoizado e imutável.
+
+    A quantidade vem da medida (ml, L, g, kg); sem medida, da contagem de
+    unidades ("20 Un." -> (20, "un")).
+
+    Returns:
+        OptionInfo: Campos extraídos do rótulo (todos None/False se não houver nada reconhecível).
+    """
+    label = label or ""
+    quantity = length_mm = measure_text = measure_unit = None
+
+    measure = _MEASURE.search(label)
+    if measure:
+        measure_text = measure.group(0).lower()
+        measure_unit = measure.group(2).lower()
+        unit, factor = _NORMALIZED_UNITS[measure_unit]
+        value = _number(measure.group(1), factor)
+        if unit == "mm":
+            length_mm = value
+        else:
+            quantity = (value, unit)
+
+    count = _UNIT_COUNT.search(label)
+    unit_count = int(count.group(1)) if count else None
+    if quantity is None and unit_count is not None:
+        quantity = (unit_count, "un")
+
+    size = _SIZE.match(label.strip())
+    return OptionInfo(
+        quantity=quantity,
+        size=size.group(1) if size else None,
+        length_mm=length_mm,
+        sold_out="esgotado" in label.lower(),
+        unit_count=unit_count,
+        measure_text=measure_text,
+        measure_unit=measure_unit,
+    )
+
+def _quantity_json(quantity):
+    return {"value": quantity[0], "unit": quantity[1]} if quantity else None
+
+def quantity_dict(label):
+    """Quantidade de um rótulo no formato JSON ({"value": 200, "unit": "un"}), ou None."""
+    return _quantity_json(parse_option(label).quantity)
+
+@lru_cache(maxsize=CACHE_SIZE)
+def option_fields(label):
+    """
+    Campos estruturados de uma opção, com as mesmas chaves para todas as categorias.
+
+    Memoizado como parse_option: os produtos com o mesmo rótulo compartilham o
+    mesmo dict, que não deve ser alterado.
+
+    Returns:
+        dict: label, quantity ({"value", "unit"} ou None), size, length_mm e sold_out.
+    """
+    info = parse_option(label)
+    return {
+        "label": label,
+        "quantity": _quantity_json(info.quantity),
+        "size": info.size,
+        "length_mm": info.length_mm,
+        "sold_out": info.sold_out,
+    }
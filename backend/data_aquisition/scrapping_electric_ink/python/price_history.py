@@ -0,0 +1,287 @@
+import argparse
+import bisect
+import json
+import mmap
+import os
+import time
+from array import array
+from contextlib import contextmanager
+
+import prices
+
+# Histórico de preços alimentado a cada mesclagem.
+#
+# Layout em disco (data/listas_mescladas/historico_precos):
+#   dicionario.json  nomes dos produtos e variantes -> ids inteiros
+#   execucoes.json   uma entrada por execução: timestamp e intervalo de linhas [start, end)
+#   run_timestamp.bin, variant_id.bin, price_cents.bin
+#                    colunas int64 (array 'q') só de acréscimo, lidas com mmap
+#
+# Cada execução grava uma linha por variante, ordenadas pelo id da variante,
+# então o preço de uma variante em uma execução é encontrado por busca binária.
+# O execucoes.json é gravado por último: linhas acrescentadas por uma execução
+# interrompida ficam fora dos intervalos registrados e são descartadas na próxima.
+
+# Fica ao lado da lista mesclada, como o alteracoes.json e o relatorio_juncao.json
+HISTORY_DIRNAME = "historico_precos"
+DEFAULT_HISTORY_DIR = os.path.join("data/listas_mescladas", HISTORY_DIRNAME)
+DICTIONARY_FILENAME = "dicionario.json"
+RUNS_FILENAME = "execucoes.json"
+COLUMNS = ["run_timestamp", "variant_id", "price_cents"]
+
+def _column_path(history_dir, column):
+    return os.path.join(history_dir, f"{column}.bin")
+
+def _read_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _write_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def load_history(history_dir=DEFAULT_HISTORY_DIR):
+    """
+    Carrega o dicionário de ids e a lista de execuções (as colunas não são lidas aqui).
+
+    Returns:
+        dict: dir, product_names (id -> nome), product_ids (nome -> id),
+              variants (id -> (id do produto, chave)), variant_ids ((id do produto, chave) -> id),
+              product_variants (id do produto -> ids das variantes) e runs.
+    """
+    dictionary = _read_json(os.path.join(history_dir, DICTIONARY_FILENAME), {"products": [], "variants": []})
+    product_names = dictionary["products"]
+    variants = [tuple(variant) for variant in dictionary["variants"]]
+    product_variants = {}
+    for variant_id, (product_id, _) in enumerate(variants):
+        product_variants.setdefault(product_id, []).append(variant_id)
+    return {
+        "dir": history_dir,
+        "product_names": product_names,
+        "product_ids": {name: product_id for product_id, name in enumerate(product_names)},
+        "variants": variants,
+        "variant_ids": {variant: variant_id for variant_id, variant in enumerate(variants)},
+        "product_variants": product_variants,
+        "runs": _read_json(os.path.join(history_dir, RUNS_FILENAME), []),
+    }
+
+def _variant_id(history, product_name, key):
+    product_id = history["product_ids"].get(product_name)
+    if product_id is None:
+        product_id = len(history["product_names"])
+        history["product_names"].append(product_name)
+        history["product_ids"][product_name] = product_id
+    variant = (product_id, key)
+    variant_id = history["variant_ids"].get(variant)
+    if variant_id is None:
+        variant_id = len(history["variants"])
+        history["variants"].append(variant)
+        history["variant_ids"][variant] = variant_id
+        history["product_variants"].setdefault(product_id, []).append(variant_id)
+    return variant_id
+
+def variant_keys(product):
+    """
+    Chave de cada preço de um produto sem preço por SKU: a posição do preço na
+    lista do produto ("0", "1", ...).
+
+    A chave é opaca: o availablePrice do JSON-LD é um conjunto de preços sem
+    repetição e ordenado por valor, então a posição não corresponde à opção de
+    mesma posição e muda quando um preço entra ou sai da lista. O par
+    opção -> preço só é conhecido pelos SKUs (ver sku_index.priced_variants).
+
+    Returns:
+        list: Pares (chave, centavos), na ordem dos preços do produto.
+    """
+    return [(str(position), cents) for position, cents in enumerate(product.prices_cents)]
+
+def record_run(products, history_dir=DEFAULT_HISTORY_DIR, timestamp=None, variant_prices=None):
+    """
+    Acrescenta ao histórico os preços de uma execução.
+
+    As variantes de um produto são identificadas pelo SKU quando o preço de cada
+    SKU é conhecido (`variant_prices`, ver sku_index.priced_variants); senão, pela
+    posição do preço na lista do produto (ver variant_keys).
+
+    Args:
+        products (iterable): Produtos da lista mesclada (model.Product).
+        history_dir (str): Diretório do histórico.
+        timestamp (int): Momento da execução (segundos desde a época); padrão: agora.
+        variant_prices (dict): Nome do produto -> lista de (sku, centavos).
+
+    Returns:
+        int: Número da execução registrada.
+    """
+    os.makedirs(history_dir, exist_ok=True)
+    history = load_history(history_dir)
+    timestamp = int(time.time()) if timestamp is None else int(timestamp)
+
+    variant_prices = variant_prices or {}
+    rows = []
+    for product in products:
+        variants = variant_prices.get(product.name)
+        if variants is None:
+            variants = variant_keys(product)
+        for key, cents in variants:
+            rows.append((_variant_id(history, product.name, key), cents))
+    rows.sort()
+
+    runs = history["runs"]
+    start = runs[-1]["end"] if runs else 0
+    new_columns = {
+        "run_timestamp": array('q', [timestamp] * len(rows)),
+        "variant_id": array('q', (variant_id for variant_id, _ in rows)),
+        "price_cents": array('q', (cents for _, cents in rows)),
+    }
+    for column, values in new_columns.items():
+        with open(_column_path(history_dir, column), 'ab') as f:
+            # Descarta linhas de uma execução anterior que não chegou a ser registrada
+            f.truncate(start * values.itemsize)
+            f.seek(start * values.itemsize)
+            values.tofile(f)
+
+    _write_json(os.path.join(history_dir, DICTIONARY_FILENAME), {
+        "products": history["product_names"],
+        "variants": [list(variant) for variant in history["variants"]],
+    })
+    run = {"run": len(runs), "timestamp": timestamp, "start": start, "end": start + len(rows)}
+    runs.append(run)
+    _write_json(os.path.join(history_dir, RUNS_FILENAME), runs)
+    return run["run"]
+
+@contextmanager
+def open_columns(history):
+    """
+    Mapeia as colunas do histórico em memória (somente leitura).
+
+    Yields:
+        dict: Nome da coluna -> memoryview de int64, limitada às linhas registradas.
+    """
+    row_count = history["runs"][-1]["end"] if history["runs"] else 0
+    maps = []
+    buffers = []
+    views = {}
+    try:
+        for column in COLUMNS:
+            if row_count == 0:
+                views[column] = memoryview(array('q'))
+                continue
+            with open(_column_path(history["dir"], column), 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            maps.append(mapped)
+            buffer = memoryview(mapped)[:row_count * 8]
+            buffers.append(buffer)
+            views[column] = buffer.cast('q')
+        yield views
+    finally:
+        # As views precisam ser liberadas antes de fechar os mmaps
+        for view in list(views.values()) + buffers:
+            view.release()
+        for mapped in maps:
+            mapped.close()
+
+def _price_at(columns, run, variant_id):
+    # Busca binária pela variante dentro das linhas (ordenadas por variante) da execução
+    variant_column = columns["variant_id"]
+    position = bisect.bisect_left(variant_column, variant_id, run["start"], run["end"])
+    if position < run["end"] and variant_column[position] == variant_id:
+        return columns["price_cents"][position]
+    return None
+
+def price_series(history, product_name):
+    """
+    Série de preços de um produto em todas as execuções.
+
+    Returns:
+        dict: Chave da variante -> lista de (timestamp, centavos), em ordem cronológica.
+              Vazio se o produto não está no histórico.
+    """
+    product_id = history["product_ids"].get(product_name)
+    if product_id is None:
+        return {}
+    series = {}
+    with open_columns(history) as columns:
+        for variant_id in history["product_variants"].get(product_id, []):
+            points = []
+            for run in history["runs"]:
+                cents = _price_at(columns, run, variant_id)
+                if cents is not None:
+                    points.append((run["timestamp"], cents))
+            series[history["variants"][variant_id][1]] = points
+    return series
+
+def biggest_moves(history, since_run, limit=20):
+    """
+    Maiores variações de preço entre a execução `since_run` e a última.
+
+    Returns:
+        list: Dicts com name, variant, previous_cents, current_cents, change_cents
+              e change_percent, ordenados pela maior variação percentual (em módulo).
+    """
+    runs = history["runs"]
+    if not runs:
+        return []
+    if not 0 <= since_run < len(runs):
+        raise ValueError(f"Execução {since_run} não existe (há {len(runs)} execuções).")
+    previous_run, current_run = runs[since_run], runs[-1]
+
+    moves = []
+    with open_columns(history) as columns:
+        # As duas execuções estão ordenadas por variante: basta percorrê-las juntas
+        variant_column, price_column = columns["variant_id"], columns["price_cents"]
+        i, j = previous_run["start"], current_run["start"]
+        while i < previous_run["end"] and j < current_run["end"]:
+            previous_variant, current_variant = variant_column[i], variant_column[j]
+            if previous_variant < current_variant:
+                i += 1
+            elif previous_variant > current_variant:
+                j += 1
+            else:
+                previous_cents, current_cents = price_column[i], price_column[j]
+                if previous_cents != current_cents:
+                    product_id, key = history["variants"][current_variant]
+                    moves.append({
+                        "name": history["product_names"][product_id],
+                        "variant": key,
+                        "previous_cents": previous_cents,
+                        "current_cents": current_cents,
+                        "change_cents": current_cents - previous_cents,
+                        "change_percent": round((current_cents - previous_cents) * 100 / previous_cents, 2) if previous_cents else None,
+                    })
+                i += 1
+                j += 1
+
+    moves.sort(key=lambda move: (-abs(move["change_percent"] or 0), -abs(move["change_cents"]), move["name"]))
+    return moves[:limit] if limit else moves
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consulta o histórico de preços gravado a cada mesclagem.")
+    parser.add_argument("--dir", default=DEFAULT_HISTORY_DIR, help=f"Diretório do histórico (padrão: {DEFAULT_HISTORY_DIR}).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    series_parser = subparsers.add_parser("serie", help="Série de preços de um produto.")
+    series_parser.add_argument("name", help="Nome exato do produto na lista mesclada.")
+    moves_parser = subparsers.add_parser("variacoes", help="Maiores variações de preço desde uma execução.")
+    moves_parser.add_argument("--desde", type=int, default=0, help="Número da execução de referência (padrão: 0).")
+    moves_parser.add_argument("--limite", type=int, default=20, help="Quantidade de variações listadas (padrão: 20).")
+    args = parser.parse_args()
+
+    history = load_history(args.dir)
+    if args.command == "variacoes" and not 0 <= args.desde < max(len(history["runs"]), 1):
+        parser.error(f"--desde deve estar entre 0 e {len(history['runs']) - 1}")
+    if args.command == "serie":
+        series = price_series(history, args.name)
+        if not series:
+            print(f"Produto '{args.name}' não encontrado no histórico.")
+        for key, points in series.items():
+            print(f"Variante {key}:")
+            for timestamp, cents in points:
+                print(f"  {time.strftime('%Y-%m-%d %H:%M', time.localtime(timestamp))}  {prices.format_brl(cents)}")
+    else:
+        for move in biggest_moves(history, args.desde, args.limite):
+            percent = f"{move['change_percent']:+.2f}%" if move["change_percent"] is not None else "n/d"
+            print(f"{move['name']} [{move['variant']}]: {prices.format_brl(move['previous_cents'])} -> "
+                  f"{prices.format_brl(move['current_cents'])} ({percent})")
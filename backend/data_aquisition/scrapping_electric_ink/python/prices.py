@@ -0,0 +1,95 @@
+import re
+from array import array
+from functools import lru_cache
+
+# Valor numérico de um preço em reais: "1.234,50", "1234,50", "45,99", "45.99" ou "45"
+_BRL_NUMBER = re.compile(r'\d[\d.]*(?:,\d+)?')
+
+@lru_cache(maxsize=4096)
+def parse_brl_cents(text):
+    """
+    Converte um preço em reais para centavos inteiros.
+
+    Aceita o prefixo "R$" (com espaço comum ou não separável), separador de
+    milhar com ponto e vírgula decimal ("R$ 1.234,50" -> 123450). Um ponto
+    seguido de exatamente dois dígitos e sem vírgula é tratado como decimal
+    ("45.99" -> 4599). As strings se repetem muito no catálogo, por isso o
+    resultado é memoizado.
+
+    Returns:
+        int: Preço em centavos, ou None se não houver valor reconhecível.
+    """
+    if not text:
+        return None
+    match = _BRL_NUMBER.search(text)
+    if not match:
+        return None
+    number = match.group(0)
+
+    if ',' in number:
+        integer_part, decimal_part = number.split(',', 1)
+        integer_part = integer_part.replace('.', '')
+    elif re.fullmatch(r'\d+\.\d{2}', number):
+        integer_part, decimal_part = number.split('.')
+    else:
+        integer_part, decimal_part = number.replace('.', ''), '0'
+
+    decimal_part = (decimal_part + '00')[:2]
+    return int(integer_part or 0) * 100 + int(decimal_part)
+
+def format_brl(cents):
+    """Formata centavos inteiros como preço em reais: 123450 -> "R$ 1.234,50"."""
+    if cents is None:
+        return None
+    reais, centavos = divmod(cents, 100)
+    return f"R$ {reais:,}".replace(',', '.') + f",{centavos:02d}"
+
+def build_price_column(price_lists):
+    """
+    Junta as listas de preços de todo o catálogo em uma única coluna de centavos.
+
+    A coluna segue o layout CSR: `values` guarda os preços de todos os produtos
+    em sequência (ordenados dentro de cada produto) e `offsets[i]:offsets[i + 1]`
+    delimita os preços do produto i.
+
+    Args:
+        price_lists (iterable): Preços em centavos de cada produto (model.Product.prices_cents).
+
+    Returns:
+        tuple: (values, offsets), ambos array('q').
+    """
+    values = array('q')
+    offsets = array('q', [0])
+    for price_list in price_lists:
+        values.extend(sorted(price_list))
+        offsets.append(len(values))
+    return values, offsets
+
+def summarize_price_column(values, offsets):
+    """
+    Calcula, em uma passada pela coluna, o menor, o maior e o preço mediano de cada produto.
+
+    Returns:
+        list: Para cada produto, um dict com lowest, highest, median (centavos)
+              e all (lista de centavos ordenada); valores None se não houver preço.
+    """
+    summaries = []
+    for i in range(len(offsets) - 1):
+        start, end = offsets[i], offsets[i + 1]
+        count = end - start
+        if count == 0:
+            summaries.append({"lowest": None, "highest": None, "median": None, "all": []})
+            continue
+        middle = start + count // 2
+        median = values[middle] if count % 2 else (values[middle - 1] + values[middle]) // 2
+        summaries.append({
+            "lowest": values[start],
+            "highest": values[end - 1],
+            "median": median,
+            "all": values[start:end].tolist(),
+        })
+    return summaries
+
+def summarize_prices(price_list):
+    """Resumo dos preços em centavos de um único produto (atalho para a coluna com um produto só)."""
+    return summarize_price_column(*build_price_column([price_list]))[0]
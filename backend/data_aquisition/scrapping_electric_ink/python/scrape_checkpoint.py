@@ -0,0 +1,127 @@
+import json
+import os
+import re
+import time
+
+# Checkpoint por página dos scrapers: cada página extraída é gravada assim que
+# termina, e um cursor registra até onde a listagem já foi percorrida. Se o
+# scraping falhar no meio, a próxima execução retoma do cursor e baixa só as
+# páginas que faltam; no fim, as páginas são consolidadas na lista bruta.
+#
+# Layout (o mesmo de js/scrape_checkpoint.js):
+#   data/listas_brutas/paginas/<lista>/pagina_0001.json   produtos da página 1
+#   data/listas_brutas/paginas/<lista>/cursor.json        {"completed_through", "saved_pages",
+#                                                          "end_page", "complete", "started_at", "updated_at"}
+# completed_through é a maior página N tal que 1..N estão salvas; end_page é a
+# última página com produtos (None enquanto o fim da listagem não foi visto).
+
+CHECKPOINT_ROOT = "data/listas_brutas/paginas"
+CURSOR_FILENAME = "cursor.json"
+# Checkpoints mais antigos que isto são descartados (os preços já podem ter mudado)
+MAX_AGE_SECONDS = 24 * 3600
+
+_PAGE_FILE = re.compile(r'^pagina_(\d+)\.json$')
+
+def checkpoint_dir(list_name, base_dir=None):
+    """Diretório do checkpoint de uma lista bruta (ex.: "lista_json_ld")."""
+    return os.path.join(base_dir or '.', CHECKPOINT_ROOT, list_name)
+
+def _page_path(directory, page):
+    return os.path.join(directory, f"pagina_{page:04d}.json")
+
+def _write_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def load_cursor(directory):
+    """Cursor gravado em `directory`, ou None se não houver checkpoint."""
+    try:
+        with open(os.path.join(directory, CURSOR_FILENAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def saved_pages(directory):
+    """Números das páginas já salvas, em ordem crescente."""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(int(match.group(1)) for match in map(_PAGE_FILE.match, os.listdir(directory)) if match)
+
+def _clear_pages(directory):
+    for page in saved_pages(directory):
+        os.remove(_page_path(directory, page))
+
+def is_resumable(cursor, max_age=MAX_AGE_SECONDS):
+    """Se o cursor é de um scraping interrompido recente o bastante para ser retomado."""
+    return bool(cursor) and not cursor.get("complete") and time.time() - cursor.get("updated_at", 0) <= max_age
+
+def open_checkpoint(directory, max_age=MAX_AGE_SECONDS):
+    """
+    Prepara o checkpoint de um scraping: retoma um interrompido recente ou
+    começa um novo (apagando as páginas de um scraping concluído ou antigo).
+
+    Returns:
+        dict: Cursor atual (ver o layout no início do módulo).
+    """
+    os.makedirs(directory, exist_ok=True)
+    cursor = load_cursor(directory)
+    if is_resumable(cursor, max_age):
+        return cursor
+    _clear_pages(directory)
+    now = time.time()
+    cursor = {"completed_through": 0, "saved_pages": 0, "end_page": None, "complete": False, "started_at": now, "updated_at": now}
+    _write_json(os.path.join(directory, CURSOR_FILENAME), cursor)
+    return cursor
+
+def _update_cursor(directory, **changes):
+    cursor = load_cursor(directory) or {}
+    pages = saved_pages(directory)
+    completed_through = 0
+    for page in pages:
+        if page != completed_through + 1:
+            break
+        completed_through = page
+    cursor.update(completed_through=completed_through, saved_pages=len(pages), updated_at=time.time(), **changes)
+    _write_json(os.path.join(directory, CURSOR_FILENAME), cursor)
+    return cursor
+
+def save_page(directory, page, products):
+    """Grava os produtos de uma página e avança o cursor."""
+    _write_json(_page_path(directory, page), products)
+    return _update_cursor(directory)
+
+def mark_end(directory, end_page):
+    """Registra a última página com produtos (o fim da listagem)."""
+    cursor = load_cursor(directory) or {}
+    if cursor.get("end_page") is None or end_page < cursor["end_page"]:
+        return _update_cursor(directory, end_page=end_page)
+    return cursor
+
+def consolidate(directory):
+    """Produtos de todas as páginas salvas (até end_page), na ordem das páginas."""
+    end_page = (load_cursor(directory) or {}).get("end_page")
+    products = []
+    for page in saved_pages(directory):
+        if end_page is not None and page > end_page:
+            continue
+        with open(_page_path(directory, page), 'r', encoding='utf-8') as f:
+            products.extend(json.load(f))
+    return products
+
+def finish(directory):
+    """Marca o scraping como concluído e apaga as páginas (já consolidadas na lista bruta)."""
+    cursor = _update_cursor(directory, complete=True)
+    _clear_pages(directory)
+    return cursor
+
+def describe(directory):
+    """Resumo do checkpoint para as mensagens do engine, ou None se não há o que retomar."""
+    cursor = load_cursor(directory)
+    if not is_resumable(cursor):
+        return None
+    text = f"{cursor['saved_pages']} página(s) salva(s), completas até a página {cursor['completed_through']}"
+    if cursor.get("end_page") is not None:
+        text += f" de {cursor['end_page']}"
+    return text
@@ -0,0 +1,292 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from decimal import ROUND_HALF_UP, Decimal
+from urllib.parse import urlencode, urlsplit, urlunsplit, parse_qsl
+
+import http_client
+import metrics
+import scrape_checkpoint
+
+# Alternativa em Python ao js/scrape_json_ld_only.js: em vez de abrir um
+# navegador e clicar em "Próximo" (com esperas fixas de 8s e 5s por página),
+# baixa diretamente as páginas da listagem (?page=N) com um pool de conexões
+# HTTP, algumas páginas ao mesmo tempo, e lê só o <script type="application/ld+json">.
+# A saída tem o mesmo formato de lista_json_ld.json.
+
+LISTING_URL = "https://www.electricink.com.br/tatuagem"
+OUTPUT_FILE = "./data/listas_brutas/lista_json_ld.json"
+CHECKPOINT_DIR = scrape_checkpoint.checkpoint_dir("lista_json_ld")
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RETRIES = 4
+DEFAULT_BACKOFF_SECONDS = 0.5
+# Limite de segurança para a paginação (a listagem atual tem bem menos páginas).
+# Se ele for atingido sem encontrar o fim da listagem, o scraping falha em vez
+# de gravar uma lista incompleta (ver scrape_listing).
+DEFAULT_MAX_PAGES = 200
+
+# Respostas que valem uma nova tentativa (limite de requisições e erros do servidor)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_JSON_LD_SCRIPT = re.compile(r'<script[^>]*type=["\']application/ld\+json["\'][^>]*>(.*?)</script>', re.IGNORECASE | re.DOTALL)
+
+def page_url(listing_url, page):
+    """URL da página `page` da listagem (parâmetro ?page=N, mantendo os demais)."""
+    parts = urlsplit(listing_url)
+    query = [(key, value) for key, value in parse_qsl(parts.query) if key != "page"]
+    query.append(("page", str(page)))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+def infer_material_type(name, description, brand):
+    """Mesma inferência de tipo de material do scraper em JavaScript (inferMaterialType)."""
+    name = name.lower()
+    description = description.lower() if description else ''
+    brand = brand.lower() if brand else ''
+
+    # Priorizar termos mais específicos
+    if any(term in name for term in ('batoque', 'ink cap', 'cap')) or 'batoque' in description:
+        return 'Batoques'
+    if (any(term in name for term in ('agulha', 'cartucho', 'needle', 'rl', 'rs', 'm1', 'rm', 'magnum', 'liner', 'shader'))
+            or 'cartucho' in description or 'agulha' in description):
+        return 'Agulhas e Cartuchos'
+    if (any(term in name for term in ('tinta', 'pigmento')) or ('ink' in name and 'ink cap' not in name and 'electric ink' not in brand)
+            or 'preto' in name or 'branco' in name or 'tinta' in description or 'pigmento' in description):
+        return 'Tintas'
+    if any(term in name for term in ('luva', 'gloves')) or 'luva' in description:
+        return 'Luvas'
+    if (any(term in name for term in ('filme', 'plástico', 'curativo', 'bandagem', 'wrap', 'cover'))
+            or 'filme' in description or 'curativo' in description):
+        return 'Materiais de Barreira'
+    if (any(term in name for term in ('álcool', 'sabonete', 'desinfetante', 'cleaner', 'assepsia'))
+            or 'higiene' in description or 'assepsia' in description):
+        return 'Biossegurança e Higiene'
+    if (any(term in name for term in ('vaselina', 'manteiga', 'butter', 'aftercare', 'creme'))
+            or 'vaselina' in description or 'pós-tattoo' in description):
+        return 'Cremes e Pós-Tatuagem'
+    if any(term in name for term in ('máquina', 'machine', 'pen')) or 'máquina' in description or 'rotativa' in description:
+        return 'Máquinas'
+    if (any(term in name for term in ('fonte', 'power supply', 'cabo', 'clip cord'))
+            or 'fonte' in description or 'cabo' in description):
+        return 'Fontes e Cabos'
+    return 'Outros'
+
+def format_price(value):
+    """Preço do JSON-LD no formato do scraper em JavaScript: números com 2 casas ("R$ 45,90"), texto como veio."""
+    if isinstance(value, bool):
+        value = str(value).lower()
+    if isinstance(value, (int, float)):
+        # toFixed(2) do JavaScript: arredonda o valor binário exato, empates para cima
+        text = str(Decimal(value).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+        return f"R$ {text.replace('.', ',', 1)}"
+    return f"R$ {value}"
+
+def _price_number(price):
+    # Ordenação numérica dos preços, como no scraper em JavaScript
+    try:
+        return float(price.replace('R$ ', '').replace(',', '.', 1))
+    except ValueError:
+        return float('nan')
+
+def parse_product(product):
+    """Converte um Product do JSON-LD no registro de lista_json_ld.json."""
+    name = product.get('name') or ''
+    brand = product['brand'].get('name', '') if isinstance(product.get('brand'), dict) else ''
+    description = product.get('description') or ''
+    offers = product.get('offers') or {}
+
+    available_prices = []
+    available_options = []
+    variants = []
+    for offer in offers.get('offers') or []:
+        price = format_price(offer['price']) if offer.get('price') is not None else None
+        if price is not None and price not in available_prices:
+            available_prices.append(price)
+        if offer.get('sku'):
+            available_options.append(offer['sku'])
+            item_offered = offer.get('itemOffered') or {}
+            variants.append({
+                "sku": str(offer['sku']),
+                "price": price,
+                "name": offer.get('name') or item_offered.get('name') or None,
+            })
+
+    # Fallback para lowPrice/highPrice se não houver ofertas detalhadas ou preços
+    if not available_prices and offers:
+        if offers.get('lowPrice') is not None:
+            available_prices.append(format_price(offers['lowPrice']))
+        if offers.get('highPrice') is not None and offers['highPrice'] != offers.get('lowPrice'):
+            high = format_price(offers['highPrice'])
+            if high not in available_prices:
+                available_prices.append(high)
+
+    return {
+        "name": name,
+        "availableOptions": sorted(available_options, key=str),
+        "availablePrice": sorted(available_prices, key=_price_number),
+        "materialType": infer_material_type(name, description, brand),
+        "variants": sorted(variants, key=lambda variant: variant["sku"]),
+    }
+
+def parse_listing_page(html):
+    """
+    Extrai os produtos do ItemList de Products do JSON-LD de uma página da listagem.
+
+    Returns:
+        list: Registros no formato de lista_json_ld.json (vazia se a página não tem produtos).
+    """
+    product_list = []
+    for script in _JSON_LD_SCRIPT.findall(html):
+        try:
+            data = json.loads(script)
+        except ValueError:
+            continue
+        elements = data.get('itemListElement') if isinstance(data, dict) and data.get('@type') == 'ItemList' else None
+        # Como no scraper em JavaScript, vale o último ItemList de Products da página
+        if elements and isinstance(elements, list) and _is_product(elements[0]):
+            product_list = elements
+    return [parse_product(element['item']) for element in product_list if _is_product(element)]
+
+def _is_product(element):
+    return isinstance(element, dict) and isinstance(element.get('item'), dict) and element['item'].get('@type') == 'Product'
+
+def deduplicate(products):
+    """Remove registros repetidos (mesmo nome, opções e preços), mantendo a primeira ocorrência."""
+    seen = set()
+    unique = []
+    for product in products:
+        identifier = (product['name'], tuple(product['availableOptions']), tuple(product['availablePrice']))
+        if identifier not in seen:
+            seen.add(identifier)
+            unique.append(product)
+    return unique
+
+async def fetch_with_retry(pool, url, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF_SECONDS, stats=None):
+    """
+    GET com novas tentativas e espera exponencial (com jitter) para erros de
+    rede, timeouts e respostas 429/5xx. Respeita o Retry-After, se houver.
+
+    Returns:
+        tuple: (status, corpo em texto). Depois da última tentativa, o erro é levantado.
+    """
+    for attempt in range(retries + 1):
+        try:
+            status, headers, body = await pool.get(url)
+            if status not in RETRY_STATUSES or attempt == retries:
+                return status, body.decode('utf-8', errors='replace')
+            delay = float(headers["retry-after"]) if headers.get("retry-after", "").isdigit() else None
+            print(f"Resposta {status} em {url} (tentativa {attempt + 1}/{retries + 1})", flush=True)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, http_client.HTTPError) as e:
+            if attempt == retries:
+                raise
+            delay = None
+            print(f"Erro em {url}: {e!r} (tentativa {attempt + 1}/{retries + 1})", flush=True)
+        if stats is not None:
+            stats["retries"] = stats.get("retries", 0) + 1
+        await asyncio.sleep(delay if delay is not None else backoff * 2 ** attempt * (0.5 + random.random()))
+
+async def scrape_listing(listing_url=LISTING_URL, concurrency=DEFAULT_CONCURRENCY, max_pages=DEFAULT_MAX_PAGES,
+                         retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF_SECONDS, timeout=http_client.DEFAULT_TIMEOUT,
+                         checkpoint_dir=None):
+    """
+    Baixa as páginas da listagem com até `concurrency` requisições ao mesmo
+    tempo. A paginação termina na primeira página sem produtos (ou com 404).
+    Se as `max_pages` páginas têm produtos, a listagem pode continuar depois
+    delas e RuntimeError é levantado (com checkpoint, as páginas já baixadas
+    ficam salvas e uma nova execução com um limite maior baixa só as seguintes).
+
+    Com `checkpoint_dir`, cada página é gravada assim que extraída (ver
+    scrape_checkpoint) e um scraping interrompido é retomado: só as páginas
+    que faltam são baixadas. O checkpoint é concluído por quem grava a lista
+    (scrape_checkpoint.finish), depois de gravá-la.
+
+    Returns:
+        tuple: (produtos na ordem das páginas, sem repetições; dict com as contagens)
+    """
+    pages = {}
+    stats = {"pages": 0, "retries": 0, "resumed_pages": 0}
+    state = {"next_page": 1, "last_page": max_pages, "end_found": False}
+    done = set()
+    if checkpoint_dir is not None:
+        cursor = scrape_checkpoint.open_checkpoint(checkpoint_dir)
+        done.update(scrape_checkpoint.saved_pages(checkpoint_dir))
+        if cursor["end_page"] is not None:
+            state["last_page"] = min(state["last_page"], cursor["end_page"])
+            state["end_found"] = True
+        if done:
+            stats["resumed_pages"] = len(done)
+            print(f"Retomando o scraping: {len(done)} página(s) já salvas, completas até a página {cursor['completed_through']}.", flush=True)
+
+    async def worker(pool):
+        while state["next_page"] <= state["last_page"]:
+            page = state["next_page"]
+            state["next_page"] += 1
+            if page in done:
+                continue
+            status, html = await fetch_with_retry(pool, page_url(listing_url, page), retries, backoff, stats)
+            products = parse_listing_page(html) if status == 200 else []
+            if status not in (200, 404):
+                raise http_client.HTTPError(f"Página {page}: resposta {status}")
+            if not products:
+                # Fim da listagem: as páginas seguintes (já pedidas ou não) são descartadas
+                state["last_page"] = min(state["last_page"], page - 1)
+                state["end_found"] = True
+                if checkpoint_dir is not None:
+                    scrape_checkpoint.mark_end(checkpoint_dir, page - 1)
+                continue
+            if checkpoint_dir is not None:
+                scrape_checkpoint.save_page(checkpoint_dir, page, products)
+            else:
+                pages[page] = products
+            stats["pages"] += 1
+            print(f"Página {page}: {len(products)} produtos extraídos.", flush=True)
+
+    async with http_client.ConnectionPool(max_connections=concurrency, timeout=timeout) as pool:
+        await asyncio.gather(*(worker(pool) for _ in range(concurrency)))
+        stats.update(pool.stats)
+
+    if not state["end_found"]:
+        raise RuntimeError(f"As {max_pages} página(s) do limite têm produtos e a listagem pode continuar depois delas; "
+                           f"execute de novo com um --max-pages maior.")
+
+    if checkpoint_dir is not None:
+        all_products = scrape_checkpoint.consolidate(checkpoint_dir)
+    else:
+        all_products = [product for page in sorted(pages) if page <= state["last_page"] for product in pages[page]]
+    return deduplicate(all_products), stats
+
+def write_products(products, output_file=OUTPUT_FILE):
+    """Grava a lista (mesmo formato e indentação do scraper em JavaScript) de forma atômica."""
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    tmp_path = f"{output_file}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(products, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, output_file)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scraping do JSON-LD da listagem da Electric Ink sem navegador.")
+    parser.add_argument("--url", default=LISTING_URL, help=f"URL da listagem (padrão: {LISTING_URL}).")
+    parser.add_argument("--output", default=OUTPUT_FILE, help=f"Arquivo de saída (padrão: {OUTPUT_FILE}).")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Páginas baixadas ao mesmo tempo (padrão: {DEFAULT_CONCURRENCY}).")
+    parser.add_argument("--max-pages", type=int, default=DEFAULT_MAX_PAGES, help=f"Limite de páginas (padrão: {DEFAULT_MAX_PAGES}).")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help=f"Novas tentativas por página (padrão: {DEFAULT_RETRIES}).")
+    parser.add_argument("--timeout", type=float, default=http_client.DEFAULT_TIMEOUT,
+                        help=f"Tempo máximo de cada requisição em segundos (padrão: {http_client.DEFAULT_TIMEOUT}).")
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR,
+                        help=f"Diretório do checkpoint por página, usado para retomar um scraping interrompido (padrão: {CHECKPOINT_DIR}).")
+    args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error("--concurrency deve ser pelo menos 1")
+
+    started = time.perf_counter()
+    products, stats = asyncio.run(scrape_listing(args.url, args.concurrency, args.max_pages, args.retries, timeout=args.timeout,
+                                                 checkpoint_dir=args.checkpoint_dir))
+    write_products(products, args.output)
+    scrape_checkpoint.finish(args.checkpoint_dir)
+    print(f"Extração concluída em {time.perf_counter() - started:.1f}s: {len(products)} produtos únicos "
+          f"({stats['pages']} página(s) baixada(s), {stats['resumed_pages']} do checkpoint). Dados salvos em {args.output}", flush=True)
+    metrics.report(output_items=len(products), counts=stats)
@@ -0,0 +1,216 @@
+import argparse
+import hashlib
+import json
+import os
+
+import catalog_io
+import name_index
+
+# Índice de busca por nome gerado pela categorização, para a busca e o
+# autocompletar do frontend sem baixar a lista inteira.
+#
+# Layout em disco (data/listas_mescladas/indice_busca):
+#   indice.json    versão, total de produtos e arquivo de cada shard
+#   produtos.json  {"fields": [...], "rows": [[id, nome, marca, categoria, menor preço], ...]}
+#                  em ordem alfabética
+#   <c>.json       shard dos tokens que começam com o caractere <c>:
+#                  {prefixo: [ids]} para todos os prefixos desses tokens
+#
+# O id de um produto vem do hash da categoria, marca e nome (ver product_id), e
+# não da posição em "rows": incluir ou remover um produto só altera os shards
+# dos prefixos do nome dele, e os demais continuam com o mesmo conteúdo (e o
+# mesmo hash em static_artifacts).
+#
+# Os tokens são os da chave normalizada do nome (name_index.normalize_name: sem
+# acentos, minúsculos, pontuação colapsada), então "Agulhas Cartucho" e
+# "agulhas cartúcho" chegam aos mesmos ids. Uma consulta carrega só os shards
+# dos primeiros caracteres dos seus termos e cada termo é um acesso direto ao dict.
+
+SEARCH_INDEX_DIRNAME = "indice_busca"
+DEFAULT_SEARCH_INDEX_DIR = os.path.join("data/listas_mescladas", SEARCH_INDEX_DIRNAME)
+MANIFEST_FILENAME = "indice.json"
+PRODUCTS_FILENAME = "produtos.json"
+PRODUCT_FIELDS = ["id", "name", "brand", "category", "lowest_price"]
+INDEX_VERSION = 2
+# Bits do SHA-256 usados no id: abaixo de 2**53, o id é um inteiro exato no JavaScript
+PRODUCT_ID_BITS = 48
+
+def tokenize(text):
+    """Tokens normalizados (sem acentos, minúsculos) de um nome ou de uma consulta."""
+    return name_index.normalize_name(text).split()
+
+def product_id(category, brand, name):
+    """Id estável de um produto do índice: não depende dos demais produtos do catálogo."""
+    key = "\x1f".join([category, brand or "", name])
+    return int.from_bytes(hashlib.sha256(key.encode('utf-8')).digest(), 'big') >> (256 - PRODUCT_ID_BITS)
+
+def build_search_index(entries):
+    """
+    Monta o índice de busca.
+
+    Args:
+        entries (iterable): Pares (categoria, produto estruturado) da categorização.
+
+    Returns:
+        dict: rows (uma linha por produto com os campos de PRODUCT_FIELDS, em
+              ordem alfabética) e shards (primeiro caractere -> prefixo -> ids em
+              ordem crescente).
+    """
+    # A chave normalizada de cada nome é calculada uma vez: ordena as linhas e dá os tokens
+    keyed_rows = sorted((
+        (name_index.normalize_name(product["name"]), product["name"], category, product.get("brand") or "", product)
+        for category, product in entries
+    ), key=lambda row: row[:4])
+    rows = []
+    used_ids = set()
+    shards = {}
+    for key, name, category, _, product in keyed_rows:
+        row_id = product_id(category, product.get("brand"), name)
+        # Colisão (improvável com 48 bits): usa o próximo id livre
+        while row_id in used_ids:
+            row_id += 1
+        used_ids.add(row_id)
+        rows.append([row_id, name, product.get("brand"), category, product.get("lowest_price")])
+        prefixes = set()
+        for token in key.split():
+            prefixes.update(token[:length] for length in range(1, len(token) + 1))
+        for prefix in prefixes:
+            shards.setdefault(prefix[0], {}).setdefault(prefix, []).append(row_id)
+    for prefixes in shards.values():
+        for ids in prefixes.values():
+            ids.sort()
+    return {"rows": rows, "shards": shards}
+
+def _shard_filename(char):
+    return f"{char}.json"
+
+def write_search_index(index, index_dir=DEFAULT_SEARCH_INDEX_DIR):
+    """
+    Grava o índice em `index_dir` (JSON compacto). Arquivos sem alterações não
+    são reescritos e shards que deixaram de existir são removidos.
+
+    Returns:
+        dict: Quantidade de arquivos gravados (written), sem alterações (unchanged) e removidos (removed).
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    files = {
+        PRODUCTS_FILENAME: {"fields": PRODUCT_FIELDS, "rows": index["rows"]},
+    }
+    for char, prefixes in index["shards"].items():
+        files[_shard_filename(char)] = dict(sorted(prefixes.items()))
+    # O manifesto é gravado por último, depois dos arquivos que ele cita
+    files[MANIFEST_FILENAME] = {
+        "version": INDEX_VERSION,
+        "total": len(index["rows"]),
+        "products": PRODUCTS_FILENAME,
+        "shards": {char: _shard_filename(char) for char in sorted(index["shards"])},
+    }
+
+    written = unchanged = removed = 0
+    for filename, data in files.items():
+        if catalog_io.write_text_if_changed(os.path.join(index_dir, filename), catalog_io.encode_json(data, compact=True)):
+            written += 1
+        else:
+            unchanged += 1
+    for filename in sorted(os.listdir(index_dir)):
+        if filename.endswith('.json') and filename not in files:
+            os.remove(os.path.join(index_dir, filename))
+            removed += 1
+    return {"written": written, "unchanged": unchanged, "removed": removed}
+
+def entries_from_structured_dir(structured_dir, files=None):
+    """
+    Lê os produtos dos arquivos de categoria/marca de structured_by_type
+    (usado pelo modo --delta, que não tem o catálogo inteiro em memória).
+
+    Args:
+        structured_dir (str): Diretório structured_by_type.
+        files (iterable): Se informado, lê só esses arquivos (.json ou .jsonl,
+            relativos a structured_dir, como no estado da categorização);
+            arquivos que não existem mais são ignorados. Senão, lê todos os .json.
+
+    Yields:
+        tuple: (categoria, produto estruturado)
+    """
+    if files is not None:
+        for relative_path in sorted(files):
+            path = os.path.join(structured_dir, relative_path)
+            if os.path.isfile(path):
+                category = relative_path.split('/', 1)[0]
+                for product in catalog_io.iter_products(path):
+                    yield category, product
+        return
+    for category in sorted(os.listdir(structured_dir)):
+        category_dir = os.path.join(structured_dir, category)
+        if not os.path.isdir(category_dir):
+            continue
+        for filename in sorted(os.listdir(category_dir)):
+            if filename.endswith('.json'):
+                with open(os.path.join(category_dir, filename), 'r', encoding='utf-8') as f:
+                    for product in json.load(f):
+                        yield category, product
+
+def load_search_index(index_dir=DEFAULT_SEARCH_INDEX_DIR):
+    """
+    Carrega o manifesto e a tabela de produtos. Os shards são lidos sob
+    demanda por `search` e guardados no dict retornado.
+
+    Returns:
+        dict: dir, manifest, products (linhas de produtos.json), positions
+              (id -> posição da linha) e shards (cache dos shards lidos).
+    """
+    with open(os.path.join(index_dir, MANIFEST_FILENAME), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    with open(os.path.join(index_dir, manifest["products"]), 'r', encoding='utf-8') as f:
+        products = json.load(f)
+    positions = {row[0]: position for position, row in enumerate(products["rows"])}
+    return {"dir": index_dir, "manifest": manifest, "products": products, "positions": positions, "shards": {}}
+
+def _shard(index, char):
+    if char not in index["shards"]:
+        filename = index["manifest"]["shards"].get(char)
+        shard = {}
+        if filename is not None:
+            with open(os.path.join(index["dir"], filename), 'r', encoding='utf-8') as f:
+                shard = json.load(f)
+        index["shards"][char] = shard
+    return index["shards"][char]
+
+def search(index, query, limit=20):
+    """
+    Busca produtos cujo nome tem, para cada termo da consulta, um token que
+    começa com esse termo (ex.: "agu cart" encontra "Agulhas Cartucho ...").
+
+    Args:
+        index (dict): Índice carregado com `load_search_index`.
+        query (str): Texto digitado (acentos e maiúsculas são ignorados).
+        limit (int): Número máximo de resultados (None para todos).
+
+    Returns:
+        list: Dicts com os campos de PRODUCT_FIELDS, em ordem alfabética.
+    """
+    ids = None
+    for term in tokenize(query):
+        matches = _shard(index, term[0]).get(term, [])
+        ids = set(matches) if ids is None else ids.intersection(matches)
+        if not ids:
+            return []
+    if ids is None:
+        return []
+    fields = index["products"]["fields"]
+    rows = index["products"]["rows"]
+    # Ids em shards que não estão em produtos.json (índice gravado pela metade) são ignorados
+    positions = sorted(index["positions"][row_id] for row_id in ids if row_id in index["positions"])
+    if limit:
+        positions = positions[:limit]
+    return [dict(zip(fields, rows[position])) for position in positions]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consulta o índice de busca gerado pela categorização.")
+    parser.add_argument("query", help="Texto da busca (ex.: \"tinta preta\").")
+    parser.add_argument("--dir", default=DEFAULT_SEARCH_INDEX_DIR, help=f"Diretório do índice (padrão: {DEFAULT_SEARCH_INDEX_DIR}).")
+    parser.add_argument("--limite", type=int, default=20, help="Número máximo de resultados (padrão: 20).")
+    args = parser.parse_args()
+
+    for product in search(load_search_index(args.dir), args.query, args.limite):
+        print(f"{product['name']} [{product['brand']}, {product['category']}] {product['lowest_price']}")
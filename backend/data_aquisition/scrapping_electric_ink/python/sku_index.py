@@ -0,0 +1,99 @@
+import json
+import os
+
+import name_index
+import option_parser
+import prices
+
+# Índice de variantes por SKU, salvo ao lado da lista mesclada
+SKU_INDEX_FILENAME = "variantes_sku.json"
+
+def json_ld_offers(record):
+    """
+    Ofertas (sku, preço em centavos, nome) de um produto da lista JSON-LD.
+
+    Usa o campo "variants" do scraper quando existe. Em listas antigas, que só
+    têm os SKUs e o conjunto de preços, o preço de cada SKU só é conhecido
+    quando há um único preço para todas as ofertas; senão fica None.
+
+    Returns:
+        list: Dicts com sku, price_cents e name.
+    """
+    if record.get('variants'):
+        return [
+            {"sku": str(variant['sku']), "price_cents": prices.parse_brl_cents(variant.get('price')), "name": variant.get('name')}
+            for variant in record['variants'] if variant.get('sku')
+        ]
+    price_list = {cents for cents in map(prices.parse_brl_cents, record.get('availablePrice', [])) if cents is not None}
+    shared_price = price_list.pop() if len(price_list) == 1 else None
+    return [{"sku": str(sku), "price_cents": shared_price, "name": None} for sku in record.get('availableOptions', [])]
+
+def _match_label(offer, offers, labels, label_keys):
+    # 1. O nome da oferta contém um dos rótulos do HTML (ex.: "Batoque Azul - G (200 Un.)")
+    if offer["name"]:
+        offer_key = name_index.normalize_name(offer["name"])
+        matches = [label for label, key in zip(labels, label_keys) if key and (offer_key == key or offer_key.endswith(' ' + key))]
+        if len(matches) == 1:
+            return matches[0]
+    # 2. Um único SKU e um único rótulo
+    if len(offers) == 1 and len(labels) == 1:
+        return labels[0]
+    return None
+
+def build_sku_index(offers_by_product, labels_by_product):
+    """
+    Monta o índice de variantes por SKU.
+
+    Args:
+        offers_by_product (dict): Nome do produto na lista mesclada -> ofertas (json_ld_offers).
+        labels_by_product (dict): Nome do produto -> rótulos das opções do HTML.
+
+    Returns:
+        dict: SKU -> {sku, product, label, price_cents, quantity}. O rótulo (e a
+              quantidade) só é preenchido quando o par SKU -> rótulo é inequívoco.
+    """
+    index = {}
+    for product_name, offers in offers_by_product.items():
+        labels = labels_by_product.get(product_name, [])
+        label_keys = [name_index.normalize_name(label) for label in labels]
+        for offer in offers:
+            label = _match_label(offer, offers, labels, label_keys)
+            index[offer["sku"]] = {
+                "sku": offer["sku"],
+                "product": product_name,
+                "label": label,
+                "price_cents": offer["price_cents"],
+                "quantity": option_parser.quantity_dict(label or offer["name"]),
+            }
+    return dict(sorted(index.items()))
+
+def priced_variants(index):
+    """
+    Preço de cada SKU agrupado por produto, para o histórico de preços.
+    Só entram os produtos em que todos os SKUs têm preço conhecido.
+
+    Returns:
+        dict: Nome do produto -> lista de (sku, centavos).
+    """
+    by_product = {}
+    for entry in index.values():
+        by_product.setdefault(entry["product"], []).append((entry["sku"], entry["price_cents"]))
+    return {
+        product: variants for product, variants in by_product.items()
+        if all(cents is not None for _, cents in variants)
+    }
+
+def write_sku_index(path, index):
+    """Grava o índice de SKUs (arquivo temporário + os.replace)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def load_sku_index(path):
+    """
+    Carrega o índice de SKUs gravado pela mesclagem. A busca de uma variante
+    é um acesso direto ao dict: index["2925"].
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,107 @@
+import os
+
+# Registro das fontes da mesclagem (ver merge_lists.merge_product_lists).
+#
+# As fontes são mescladas na ordem da lista: a primeira é a fonte principal e
+# cada uma das seguintes se junta aos produtos das fontes anteriores pelo nome
+# (exato ou normalizado, ver name_index). Os produtos que não encontram par são
+# acrescentados à lista mesclada. Para incluir uma nova loja ou uma lista
+# específica de marca basta acrescentar uma entrada aqui.
+#
+# Campos de cada fonte:
+#   name            identificador (usado nas métricas e no relatório de junção)
+#   label           nome exibido nas mensagens
+#   path            arquivo da lista, relativo à raiz do projeto
+#   producer        script que gera a lista (citado quando o arquivo não existe)
+#   required        se False, a mesclagem continua sem a fonte quando o arquivo não existe
+#   join            None (a fonte nunca se junta, todos os produtos são acrescentados),
+#                   "normalized" (nome exato ou normalizado) ou "fuzzy" (também junção aproximada)
+#   match_fields    campos copiados para o produto existente quando há par:
+#                   "overwrite" sempre substitui, "fill" só preenche se estiver vazio
+#   add_fields      campos lidos da fonte quando o produto é acrescentado
+#   brand_rules     regras de marca aplicadas ao nome dos produtos acrescentados
+#   default_brand   marca dos produtos acrescentados que não casam com nenhuma regra
+#                   (se "brand" está em add_fields, vale a marca do registro)
+#   default_material_type
+#                   tipo de material quando o registro não tem materialType
+#   offers          se True, os registros trazem SKUs e preços por oferta (ver sku_index)
+#   join_report     se True, os pares e os nomes sem par entram no relatorio_juncao.json
+#
+# Campos de produto: "options" (availableOptions), "prices" (availablePrice),
+# "material_type" (materialType) e "brand".
+
+# Marcas identificadas pelo nome do produto. A primeira regra que casa define a
+# marca e, se informado, sobrescreve o tipo de material.
+BRAND_RULES = [
+    # Regra 1: Se contém "EG", a marca é "Easy Glow"
+    {"brand": "Easy Glow", "material_type": "Tintas", "contains": [" EG"]},
+    # Regra 2: Se contém "INTZ", a marca é "Intenze" e o tipo é "Tintas"
+    {"brand": "Intenze", "material_type": "Tintas", "contains": ["INTZ"]},
+]
+
+SOURCES = [
+    {
+        "name": "json_ld",
+        "label": "JSON-LD",
+        "path": "data/listas_brutas/lista_json_ld.json",
+        "producer": "scrape_json_ld_only.js",
+        "required": True,
+        # Fonte principal: prioridade para preços e tipo. As opções vêm do HTML.
+        "join": None,
+        "match_fields": {},
+        "add_fields": ["prices"],
+        "brand_rules": BRAND_RULES,
+        "default_brand": "Electric Ink",
+        "default_material_type": "Outros",
+        "offers": True,
+        "join_report": False,
+    },
+    {
+        "name": "html",
+        "label": "HTML",
+        "path": "data/listas_brutas/lista_html.json",
+        "producer": "scrape_html_only.js",
+        "required": True,
+        # As opções do HTML substituem as do JSON-LD; sem par, o produto entra como fallback
+        "join": "fuzzy",
+        "match_fields": {"options": "overwrite"},
+        "add_fields": ["options", "prices"],
+        "brand_rules": BRAND_RULES,
+        "default_brand": "Electric Ink",
+        "default_material_type": "Outros",
+        "offers": False,
+        "join_report": True,
+    },
+    {
+        "name": "cosmetics",
+        "label": "cosméticos",
+        "path": "data/listas_brutas/lista_cosmeticos.json",
+        "producer": "scrape_cosmetics.js",
+        "required": False,
+        # O materialType dos cosméticos já vem categorizado corretamente
+        "join": "normalized",
+        "match_fields": {"options": "fill", "prices": "fill", "material_type": "overwrite"},
+        "add_fields": ["options", "prices", "brand"],
+        "brand_rules": [],
+        "default_brand": "Electric Ink",
+        "default_material_type": "Outros Cosméticos",
+        "offers": False,
+        "join_report": False,
+    },
+]
+
+def match_brand_rule(name, rules):
+    """
+    Primeira regra de marca que casa com o nome do produto.
+
+    Returns:
+        dict: A regra (brand e, opcionalmente, material_type), ou None.
+    """
+    for rule in rules:
+        if any(fragment in name for fragment in rule["contains"]):
+            return rule
+    return None
+
+def source_paths(sources=SOURCES, base_dir=None):
+    """Caminhos dos arquivos das fontes, relativos a `base_dir` (padrão: diretório atual)."""
+    return [os.path.join(base_dir or '.', source["path"]) for source in sources]
@@ -0,0 +1,92 @@
+import json
+import os
+import time
+
+import catalog_io
+
+# Manifesto com os hashes de entradas, código e saídas de cada estágio da pipeline
+DEFAULT_MANIFEST_PATH = "data/.stage_cache.json"
+
+def hash_paths(paths):
+    """
+    Calcula o hash de cada caminho da lista. Diretórios são percorridos
+    recursivamente e cada arquivo dentro deles entra no resultado.
+    Caminhos inexistentes são registrados com hash None.
+
+    Args:
+        paths (list): Lista de arquivos ou diretórios.
+
+    Returns:
+        dict: Caminho do arquivo -> hash SHA-256 (ou None se não existir).
+    """
+    hashes = {}
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for filename in files:
+                    file_path = os.path.join(root, filename)
+                    hashes[file_path] = catalog_io.hash_file(file_path)
+        else:
+            hashes[path] = catalog_io.hash_file(path)
+    return dict(sorted(hashes.items()))
+
+def load_manifest(manifest_path=DEFAULT_MANIFEST_PATH):
+    """Lê o manifesto do cache. Retorna um manifesto vazio se não existir ou estiver corrompido."""
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"Aviso: Manifesto de cache '{manifest_path}' ilegível ({e}). Todos os estágios serão executados.")
+        return {}
+
+def save_manifest(manifest, manifest_path=DEFAULT_MANIFEST_PATH):
+    """Grava o manifesto do cache de forma atômica (arquivo temporário + os.replace)."""
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+
+def stage_fingerprint(stage):
+    """Retorna os hashes atuais das entradas e do código de um estágio."""
+    return {
+        "inputs": hash_paths(stage.get("inputs", [])),
+        "code": hash_paths(stage.get("code", [])),
+    }
+
+def is_stage_fresh(manifest, stage, now=None):
+    """
+    Indica se um estágio pode ser pulado: entradas e código iguais aos da
+    última execução bem-sucedida e saídas ainda intactas no disco.
+
+    Estágios com "max_age_seconds" (os scrapers, cujas entradas estão na rede e
+    não podem ser hasheadas) também expiram depois desse tempo: uma execução
+    mais antiga que isso nunca é considerada atual. Com 0, o estágio sempre roda.
+    """
+    entry = manifest.get(stage["name"])
+    if not entry:
+        return False
+
+    max_age = stage.get("max_age_seconds")
+    if max_age is not None:
+        recorded_at = entry.get("recorded_at")
+        if recorded_at is None or (now if now is not None else time.time()) - recorded_at >= max_age:
+            return False
+
+    fingerprint = stage_fingerprint(stage)
+    if entry.get("inputs") != fingerprint["inputs"] or entry.get("code") != fingerprint["code"]:
+        return False
+
+    recorded_outputs = entry.get("outputs", {})
+    if not recorded_outputs:
+        return False
+    return hash_paths(stage.get("outputs", [])) == recorded_outputs
+
+def record_stage(manifest, stage):
+    """Registra no manifesto os hashes de entradas, código e saídas de um estágio recém-executado."""
+    fingerprint = stage_fingerprint(stage)
+    fingerprint["outputs"] = hash_paths(stage.get("outputs", []))
+    fingerprint["recorded_at"] = round(time.time(), 3)
+    manifest[stage["name"]] = fingerprint
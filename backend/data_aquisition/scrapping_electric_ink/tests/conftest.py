@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Os módulos da pipeline ficam em python/ e são importados pelo nome (como no engine.py)
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_DIR, "python"))
@@ -0,0 +1,36 @@
+import json
+import os
+
+import pytest
+
+import catalog_io
+
+# encode_json indentado produz o mesmo texto que json.dumps(indent=2, ensure_ascii=False),
+# usado nos arquivos de structured_by_type gravados antes do codificador próprio.
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STRUCTURED_DIR = os.path.join(PROJECT_DIR, "data", "listas_mescladas", "structured_by_type")
+
+@pytest.mark.parametrize("value", [
+    None, True, False, 0, -12, 10 ** 20, 1.5, 1e-7, float("inf"), float("nan"),
+    "", "Tinta Azul \"Royal\" – 30ml\n\t\u0007", [], {}, [[[]]], {"a": {}},
+    {"ok": [1, {"b": []}, {}], "chaves": {1: 2, True: None, 2.5: "x", None: []}},
+    ("tupla", 1),
+])
+def test_encode_json_matches_json_dumps(value):
+    assert catalog_io.encode_json(value) == json.dumps(value, indent=2, ensure_ascii=False)
+
+def test_encode_json_matches_structured_files():
+    products = []
+    for root, _, filenames in os.walk(STRUCTURED_DIR):
+        for filename in filenames:
+            if filename.endswith('.json'):
+                with open(os.path.join(root, filename), 'r', encoding='utf-8') as f:
+                    products.append(json.load(f))
+    assert products
+    for value in products:
+        assert catalog_io.encode_json(value) == json.dumps(value, indent=2, ensure_ascii=False)
+
+def test_encode_json_rejects_unknown_types():
+    with pytest.raises(TypeError):
+        catalog_io.encode_json({"valor": {1, 2}})
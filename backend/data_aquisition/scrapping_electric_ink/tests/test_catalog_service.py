@@ -0,0 +1,167 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+import catalog_service
+import http_client
+
+# Serviço do catálogo em uma porta livre, com um structured_by_type sintético.
+# Os limites de latência são folgados (o cliente do teste de carga roda no
+# mesmo processo e no mesmo loop que o serviço): servem para pegar uma consulta
+# que voltou a varrer o catálogo inteiro, não como benchmark.
+
+CATEGORIES = {
+    "tintas": ("Tintas", ["Tinta Preta", "Tinta Branca", "Pigmento Vermelho", "Tinta Amarela"]),
+    "agulhas_e_cartuchos": ("Agulhas e Cartuchos", ["Cartucho Round Liner", "Agulha Magnum", "Cartucho Shader"]),
+    "batoques": ("Batoques", ["Batoque Silicone", "Ink Cap Colorido"]),
+}
+BRANDS = ["Electric Ink", "Intenze", "Easy Glow", "Cheyenne"]
+
+def write_catalog(structured_dir, per_brand=40):
+    """Grava categorias/marcas com `per_brand` produtos cada (no formato da categorização)."""
+    for category, (material_type, names) in CATEGORIES.items():
+        os.makedirs(os.path.join(structured_dir, category), exist_ok=True)
+        for brand in BRANDS:
+            products = []
+            for i in range(per_brand):
+                cents = 500 + 137 * i
+                products.append({
+                    "name": f"{names[i % len(names)]} {brand} {i}",
+                    "brand": brand,
+                    "lowest_price": f"R$ {cents // 100},{cents % 100:02d}",
+                    "material_type": material_type,
+                })
+            path = os.path.join(structured_dir, category, f"{brand.lower().replace(' ', '_')}.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(products, f, ensure_ascii=False)
+
+@pytest.fixture
+def structured_dir(tmp_path):
+    path = str(tmp_path / "structured_by_type")
+    write_catalog(path)
+    return path
+
+def run_with_service(structured_dir, scenario, reload_interval=60.0):
+    """Inicia o serviço e executa `scenario(base_url, state)` no mesmo loop."""
+    async def run():
+        server, state, reloader = await catalog_service.start_service(structured_dir, port=0, reload_interval=reload_interval)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            async with server:
+                return await scenario(f"http://127.0.0.1:{port}", state)
+        finally:
+            reloader.cancel()
+            # Deixa as conexões do servidor verem o fechamento dos clientes antes de o loop terminar
+            await asyncio.sleep(0.05)
+    return asyncio.run(run())
+
+def test_load_test_latency(structured_dir):
+    async def scenario(base_url, state):
+        return await catalog_service.load_test(base_url, clients=8, total_requests=2000)
+
+    result = run_with_service(structured_dir, scenario)
+    print(json.dumps(result, indent=2))
+    assert result["requests"] == 2000
+    assert result["errors"] == 0
+    assert result["server_latency"]["p50_ms"] <= result["server_latency"]["p99_ms"] < 50
+    assert result["client_latency"]["p50_ms"] <= result["client_latency"]["p99_ms"] < 500
+
+def test_unexpected_error_returns_500(structured_dir, monkeypatch):
+    handle_request = catalog_service.handle_request
+
+    def failing(state, method, target):
+        if target.startswith("/falha"):
+            raise KeyError("falha")
+        return handle_request(state, method, target)
+
+    monkeypatch.setattr(catalog_service, "handle_request", failing)
+
+    async def scenario(base_url, state):
+        async with http_client.ConnectionPool(max_connections=1) as pool:
+            failed = await pool.get(base_url + "/falha")
+            health = await pool.get(base_url + "/saude")
+            return failed, health, pool.stats
+
+    (status, _, body), (health_status, _, _), stats = run_with_service(structured_dir, scenario)
+    assert status == 500
+    assert json.loads(body) == {"erro": "Erro interno do serviço"}
+    # A mesma conexão continua atendendo
+    assert health_status == 200
+    assert stats["connections_opened"] == 1
+
+def test_load_gives_up_when_catalog_keeps_changing(structured_dir, monkeypatch):
+    signatures = iter(range(1000))
+    monkeypatch.setattr(catalog_service, "catalog_signature", lambda structured_dir: (next(signatures),))
+    with pytest.raises(RuntimeError, match="3 leituras"):
+        catalog_service.load_catalog_index(structured_dir, attempts=3, backoff=0)
+
+def test_failed_reload_keeps_previous_index(structured_dir, monkeypatch):
+    load_catalog_index = catalog_service.load_catalog_index
+
+    async def scenario(base_url, state):
+        before = state["index"]
+
+        def failing(*args, **kwargs):
+            raise RuntimeError("structured_by_type mudou")
+
+        monkeypatch.setattr(catalog_service, "load_catalog_index", failing)
+        write_catalog(structured_dir, per_brand=41)
+        await asyncio.sleep(0.3)
+        assert state["index"] is before
+        assert state["reloads"] == 0
+
+        # Na verificação seguinte, com a leitura funcionando, o índice novo é publicado
+        monkeypatch.setattr(catalog_service, "load_catalog_index", load_catalog_index)
+        for _ in range(50):
+            if state["reloads"]:
+                break
+            await asyncio.sleep(0.05)
+        return len(before["products"]), len(state["index"]["products"])
+
+    before, after = run_with_service(structured_dir, scenario, reload_interval=0.05)
+    assert (before, after) == (480, 492)
+
+def test_load_test_samples_the_whole_catalog(structured_dir, monkeypatch):
+    # Com páginas de 100 produtos, o catálogo de 480 só é lido inteiro paginando
+    monkeypatch.setattr(catalog_service, "MAX_LIMIT", 100)
+    sample_queries = catalog_service._sample_queries
+    sampled = {}
+
+    def capture(catalog, count, seed=0):
+        sampled["names"] = [product["name"] for product in catalog["products"]]
+        return sample_queries(catalog, count, seed)
+
+    monkeypatch.setattr(catalog_service, "_sample_queries", capture)
+
+    async def scenario(base_url, state):
+        await catalog_service.load_test(base_url, clients=2, total_requests=50)
+        return [product["name"] for product in state["index"]["products"]]
+
+    names = run_with_service(structured_dir, scenario)
+    assert len(names) == 480
+    assert sampled["names"] == names
+
+def test_serves_the_files_listed_in_state(structured_dir):
+    # Depois de uma execução --stream, o estado lista os .jsonl; os .json antigos não são servidos
+    jsonl_file = os.path.join(structured_dir, "tintas", "intenze.jsonl")
+
+    def write_jsonl(names):
+        with open(jsonl_file, 'w', encoding='utf-8') as f:
+            for name in names:
+                f.write(json.dumps({"name": name, "brand": "Intenze", "lowest_price": "R$ 10,00"}) + "\n")
+
+    write_jsonl(["Tinta Preta Intenze", "Tinta Branca Intenze"])
+    with open(os.path.join(os.path.dirname(structured_dir), "estado_categorizacao.json"), 'w', encoding='utf-8') as f:
+        json.dump({"merged_sha256": "0" * 64, "format": "jsonl", "files": ["tintas/intenze.jsonl"]}, f)
+
+    index = catalog_service.load_catalog_index(structured_dir)
+    assert [product["name"] for product in index["products"]] == ["Tinta Branca Intenze", "Tinta Preta Intenze"]
+
+    # Um .json fora do estado não muda a assinatura; o .jsonl do estado muda
+    signature = catalog_service.catalog_signature(structured_dir)
+    write_catalog(structured_dir, per_brand=41)
+    assert catalog_service.catalog_signature(structured_dir) == signature
+    write_jsonl(["Tinta Preta Intenze"])
+    assert catalog_service.catalog_signature(structured_dir) != signature
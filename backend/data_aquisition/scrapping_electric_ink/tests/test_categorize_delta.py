@@ -0,0 +1,105 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import catalog_delta
+import catalog_io
+import categorize_products
+import search_index
+
+# Modo --delta da categorização: aplicado sobre uma categorização completa em
+# JSON, o resultado é o mesmo da transformação completa; depois de uma execução
+# --stream (arquivos .jsonl) ele não é aplicado, e o script não aceita --delta
+# junto com --stream ou --sqlite.
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(PROJECT_DIR, "python", "categorize_products.py")
+MERGED_LIST = os.path.join(PROJECT_DIR, "data", "listas_mescladas", "lista_final_mesclada.json")
+
+def _catalogs():
+    # Lista "anterior" com 80 produtos da lista mesclada do repositório e a
+    # "atual" com um preço alterado, um produto removido e um novo
+    with open(MERGED_LIST, 'r', encoding='utf-8') as f:
+        records = json.load(f)[:80]
+    current = [dict(record) for record in records[1:]]
+    current[0]["availablePrice"] = ["R$ 1,00"]
+    current.append(dict(records[0], name="Produto Novo do Delta"))
+    return records, current
+
+def _write_list(path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(records, f, indent=2, ensure_ascii=False)
+
+def _write_changes(tmp_path, previous_path, current_path):
+    changes = catalog_delta.diff_catalogs(
+        catalog_delta.load_snapshot(previous_path),
+        list(catalog_io.iter_products(current_path)),
+        catalog_io.hash_file(previous_path),
+        catalog_io.hash_file(current_path),
+    )
+    changes_file = str(tmp_path / catalog_delta.CHANGELOG_FILENAME)
+    _write_list(changes_file, changes)
+    return changes_file
+
+def _outputs(output_dir):
+    # Conteúdo dos arquivos de categoria/marca, do cosmeticos.json e do índice de busca
+    files = {}
+    base = os.path.dirname(output_dir)
+    for directory in (output_dir, os.path.join(base, search_index.SEARCH_INDEX_DIRNAME)):
+        for root, _, filenames in os.walk(directory):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                with open(path, 'r', encoding='utf-8') as f:
+                    files[os.path.relpath(path, base)] = f.read()
+    return files
+
+@pytest.fixture
+def lists(tmp_path):
+    previous, current = _catalogs()
+    previous_path, current_path = str(tmp_path / "anterior.json"), str(tmp_path / "atual.json")
+    _write_list(previous_path, previous)
+    _write_list(current_path, current)
+    return previous_path, current_path
+
+def test_delta_matches_full_run(tmp_path, lists):
+    previous_path, current_path = lists
+    output_dir = str(tmp_path / "delta" / "structured_by_type")
+    assert categorize_products.categorize_file(previous_path, output_dir)
+    # Arquivo que a categorização não gravou: não entra no índice nem é removido
+    manual_file = os.path.join(output_dir, "luvas", "manual.json")
+    os.makedirs(os.path.dirname(manual_file), exist_ok=True)
+    _write_list(manual_file, [{"name": "Luva Manual", "brand": "Manual", "lowest_price": "R$ 1,00"}])
+
+    assert categorize_products.apply_catalog_changes(_write_changes(tmp_path, previous_path, current_path), output_dir)
+
+    full_dir = str(tmp_path / "completo" / "structured_by_type")
+    assert categorize_products.categorize_file(current_path, full_dir)
+    delta_outputs = _outputs(output_dir)
+    assert delta_outputs.pop(os.path.join("structured_by_type", "luvas", "manual.json"))
+    assert delta_outputs == _outputs(full_dir)
+
+def test_delta_after_stream_run_falls_back(tmp_path, lists):
+    previous_path, current_path = lists
+    output_dir = str(tmp_path / "structured_by_type")
+    assert categorize_products.categorize_file(previous_path, output_dir, stream=True)
+    before = _outputs(output_dir)
+    assert categorize_products.load_state(output_dir)["format"] == "jsonl"
+
+    # O log parte da lista categorizada, mas as saídas são .jsonl: o delta não é aplicado
+    changes_file = _write_changes(tmp_path, previous_path, current_path)
+    assert not categorize_products.apply_catalog_changes(changes_file, output_dir)
+    assert _outputs(output_dir) == before
+
+    # Nem dado como já aplicado quando a lista nova foi categorizada com --stream
+    assert categorize_products.categorize_file(current_path, output_dir, stream=True)
+    assert not categorize_products.apply_catalog_changes(changes_file, output_dir)
+
+@pytest.mark.parametrize("option", [["--stream"], ["--sqlite", "catalogo.sqlite"]])
+def test_delta_rejects_stream_and_sqlite(tmp_path, option):
+    result = subprocess.run([sys.executable, SCRIPT, "--delta", *option], cwd=str(tmp_path), capture_output=True, text=True)
+    assert result.returncode == 2
+    assert f"--delta não pode ser usado com {option[0]}" in result.stderr
+    assert not os.path.exists(tmp_path / "data" / "listas_mescladas" / "structured_by_type")
@@ -0,0 +1,55 @@
+import json
+import os
+
+import pytest
+
+import categorize_products
+import merge_lists
+import sources
+
+# Teste de referência da classificação: material_type e tipo de cada produto das
+# listas brutas do repositório, comparados com o snapshot em golden/classificacao.json.
+# O snapshot foi gerado pelas cadeias de if/elif que a tabela de regras do
+# classifier.py substituiu, aplicadas à lista mesclada dessas mesmas listas.
+# Depois de uma mudança intencional nas regras, regenere com:
+#   ATUALIZAR_GOLDEN=1 python3 -m pytest tests/test_classifier.py
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GOLDEN_PATH = os.path.join(PROJECT_DIR, "tests", "golden", "classificacao.json")
+
+def _row_key(row):
+    return (row["category"], row["brand"], row["name"], row["material_type"], row.get("tipo") or "")
+
+def classification_rows():
+    """Categoria, marca, nome, material_type e tipo (quando a categoria tem) de cada produto categorizado."""
+    source_lists = [
+        (source, merge_lists.load_products(path))
+        for source, path in zip(sources.SOURCES, sources.source_paths(sources.SOURCES, PROJECT_DIR))
+    ]
+    products = merge_lists.merge_product_lists(source_lists)["products"]
+    rows = []
+    for category, structured_products in categorize_products.transform_and_structure_data(products).items():
+        for product in structured_products:
+            row = {"category": category, "brand": product["brand"], "name": product["name"], "material_type": product["material_type"]}
+            if "tipo" in product:
+                row["tipo"] = product["tipo"]
+            rows.append(row)
+    return sorted(rows, key=_row_key)
+
+@pytest.fixture(scope="module")
+def rows():
+    return classification_rows()
+
+@pytest.fixture(scope="module")
+def golden(rows):
+    if os.environ.get("ATUALIZAR_GOLDEN"):
+        with open(GOLDEN_PATH, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+    with open(GOLDEN_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def test_every_product_matches_golden(rows, golden):
+    assert len(rows) == len(golden)
+    mismatches = [(expected, actual) for expected, actual in zip(golden, rows) if expected != actual]
+    assert not mismatches, f"{len(mismatches)} produto(s) com classificação diferente, ex.: {mismatches[:3]}"
@@ -0,0 +1,27 @@
+import asyncio
+import sys
+
+import engine
+
+# Estágios executados no próprio processo do engine: a saída impressa por eles
+# recebe o prefixo [estágio], como a dos estágios executados em subprocesso.
+
+def test_in_process_stage_output_is_prefixed(capsys):
+    def run(context, cwd):
+        print("primeira linha")
+        print("segunda", end="")
+        print(" linha")
+        print("aviso", file=sys.stderr)
+        context["ran"] = True
+
+    stage = {"name": "merge", "run": run}
+    context = {}
+    asyncio.run(engine.run_in_process_stage(stage, context))
+    captured = capsys.readouterr()
+
+    assert context == {"ran": True}
+    assert captured.out.splitlines() == ["[merge] primeira linha", "[merge] segunda linha"]
+    assert captured.err.splitlines() == ["[merge][stderr] aviso"]
+    # Fora do estágio a saída volta a ser a original, sem prefixo
+    print("depois")
+    assert capsys.readouterr().out == "depois\n"
@@ -0,0 +1,35 @@
+import pytest
+
+import categorize_products
+import model
+import option_parser
+
+# Contagem de unidades dos rótulos de opção: o mesmo padrão que a categorização
+# usava antes do parser ("20 Un.", "200 un.", "12 unidades"); sem o ponto não conta.
+
+@pytest.mark.parametrize("label, unit_count", [
+    ("20 Un.", 20),
+    ("G (200 Un.)", 200),
+    ("01 un. (esgotado)", 1),
+    ("12 unidades", 12),
+    ("50 UN.", 50),
+    ("20 un", None),
+    ("10 Unid", None),
+    ("30ml", None),
+])
+def test_unit_count(label, unit_count):
+    assert option_parser.parse_option(label).unit_count == unit_count
+
+def test_stencil_options_use_unit_count():
+    product = model.Product.create(
+        "Tattoo Stencil Transfer 120ml", "Electric Ink", "Materiais para Stencil",
+        ["120ml", "20 Un.", "20 un"], ["R$ 45,00"],
+    )
+    _, structured = categorize_products.structure_product(product)
+    assert structured["opcoes"] == [
+        {"medida_string": "120ml", "medida_valor": "120ml"},
+        {"medida_string": "20 Un.", "quantidade": 20},
+    ]
+    assert [option["quantity"] for option in structured["available_options"]] == [
+        {"value": 120, "unit": "ml"}, {"value": 20, "unit": "un"}, None,
+    ]
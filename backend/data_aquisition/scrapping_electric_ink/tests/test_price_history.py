@@ -0,0 +1,37 @@
+import model
+import price_history
+import sku_index
+
+# Chaves das variantes no histórico de preços: o SKU quando o preço de cada SKU
+# é conhecido; senão a posição do preço, que não é apresentada como opção.
+
+def _product(options, price_strings):
+    return model.Product.create("Batoque Azul", "Electric Ink", "Batoques", options, price_strings)
+
+def test_variant_keys_are_price_positions():
+    # availablePrice é um conjunto ordenado por valor: não acompanha as opções
+    product = _product(["G (200 Un.)", "01 Un.", "20 Un."], ["R$ 1,00", "R$ 9,90", "R$ 45,00"])
+    assert price_history.variant_keys(product) == [("0", 100), ("1", 990), ("2", 4500)]
+
+def test_record_run_keys_priced_skus_by_sku(tmp_path):
+    history_dir = str(tmp_path / "historico_precos")
+    index = sku_index.build_sku_index(
+        {"Batoque Azul": [
+            {"sku": "11", "price_cents": 100, "name": "Batoque Azul - 01 Un."},
+            {"sku": "12", "price_cents": 4500, "name": "Batoque Azul - G (200 Un.)"},
+        ]},
+        {"Batoque Azul": ["01 Un.", "G (200 Un.)"]},
+    )
+    product = _product(["01 Un.", "G (200 Un.)"], ["R$ 1,00", "R$ 45,00"])
+    price_history.record_run([product], history_dir, timestamp=1, variant_prices=sku_index.priced_variants(index))
+
+    # A opção 01 Un. esgota e sai do availablePrice; o preço da G sobe
+    index["12"]["price_cents"] = 4900
+    del index["11"]
+    product = _product(["01 Un. (esgotado)", "G (200 Un.)"], ["R$ 49,00"])
+    price_history.record_run([product], history_dir, timestamp=2, variant_prices=sku_index.priced_variants(index))
+
+    history = price_history.load_history(history_dir)
+    assert price_history.price_series(history, "Batoque Azul") == {"11": [(1, 100)], "12": [(1, 4500), (2, 4900)]}
+    moves = price_history.biggest_moves(history, 0)
+    assert [(move["variant"], move["previous_cents"], move["current_cents"]) for move in moves] == [("12", 4500, 4900)]
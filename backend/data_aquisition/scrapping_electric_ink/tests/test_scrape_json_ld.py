@@ -0,0 +1,55 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+import fixture_server
+import scrape_json_ld
+
+# Scraper em Python contra o fixture_server, sem rede. As páginas em
+# fixtures/json_ld foram geradas com `fixture_server.py synthesize --per-page 4`
+# a partir de 10 produtos de lista_json_ld.json, um produto com variantes e uma
+# repetição do primeiro na última página; esperado.json é a lista que o
+# scraper deve gravar a partir delas.
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "json_ld")
+
+def _expected():
+    with open(os.path.join(FIXTURES_DIR, "esperado.json"), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def scrape(**options):
+    """Executa scrape_listing contra as fixtures servidas em uma porta livre."""
+    async def run():
+        server = await fixture_server.start_server(FIXTURES_DIR, port=0, fail_every=options.pop("fail_every", 0))
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            try:
+                return await scrape_json_ld.scrape_listing(f"http://127.0.0.1:{port}/tatuagem", backoff=0, **options)
+            finally:
+                # Deixa as conexões do servidor verem o fechamento do pool antes de o loop terminar
+                await asyncio.sleep(0.05)
+    return asyncio.run(run())
+
+def test_scrapes_every_page_once():
+    products, stats = scrape(concurrency=2)
+    assert products == _expected()
+    assert stats["pages"] == 3
+
+def test_retries_failed_pages():
+    products, stats = scrape(concurrency=2, fail_every=2)
+    assert products == _expected()
+    # Páginas 2 e 4 (a que marca o fim da listagem) respondem 503 uma vez
+    assert stats["retries"] == 2
+
+def test_page_limit_fails_instead_of_truncating(tmp_path):
+    checkpoint_dir = str(tmp_path / "checkpoint")
+    with pytest.raises(RuntimeError, match="--max-pages"):
+        scrape(max_pages=2, checkpoint_dir=checkpoint_dir)
+
+    # As páginas do limite ficaram no checkpoint: com um limite maior, só a última é baixada
+    products, stats = scrape(checkpoint_dir=checkpoint_dir)
+    assert products == _expected()
+    assert stats["resumed_pages"] == 2
+    assert stats["pages"] == 1
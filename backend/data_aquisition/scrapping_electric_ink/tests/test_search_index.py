@@ -0,0 +1,49 @@
+import os
+
+import search_index
+
+# Os ids do índice de busca não podem depender da posição do produto no
+# catálogo: incluir ou remover um produto só deve regravar os shards dos
+# prefixos do nome dele.
+
+CATALOG = [
+    ("tintas", {"name": "Tinta Preta Dinamite 30ml", "brand": "Electric Ink", "lowest_price": "R$ 50,00"}),
+    ("tintas", {"name": "Tinta Branca Opaca 30ml", "brand": "Electric Ink", "lowest_price": "R$ 45,00"}),
+    ("agulhas", {"name": "Agulhas Cartucho RL 0,35mm", "brand": "Electric Ink", "lowest_price": "R$ 80,00"}),
+    ("biosseguranca", {"name": "Luva Nitrílica Preta", "brand": "Supermax", "lowest_price": "R$ 35,00"}),
+]
+
+def _read_files(index_dir):
+    files = {}
+    for filename in os.listdir(index_dir):
+        with open(os.path.join(index_dir, filename), 'r', encoding='utf-8') as f:
+            files[filename] = f.read()
+    return files
+
+def test_ids_do_not_depend_on_other_products():
+    ids = {row[1]: row[0] for row in search_index.build_search_index(CATALOG)["rows"]}
+    # "Agulhas ..." entra antes de todos os outros em ordem alfabética
+    without_first = search_index.build_search_index(CATALOG[:2] + CATALOG[3:])["rows"]
+    for row in without_first:
+        assert row[0] == ids[row[1]]
+
+def test_adding_a_product_rewrites_only_its_shards(tmp_path):
+    index_dir = str(tmp_path)
+    search_index.write_search_index(search_index.build_search_index(CATALOG), index_dir)
+    before = _read_files(index_dir)
+    extra = ("tintas", {"name": "Tinta Zeta 30ml", "brand": "Zeta", "lowest_price": "R$ 10,00"})
+    search_index.write_search_index(search_index.build_search_index(CATALOG + [extra]), index_dir)
+    after = _read_files(index_dir)
+
+    changed = {filename for filename in after if before.get(filename) != after[filename]}
+    # Shards dos tokens "tinta", "zeta" e "30ml", a tabela de produtos e o
+    # manifesto (que ganha o shard "z" e o novo total)
+    assert changed == {"t.json", "z.json", "3.json", search_index.PRODUCTS_FILENAME, search_index.MANIFEST_FILENAME}
+
+def test_search_returns_products_in_alphabetical_order(tmp_path):
+    search_index.write_search_index(search_index.build_search_index(CATALOG), str(tmp_path))
+    index = search_index.load_search_index(str(tmp_path))
+    assert [product["name"] for product in search_index.search(index, "pret")] == [
+        "Luva Nitrílica Preta", "Tinta Preta Dinamite 30ml",
+    ]
+    assert search_index.search(index, "tinta", limit=1)[0]["name"] == "Tinta Branca Opaca 30ml"
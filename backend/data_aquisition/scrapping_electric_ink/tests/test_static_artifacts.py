@@ -0,0 +1,60 @@
+import gzip
+import json
+import os
+
+import categorize_products
+import static_artifacts
+
+# Publicação dos arquivos estáticos pela categorização: só as saídas da execução
+# (as do estado da categorização, o cosmeticos.json e o índice de busca), com o
+# mesmo texto que os sinks gravaram.
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MERGED_LIST = os.path.join(PROJECT_DIR, "data", "listas_mescladas", "lista_final_mesclada.json")
+
+def _categorize(tmp_path, stream=False):
+    with open(MERGED_LIST, 'r', encoding='utf-8') as f:
+        records = json.load(f)[:80]
+    input_file = str(tmp_path / "lista.json")
+    with open(input_file, 'w', encoding='utf-8') as f:
+        json.dump(records, f, ensure_ascii=False)
+    output_dir = str(tmp_path / "structured_by_type")
+    assert categorize_products.categorize_file(input_file, output_dir, stream=stream)
+    return output_dir
+
+def _published(output_dir):
+    published_dir = categorize_products.default_published_dir(output_dir)
+    return published_dir, static_artifacts.load_manifest(published_dir)["files"]
+
+def test_publishes_the_written_text(tmp_path):
+    output_dir = _categorize(tmp_path)
+    published_dir, files = _published(output_dir)
+    state_files = categorize_products.load_state(output_dir)["files"]
+    assert {name for name in files if not name.startswith("indice_busca/")} == \
+        {path[:-len(".json")] for path in state_files} | {"cosmeticos"}
+
+    for relative_path in state_files + ["cosmeticos.json"]:
+        with open(os.path.join(output_dir, relative_path), 'rb') as f:
+            written = f.read()
+        entry = files[relative_path[:-len(".json")]]
+        with open(os.path.join(published_dir, entry["path"]), 'rb') as f:
+            assert f.read() == written
+        with open(os.path.join(published_dir, entry["encodings"]["gzip"]["path"]), 'rb') as f:
+            assert gzip.decompress(f.read()) == written
+
+def test_publishes_only_the_files_of_the_run(tmp_path):
+    output_dir = _categorize(tmp_path)
+    # Arquivo que a categorização não gravou: não é publicado
+    manual_file = os.path.join(output_dir, "luvas", "manual.json")
+    os.makedirs(os.path.dirname(manual_file), exist_ok=True)
+    with open(manual_file, 'w', encoding='utf-8') as f:
+        json.dump([{"name": "Luva Manual"}], f)
+    # Depois de uma execução --stream, os .json e o cosmeticos.json anteriores também não
+    _categorize(tmp_path, stream=True)
+
+    _, files = _published(output_dir)
+    state_files = categorize_products.load_state(output_dir)["files"]
+    assert all(path.endswith(".jsonl") for path in state_files)
+    assert sorted(name for name in files if not name.startswith("indice_busca/")) == \
+        sorted(path[:-len(".jsonl")] for path in state_files)
+    assert all(files[path[:-len(".jsonl")]]["path"].endswith(".jsonl") for path in state_files)